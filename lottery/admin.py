@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import LotteryPeriod, Prediction, BacktestResult, DataUpdateLog
+from .models import LotteryPeriod, Prediction, BacktestResult, DataUpdateLog, Job
 
 
 @admin.register(LotteryPeriod)
@@ -12,8 +12,8 @@ class LotteryPeriodAdmin(admin.ModelAdmin):
 
 @admin.register(Prediction)
 class PredictionAdmin(admin.ModelAdmin):
-    list_display = ['predicted_for_period', 'confidence_score', 'should_bet', 'bet_amount', 'created_at']
-    list_filter = ['should_bet', 'created_at']
+    list_display = ['predicted_for_period', 'confidence_score', 'recommendation', 'total_cost', 'created_at']
+    list_filter = ['recommendation', 'created_at']
     search_fields = ['predicted_for_period']
     ordering = ['-created_at']
 
@@ -30,3 +30,10 @@ class DataUpdateLogAdmin(admin.ModelAdmin):
     list_display = ['update_type', 'periods_added', 'periods_updated', 'status', 'created_at']
     list_filter = ['update_type', 'status', 'created_at']
     ordering = ['-created_at']
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'progress', 'message', 'worker', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status', 'created_at']
+    ordering = ['-created_at']
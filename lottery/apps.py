@@ -4,3 +4,25 @@ from django.apps import AppConfig
 class LotteryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'lottery'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_save
+        from .db import apply_sqlite_profile
+        from .profiling import install_query_recorder
+        from .draws import invalidate_on_save
+        from .models import BacktestResult, DataUpdateLog, LotteryPeriod, Prediction
+        from .versioning import bump_on_save
+
+        connection_created.connect(apply_sqlite_profile, dispatch_uid='lottery_sqlite_profile')
+        # 请求剖析的 SQL 统计
+        connection_created.connect(install_query_recorder, dispatch_uid='lottery_query_recorder')
+
+        # 期次、预测、回测、更新日志单条变化时递增数据版本号（批量入库由 ingest 统一递增一次）
+        for model in (LotteryPeriod, Prediction, BacktestResult, DataUpdateLog):
+            post_save.connect(bump_on_save, sender=model, dispatch_uid=f'lottery_version_save_{model.__name__}')
+            post_delete.connect(bump_on_save, sender=model, dispatch_uid=f'lottery_version_delete_{model.__name__}')
+
+        # 单条保存/删除期次时作废进程内开奖历史快照（批量入库由 ingest 直接作废）
+        post_save.connect(invalidate_on_save, sender=LotteryPeriod, dispatch_uid='lottery_draws_save')
+        post_delete.connect(invalidate_on_save, sender=LotteryPeriod, dispatch_uid='lottery_draws_delete')
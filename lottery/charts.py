@@ -0,0 +1,101 @@
+"""
+图表序列降采样
+
+回测资金曲线动辄数千个点，整条嵌入页面既大又慢。这里用 LTTB
+（Largest-Triangle-Three-Buckets）把序列压缩到指定点数：首尾点保留，中间均分为若干桶，
+每桶选出与前一选中点、下一桶均值构成三角形面积最大的点，保留曲线形状和尖峰。
+另外强制保留全局最高/最低点和最大回撤的峰、谷，回撤幅度在概览图上不会被削平。
+
+放大查看时由 /api/backtests/<id>/series/ 按区间返回原始精度数据。
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# 降采样点数下限（少于 3 个点时 LTTB 没有意义）
+MIN_POINTS = 10
+
+
+def bucket_bounds(n: int, points: int) -> np.ndarray:
+    """中间 n - 2 个点均分为 points - 2 个桶，第 i 个桶为 [bounds[i], bounds[i + 1])"""
+    bounds = (np.arange(points - 1) * ((n - 2) / (points - 2))).astype(np.int64) + 1
+    bounds[-1] = n - 1
+    return bounds
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """LTTB 选出的下标（升序，含首尾）；点数不超过 points 时返回全部下标"""
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    bounds = bucket_bounds(n, points)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0] = a = 0
+    for i in range(points - 2):
+        start, end = bounds[i], bounds[i + 1]
+        # 下一个桶的均值（最后一个桶之后是尾点）
+        next_end = bounds[i + 2] if i + 2 < len(bounds) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(areas.argmax())
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+
+def landmarks(y: np.ndarray) -> List[int]:
+    """必须保留的点：全局最高、最低，最大回撤的峰和谷"""
+    running_peak = np.maximum.accumulate(y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown = np.where(running_peak > 0, (running_peak - y) / running_peak, 0.0)
+    trough = int(drawdown.argmax())
+    peak = int(y[:trough + 1].argmax())
+    return [int(y.argmax()), int(y.argmin()), peak, trough]
+
+
+def downsample_indices(y: np.ndarray, points: int) -> np.ndarray:
+    """
+    LTTB 下标，并把 landmarks 替换进各自所在的桶
+
+    同一个桶内有多个 landmark 时全部保留，结果最多比 points 多 3 个点。
+    """
+    n = len(y)
+    selected = lttb_indices(np.arange(n, dtype=np.float64), y, points)
+    if len(selected) == n:
+        return selected
+    bounds = bucket_bounds(n, points)
+    marks = np.array(sorted({index for index in landmarks(y) if 0 < index < n - 1}), dtype=np.int64)
+    # 第 b 个桶的选中点为 selected[b + 1]；含 landmark 的桶去掉 LTTB 选中点，再并入 landmark
+    keep = np.ones(len(selected), dtype=bool)
+    keep[np.searchsorted(bounds, marks, side='right')] = False
+    return np.unique(np.concatenate([selected[keep], marks]))
+
+
+def downsample(values: Sequence[float], points: int, offset: int = 0) -> Dict[str, list]:
+    """
+    降采样序列
+
+    Args:
+        values: 原始序列（下标即横坐标）
+        points: 目标点数（不小于 MIN_POINTS）
+        offset: 横坐标起点（放大区间时为区间起始下标）
+
+    Returns:
+        {'x': [原始下标...], 'y': [值...]}
+    """
+    y = np.asarray(values, dtype=np.float64)
+    if len(y) == 0:
+        return {'x': [], 'y': []}
+    indices = downsample_indices(y, max(points, MIN_POINTS))
+    return {'x': (indices + offset).tolist(), 'y': y[indices].tolist()}
+
+
+def parse_points(value: Optional[str], default: int, maximum: int) -> int:
+    """points= 参数，限制在 [MIN_POINTS, maximum]；无效时使用默认值"""
+    try:
+        points = int(value) if value else default
+    except ValueError:
+        points = default
+    return min(max(points, MIN_POINTS), maximum)
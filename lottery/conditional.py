@@ -0,0 +1,40 @@
+"""
+投注建议接口的条件请求（ETag / Last-Modified）
+
+轮询方带上 If-None-Match / If-Modified-Since 时，只比较数据版本号和最新预测的
+(id, created_at)，未变化直接返回 304，不读取也不序列化 betting_combinations 等大字段。
+配合 django.views.decorators.http.condition 使用。
+"""
+from .models import Prediction
+from .versioning import get_data_version, versioned
+
+
+def _latest_prediction():
+    return Prediction.objects.order_by('-created_at', '-id').values_list('id', 'created_at').first()
+
+
+def prediction_stamp(request):
+    """
+    (数据版本号, 最新预测 (id, created_at) 或 None)
+
+    同一请求内 ETag 与 Last-Modified 共用一次查询；最新预测按版本号缓存，
+    未变化时每次请求只有一次版本号查询。
+    """
+    stamp = getattr(request, '_prediction_stamp', None)
+    if stamp is None:
+        version = get_data_version()
+        stamp = (version, versioned('latest_prediction_stamp', _latest_prediction, version=version))
+        request._prediction_stamp = stamp
+    return stamp
+
+
+def prediction_etag(request, *args, **kwargs) -> str:
+    """ETag：最新预测 id + 数据版本号（响应与查询参数有关，客户端按 URL 分别缓存）"""
+    version, latest = prediction_stamp(request)
+    return f"{latest[0] if latest else 0}-v{version}"
+
+
+def prediction_last_modified(request, *args, **kwargs):
+    """Last-Modified：最新预测的生成时间"""
+    version, latest = prediction_stamp(request)
+    return latest[1] if latest else None
@@ -0,0 +1,55 @@
+"""
+SQLite 连接配置
+
+新建数据库连接时按 settings.SQLITE_PROFILE 设置 PRAGMA（WAL、synchronous、
+cache_size、mmap_size 等）。只读连接（NAME 使用 mode=ro 的 URI）额外开启
+query_only，并跳过需要写权限的 journal_mode。
+"""
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 需要写权限的 PRAGMA
+WRITE_PRAGMAS = {'journal_mode'}
+
+
+def is_read_only(settings_dict) -> bool:
+    """连接是否为只读（file:...?mode=ro）"""
+    return 'mode=ro' in str(settings_dict.get('NAME', ''))
+
+
+def build_pragmas(profile: dict, read_only: bool = False) -> list:
+    """
+    将配置转换为 PRAGMA 语句列表
+
+    Args:
+        profile: {'journal_mode': 'WAL', 'synchronous': 'NORMAL', ...}
+        read_only: 是否为只读连接
+    """
+    statements = []
+    for name, value in profile.items():
+        if read_only and name in WRITE_PRAGMAS:
+            continue
+        statements.append(f"PRAGMA {name}={value}")
+    if read_only:
+        statements.append("PRAGMA query_only=ON")
+    return statements
+
+
+def apply_sqlite_profile(sender, connection, **kwargs):
+    """connection_created 信号处理：设置 SQLite PRAGMA"""
+    if connection.vendor != 'sqlite':
+        return
+
+    profile = getattr(settings, 'SQLITE_PROFILE', None)
+    if not profile:
+        return
+
+    read_only = is_read_only(connection.settings_dict)
+    statements = build_pragmas(profile, read_only=read_only)
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    logger.debug(f"SQLite 连接 {connection.alias}{'（只读）' if read_only else ''}: {'; '.join(statements)}")
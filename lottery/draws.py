@@ -0,0 +1,268 @@
+"""
+开奖历史的进程内紧凑副本
+
+每个 Web 进程把全部开奖号码按开奖序号保存为 (N, 3) uint8 数组（每期 3 字节），
+期号/日期/ID 存在并列的列表中。预测、特征页、批量情景的输入窗口直接是数组切片（不复制），
+不再逐行查询、构造 LotteryPeriod 对象。
+
+快照不可变：数据变化时构造新快照整体替换，正在使用旧快照的请求不受影响。
+是否过期按 (全局数据版本号, 最大开奖序号) 判断，每次取快照只需一条查询；
+版本号各进程共享、入库提交后递增，其他进程（定时任务、run_jobs）入库后本进程也能发现。
+本进程入库/保存期次时还会立即作废快照（invalidate）。
+过期时只增量读取新增/变更的行；补录历史导致序号重排时整体重新加载。
+"""
+import logging
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+
+from .models import DataVersion, LotteryPeriod
+from .versioning import DATA_VERSION_PK
+
+logger = logging.getLogger(__name__)
+
+SHAPES = {1: '豹子', 2: '组三', 3: '组六'}
+
+ROW_FIELDS = ('id', 'seq', 'period', 'date', 'digit1', 'digit2', 'digit3', 'updated_at', 'created_at')
+
+
+class Draw(NamedTuple):
+    """一期开奖（字段与 LotteryPeriod 同名，可直接用于模板和 build_prediction）"""
+    pk: int
+    seq: int
+    period: str
+    date: date
+    digit1: int
+    digit2: int
+    digit3: int
+
+    @property
+    def numbers(self) -> List[int]:
+        return [self.digit1, self.digit2, self.digit3]
+
+    @property
+    def sum_value(self) -> int:
+        return self.digit1 + self.digit2 + self.digit3
+
+    @property
+    def shape(self) -> str:
+        return SHAPES[len(set(self.numbers))]
+
+
+class DrawWindow:
+    """连续若干期（按时间正序）；digits 为快照数组的切片视图，不复制数据"""
+
+    def __init__(self, snapshot: 'DrawSnapshot', start: int, stop: int):
+        self.snapshot = snapshot
+        self.start = start
+        self.stop = stop
+
+    @property
+    def digits(self) -> np.ndarray:
+        """(n, 3) uint8，只读"""
+        return self.snapshot.digits[self.start:self.stop]
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index: int) -> Draw:
+        if isinstance(index, slice):
+            raise TypeError('DrawWindow 不支持切片，请使用 digits')
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.snapshot.draw(self.start + index)
+
+    def __iter__(self) -> Iterator[Draw]:
+        for row in range(self.start, self.stop):
+            yield self.snapshot.draw(row)
+
+    @property
+    def following(self) -> Optional[Draw]:
+        """窗口之后的一期（最新窗口时为 None）"""
+        return self.snapshot.draw(self.stop) if self.stop < len(self.snapshot) else None
+
+
+class DrawSnapshot:
+    """某一数据版本下的全部开奖（不可变）"""
+
+    def __init__(self, ids: List[int], seqs: List[int], periods: List[str], dates: List[date],
+                 digits: np.ndarray, stamp: Tuple, mark: Optional[datetime]):
+        self.ids = ids
+        self.seqs = seqs
+        self.periods = periods
+        self.dates = dates
+        self.digits = digits
+        self.digits.setflags(write=False)
+        self.stamp = stamp
+        # 已载入行的最大 created_at/updated_at，增量刷新从这里开始
+        self.mark = mark
+        self.index: Dict[str, int] = {period: row for row, period in enumerate(periods)}
+
+    def __len__(self) -> int:
+        return len(self.periods)
+
+    def draw(self, row: int) -> Draw:
+        d1, d2, d3 = self.digits[row].tolist()
+        return Draw(self.ids[row], self.seqs[row], self.periods[row], self.dates[row], d1, d2, d3)
+
+    def latest(self) -> Optional[Draw]:
+        return self.draw(len(self) - 1) if len(self) else None
+
+    def latest_window(self, n: int) -> DrawWindow:
+        """最近 n 期（不足 n 期时返回全部）"""
+        return DrawWindow(self, max(len(self) - n, 0), len(self))
+
+    def window_ending(self, period: str, n: int) -> Optional[DrawWindow]:
+        """截至指定期号（含）的 n 期；期号不存在时返回 None"""
+        row = self.index.get(period)
+        if row is None:
+            return None
+        return DrawWindow(self, max(row + 1 - n, 0), row + 1)
+
+    def window_before(self, period: str, n: int) -> Optional[DrawWindow]:
+        """指定期号之前（不含）的 n 期；期号不存在时返回 None"""
+        row = self.index.get(period)
+        if row is None:
+            return None
+        return DrawWindow(self, max(row - n, 0), row)
+
+
+def _max_mark(rows) -> Optional[datetime]:
+    marks = [max(row[7], row[8]) for row in rows]
+    return max(marks) if marks else None
+
+
+def current_stamp() -> Tuple:
+    """(数据版本号, 最大开奖序号)，一条查询"""
+    version_table = connection.ops.quote_name(DataVersion._meta.db_table)
+    period_table = connection.ops.quote_name(LotteryPeriod._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT (SELECT version FROM {version_table} WHERE id = %s), "
+                       f"(SELECT MAX(seq) FROM {period_table})", [DATA_VERSION_PK])
+        return tuple(cursor.fetchone())
+
+
+def load_snapshot(stamp: Tuple = None) -> DrawSnapshot:
+    """全量读取（一次查询）"""
+    if stamp is None:
+        stamp = current_stamp()
+    rows = list(LotteryPeriod.objects.order_by('seq').values_list(*ROW_FIELDS))
+    digits = np.array([row[4:7] for row in rows], dtype=np.uint8).reshape(len(rows), 3)
+    return DrawSnapshot([row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows],
+                        [row[3] for row in rows], digits, stamp, _max_mark(rows))
+
+
+def refresh_snapshot(snapshot: DrawSnapshot, stamp: Tuple) -> DrawSnapshot:
+    """
+    增量刷新
+
+    只读取序号超出快照或在 mark 之后新增/修改的行：末尾追加的新开奖直接拼接，
+    已有期次的号码更正原位替换；补录历史（序号重排）或删除期次时全量重新加载。
+    """
+    last_seq = snapshot.seqs[-1] if len(snapshot) else 0
+    changes = Q(seq__gt=last_seq)
+    if snapshot.mark is not None:
+        changes |= Q(updated_at__gt=snapshot.mark) | Q(created_at__gt=snapshot.mark)
+    rows = list(LotteryPeriod.objects.filter(changes).order_by('seq').values_list(*ROW_FIELDS))
+
+    appended = [row for row in rows if row[1] > last_seq]
+    updated = [(snapshot.index.get(row[2]), row) for row in rows if row[1] <= last_seq]
+    consistent = (
+        all(pos is not None and snapshot.seqs[pos] == row[1] for pos, row in updated)
+        and LotteryPeriod.objects.count() == len(snapshot) + len(appended)
+    )
+    if not consistent:
+        logger.info("开奖序号已变化，重新加载开奖历史")
+        return load_snapshot(stamp)
+    if not rows:
+        return DrawSnapshot(snapshot.ids, snapshot.seqs, snapshot.periods, snapshot.dates,
+                            snapshot.digits, stamp, snapshot.mark)
+
+    new_digits = np.array([row[4:7] for row in appended], dtype=np.uint8).reshape(len(appended), 3)
+    digits = np.concatenate([snapshot.digits, new_digits])
+    dates = snapshot.dates + [row[3] for row in appended]
+    for pos, row in updated:
+        digits[pos] = row[4:7]
+        dates[pos] = row[3]
+    marks = [m for m in (snapshot.mark, _max_mark(rows)) if m is not None]
+    return DrawSnapshot(snapshot.ids + [row[0] for row in appended],
+                        snapshot.seqs + [row[1] for row in appended],
+                        snapshot.periods + [row[2] for row in appended],
+                        dates, digits, stamp, max(marks))
+
+
+_snapshot: Optional[DrawSnapshot] = None
+_lock = threading.Lock()
+
+
+def get_draws() -> DrawSnapshot:
+    """
+    当前开奖历史快照
+
+    每次调用只查询一次 (版本号, 最大序号)；未变化时直接返回已有快照。
+    """
+    global _snapshot
+    stamp = current_stamp()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.stamp == stamp:
+        return snapshot
+    with _lock:
+        snapshot = _snapshot
+        if snapshot is None:
+            snapshot = load_snapshot(stamp)
+        elif snapshot.stamp != stamp:
+            snapshot = refresh_snapshot(snapshot, stamp)
+        _snapshot = snapshot
+    return snapshot
+
+
+aget_draws = sync_to_async(get_draws)
+
+
+def invalidate():
+    """
+    作废本进程的快照，下次 get_draws() 时增量刷新
+
+    立即作废一次，事务提交后再作废一次：避免提交前其他线程读到旧数据后以新版本号缓存。
+    """
+    _invalidate()
+    transaction.on_commit(_invalidate)
+
+
+def _invalidate():
+    global _snapshot
+    with _lock:
+        snapshot = _snapshot
+        if snapshot is not None:
+            # 保留数据用于增量刷新，只让版本比较失败
+            _snapshot = DrawSnapshot(snapshot.ids, snapshot.seqs, snapshot.periods, snapshot.dates,
+                                     snapshot.digits, None, snapshot.mark)
+
+
+def invalidate_on_save(sender, **kwargs):
+    """LotteryPeriod 的 post_save/post_delete 信号处理"""
+    invalidate()
+
+
+def warm_up():
+    """进程启动时预先加载（数据库未就绪时跳过，首次使用时再加载）"""
+    try:
+        snapshot = get_draws()
+    except DatabaseError as e:
+        logger.warning(f"开奖历史预加载失败: {e}")
+        return
+    logger.info(f"已加载开奖历史 {len(snapshot)} 期（{snapshot.digits.nbytes} 字节）")
+
+
+def reset():
+    """丢弃快照（测试使用）"""
+    global _snapshot
+    with _lock:
+        _snapshot = None
@@ -0,0 +1,281 @@
+"""
+事件发布/订阅（Server-Sent Events）
+
+入库、预测、后台任务 publish() 事件：事件写入 Event 表，与当前事务一起提交，
+因此 run_jobs、scheduler 等独立进程发布的事件所有 Web 进程都能收到。
+
+/api/events/ 的每个 SSE 连接是一个订阅者：只占一个 asyncio.Queue 和一个挂起的协程。
+每个事件循环只有一个轮询任务（EventRelay），按 ID 顺序读取新事件，序列化一次后投递给该循环上的订阅者；
+本进程发布的事件在提交后立即唤醒轮询，其它进程的事件最迟 settings.SSE_POLL_INTERVAL 秒后送达。
+没有订阅者时不轮询。
+
+Event 的自增 ID 即 SSE 事件 ID：客户端重连时按 Last-Event-ID 从表中补发，不依赖连接到同一个进程。
+（SQLite 同一时刻只有一个写事务，ID 按提交顺序递增，按 ID 读取不会漏掉晚提交的事件。）
+
+事件类型:
+    draw_ingested     新开奖入库 {'added', 'updated', 'latest': {'period', 'date', 'numbers'}}
+    prediction_ready  新预测生成 {'period', 'num_bets', 'score', 'should_bet'}
+    job_progress      后台任务进度/结束 {'id', 'kind', 'status', 'progress', 'message'}
+"""
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+from .models import Event
+from .responses import dumps
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ('draw_ingested', 'prediction_ready', 'job_progress')
+
+# 每次轮询最多读取的事件数（积压更多时连续读取）
+POLL_BATCH = 500
+# 每发布这么多条事件清理一次旧事件
+PRUNE_EVERY = 100
+
+
+def format_event(event_id: int, event: str, data: Dict) -> bytes:
+    """SSE 消息帧"""
+    return b'id: %d\nevent: %s\ndata: %s\n\n' % (event_id, event.encode(), dumps(data))
+
+
+# ==================== 事件表 ====================
+
+def latest_event_id() -> int:
+    """最后一条事件的 ID（没有事件时为 0）"""
+    return Event.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def fetch_events(after: int, limit: int = POLL_BATCH) -> List[Tuple[int, str, bytes]]:
+    """ID 大于 after 的事件 [(id, event, message)]，按 ID 升序"""
+    rows = Event.objects.filter(id__gt=after).order_by('id').values_list('id', 'event', 'data')[:limit]
+    return [(event_id, event, format_event(event_id, event, data)) for event_id, event, data in rows]
+
+
+def replay_events(last_event_id: int, events: Optional[Set[str]] = None) -> List[Tuple[int, str, bytes]]:
+    """重连时补发的事件：last_event_id 之后最近的 settings.SSE_REPLAY 条，按 ID 升序"""
+    rows = Event.objects.filter(id__gt=last_event_id)
+    if events:
+        rows = rows.filter(event__in=events)
+    rows = rows.order_by('-id').values_list('id', 'event', 'data')[:getattr(settings, 'SSE_REPLAY', 200)]
+    return [(event_id, event, format_event(event_id, event, data)) for event_id, event, data in reversed(rows)]
+
+
+# ==================== 订阅 ====================
+
+class Subscription:
+    """一个 SSE 连接的订阅（在其事件循环内使用）"""
+
+    def __init__(self, bus: 'EventBus', relay: 'EventRelay', events: Optional[Set[str]], maxsize: int):
+        self.bus = bus
+        self.relay = relay
+        self.events = events
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+        # 订阅时最后一条事件的 ID，连接开始时发给客户端作为重连起点
+        self.start_id = 0
+
+    def wants(self, event: str) -> bool:
+        return self.events is None or event in self.events
+
+    def offer(self, message: bytes):
+        """投递消息（在订阅者的事件循环中调用）；消费过慢时丢弃最旧的消息"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def get(self) -> bytes:
+        return await self.queue.get()
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventRelay:
+    """一个事件循环上的轮询任务：读取 Event 表中的新事件，投递给该循环上的订阅者"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.subscribers: Set[Subscription] = set()
+        # 正在订阅（尚未登记）的连接数
+        self.joining = 0
+        # 已投递的最后一条事件 ID
+        self.cursor = 0
+        self.task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._starting = asyncio.Lock()
+
+    async def start(self):
+        """启动轮询（已在运行时不做任何事）；从当前最后一条事件之后开始"""
+        async with self._starting:
+            if self.task is None:
+                self.cursor = await sync_to_async(latest_event_id)()
+                self.task = self.loop.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def wake(self):
+        """立即轮询（可在任意线程调用）"""
+        self.loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def run(self):
+        interval = getattr(settings, 'SSE_POLL_INTERVAL', 1)
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.poll()
+            except Exception as e:
+                # 数据库暂时不可用等，下次轮询重试
+                logger.warning(f"读取推送事件失败: {e}")
+
+    async def poll(self):
+        """读取并投递 cursor 之后的事件"""
+        while True:
+            rows = await sync_to_async(fetch_events)(self.cursor)
+            for event_id, event, message in rows:
+                self.cursor = event_id
+                for sub in self.subscribers:
+                    if sub.wants(event):
+                        sub.offer(message)
+            if len(rows) < POLL_BATCH:
+                return
+
+
+class EventBus:
+    """本进程的订阅者，按事件循环分组，每个循环一个 EventRelay"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._relays: Dict[asyncio.AbstractEventLoop, EventRelay] = {}
+
+    def _relay(self, loop: asyncio.AbstractEventLoop) -> EventRelay:
+        with self._lock:
+            relay = self._relays.get(loop)
+            if relay is None:
+                # 顺便移除已关闭的事件循环
+                for closed in [l for l in self._relays if l.is_closed()]:
+                    del self._relays[closed]
+                relay = self._relays[loop] = EventRelay(loop)
+            return relay
+
+    async def subscribe(self, events: Optional[Iterable[str]] = None,
+                        last_event_id: Optional[int] = None) -> Subscription:
+        """在当前事件循环中订阅；给出 last_event_id 时先放入错过的事件"""
+        events = set(events) if events else None
+        relay = self._relay(asyncio.get_running_loop())
+        # 登记前其它连接退订也不停止轮询，否则 cursor 之后的事件没人投递
+        relay.joining += 1
+        try:
+            await relay.start()
+            missed = await sync_to_async(replay_events)(last_event_id, events) if last_event_id is not None else []
+        finally:
+            relay.joining -= 1
+
+        # 以下到登记之间没有 await：cursor 之前的事件由补发放入，之后的由轮询投递，不重复也不遗漏
+        sub = Subscription(self, relay, events, getattr(settings, 'SSE_QUEUE_SIZE', 100))
+        sub.start_id = relay.cursor
+        for event_id, event, message in missed:
+            if event_id <= relay.cursor:
+                sub.offer(message)
+        relay.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        relay = sub.relay
+        relay.subscribers.discard(sub)
+        if not relay.subscribers and not relay.joining:
+            relay.stop()
+
+    def wake(self):
+        """有新事件提交：唤醒本进程所有正在轮询的事件循环"""
+        with self._lock:
+            relays = [relay for relay in self._relays.values() if relay.task is not None]
+        for relay in relays:
+            try:
+                relay.wake()
+            except RuntimeError:
+                # 事件循环已关闭（连接异常终止）
+                pass
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(relay.subscribers) for relay in self._relays.values())
+
+
+event_bus = EventBus()
+
+
+def publish(event: str, data: Dict) -> Optional[int]:
+    """
+    发布事件，返回事件 ID
+
+    事件随当前事务提交（回滚时不推送），提交后唤醒本进程的订阅者。
+    """
+    try:
+        with transaction.atomic():
+            event_id = Event.objects.create(event=event, data=data).pk
+            if event_id % PRUNE_EVERY == 0:
+                Event.objects.filter(id__lte=event_id - getattr(settings, 'SSE_EVENT_KEEP', 1000)).delete()
+    except Exception as e:
+        # 推送失败不影响入库/预测
+        logger.warning(f"事件发布失败: {event} - {e}")
+        return None
+    transaction.on_commit(event_bus.wake)
+    return event_id
+
+
+async def apublish(event: str, data: Dict) -> Optional[int]:
+    """发布事件（异步代码中使用）"""
+    return await sync_to_async(publish)(event, data)
+
+
+# ==================== SSE 输出 ====================
+
+def handshake(last_id: int) -> bytes:
+    """连接开始的帧：重连间隔和当前事件 ID（不触发事件，客户端重连时作为 Last-Event-ID 带回）"""
+    return b'retry: %d\nid: %d\n\n' % (getattr(settings, 'SSE_RETRY_MS', 3000), last_id)
+
+
+async def sse_stream(sub: Subscription) -> AsyncIterator[bytes]:
+    """
+    SSE 连接的输出（ASGI）
+
+    无事件时每 settings.SSE_HEARTBEAT 秒发送一行注释，防止代理断开空闲连接；
+    客户端断开时 Django 取消该生成器，finally 中退订。
+    """
+    heartbeat = getattr(settings, 'SSE_HEARTBEAT', 15)
+    try:
+        yield handshake(sub.start_id)
+        while True:
+            try:
+                yield await asyncio.wait_for(sub.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b': ping\n\n'
+    finally:
+        sub.close()
+
+
+def sse_replay(last_event_id: Optional[int], events: Optional[Set[str]] = None) -> List[bytes]:
+    """
+    WSGI 下的输出：只返回错过的事件后结束
+
+    WSGI 不能保持长连接，EventSource 会按 retry 间隔自动重连并带上 Last-Event-ID，
+    相当于长轮询。
+    """
+    last_id = latest_event_id()
+    missed = replay_events(last_event_id, events) if last_event_id is not None else []
+    return [handshake(last_id), *(message for event_id, event, message in missed)]
@@ -0,0 +1,162 @@
+"""
+批量数据导出
+
+历史开奖、预测记录、回测期次结果按 NDJSON 或 CSV 流式输出。
+查询使用 .iterator(chunk_size) 分批读取（只读 analytics 连接），
+内存占用与表大小无关；since=<期号> 只导出该期之后的数据，便于增量拉取。
+
+ASGI 下 StreamingHttpResponse 遇到同步迭代器会先整体 list() 再发送，
+因此 ASGI 请求改用 async_chunks() 包装，每次在同步线程中取一批行。
+"""
+import csv
+import itertools
+import json
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import LotteryPeriod, Prediction, BacktestDetail, unpack_detail
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+HISTORY_FIELDS = ['period', 'seq', 'date', 'digit1', 'digit2', 'digit3', 'sum_value', 'shape']
+
+PREDICTION_FIELDS = [
+    'id', 'period__period', 'predicted_for_period', 'top5_digits', 'confidence_score',
+    'recommendation', 'percentile_rank', 'strategy', 'total_cost', 'bet_count', 'created_at',
+]
+PREDICTION_COLUMNS = ['period' if f == 'period__period' else f for f in PREDICTION_FIELDS]
+
+BACKTEST_PERIOD_FIELDS = [
+    'backtest_id', 'strategy_name', 'period', 'action', 'confidence', 'bet_count',
+    'cost', 'prize', 'profit', 'capital', 'actual_numbers', 'reason',
+]
+
+
+class ExportError(ValueError):
+    """导出参数错误"""
+
+
+def _chunk_size() -> int:
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def _database() -> str:
+    return getattr(settings, 'EXPORT_DATABASE', 'default')
+
+
+def history_rows(since: Optional[str] = None) -> Iterator[Dict]:
+    """历史开奖（按开奖顺序）"""
+    rows = LotteryPeriod.objects.using(_database()).order_by('seq')
+    if since:
+        rows = rows.filter(period__gt=since)
+    for row in rows.values(*HISTORY_FIELDS).iterator(chunk_size=_chunk_size()):
+        row['date'] = row['date'].isoformat()
+        yield row
+
+
+def prediction_rows(since: Optional[str] = None) -> Iterator[Dict]:
+    """预测记录（按生成时间）"""
+    rows = Prediction.objects.using(_database()).order_by('created_at', 'id')
+    if since:
+        rows = rows.filter(predicted_for_period__gt=since)
+    for row in rows.values(*PREDICTION_FIELDS).iterator(chunk_size=_chunk_size()):
+        row['period'] = row.pop('period__period')
+        row['created_at'] = row['created_at'].isoformat()
+        yield row
+
+
+def backtest_period_rows(since: Optional[str] = None, backtest_id: Optional[int] = None) -> Iterator[Dict]:
+    """回测期次结果（逐个回测展开 period_results）"""
+    details = BacktestDetail.objects.using(_database()).order_by('backtest_id')
+    if backtest_id is not None:
+        details = details.filter(backtest_id=backtest_id)
+    # 每个回测的明细较大，逐条读取解压
+    rows = details.values_list('backtest_id', 'backtest__strategy_name', 'payload')
+    for pk, strategy_name, payload in rows.iterator(chunk_size=1):
+        for result in unpack_detail(payload)['period_results']:
+            if since and str(result.get('period', '')) <= since:
+                continue
+            yield {'backtest_id': pk, 'strategy_name': strategy_name, **result}
+
+
+DATASETS = {
+    'history': (HISTORY_FIELDS, history_rows),
+    'predictions': (PREDICTION_COLUMNS, prediction_rows),
+    'backtests': (BACKTEST_PERIOD_FIELDS, backtest_period_rows),
+}
+
+
+def ndjson_lines(rows: Iterable[Dict]) -> Iterator[str]:
+    """每行一个 JSON 对象"""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """csv.writer 的伪文件对象，write 直接返回写入内容"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns: List[str], rows: Iterable[Dict]) -> Iterator[str]:
+    """CSV（带 BOM 便于 Excel 识别中文），列表/字典字段编码为 JSON"""
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow(columns)
+    for row in rows:
+        values = []
+        for column in columns:
+            value = row.get(column)
+            if isinstance(value, (list, dict)):
+                value = json.dumps(value, ensure_ascii=False)
+            values.append('' if value is None else value)
+        yield writer.writerow(values)
+
+
+def export_stream(dataset: str, fmt: str = 'ndjson', since: Optional[str] = None,
+                  **filters) -> Iterator[str]:
+    """
+    生成导出内容
+
+    Args:
+        dataset: history / predictions / backtests
+        fmt: ndjson / csv
+        since: 只导出该期号之后的数据
+        filters: 数据集的其他筛选参数（如 backtests 的 backtest_id）
+    """
+    if dataset not in DATASETS:
+        raise ExportError(f'未知数据集: {dataset}')
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f'不支持的格式: {fmt}')
+
+    columns, row_source = DATASETS[dataset]
+    rows = row_source(since=since, **filters)
+    if fmt == 'csv':
+        return csv_lines(columns, rows)
+    return ndjson_lines(rows)
+
+
+async def async_chunks(lines: Iterator[str], batch: Optional[int] = None) -> AsyncIterator[str]:
+    """
+    把同步导出流转换为异步迭代器（ASGI）
+
+    每批 batch 行（默认 EXPORT_CHUNK_SIZE）在同一个同步线程中读取（数据库游标属于该线程的连接），
+    拼接后发送；客户端断开时关闭生成器，释放游标。
+    """
+    batch = batch or _chunk_size()
+
+    def next_batch() -> str:
+        return ''.join(itertools.islice(lines, batch))
+
+    try:
+        while True:
+            chunk = await sync_to_async(next_batch)()
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        close = getattr(lines, 'close', None)
+        if close is not None:
+            await sync_to_async(close)()
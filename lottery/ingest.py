@@ -0,0 +1,256 @@
+"""
+开奖数据入库服务
+
+爬虫接口、定时任务和导入脚本共用的批量写入路径：
+一次查询比对已有期号，新增记录 bulk_create、变更记录 bulk_update，
+全部在同一个事务内按批次完成。回测结果 JSON 的导入（ingest_backtest）
+同样由导入脚本和后台任务共用。
+"""
+import json
+import logging
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BacktestResult, LotteryPeriod, DataUpdateLog
+from .search import draw_code_of, group_key_of
+from .prediction import schedule_precompute
+from .versioning import bump_data_version
+from .events import publish
+from .draws import invalidate as invalidate_draws
+
+logger = logging.getLogger(__name__)
+
+# 参与比对的字段（与 LotteryPeriod 一致）
+DRAW_FIELDS = ['date', 'digit1', 'digit2', 'digit3', 'sum_value', 'shape', 'draw_code', 'group_key']
+
+
+def get_shape(numbers: List[int]) -> str:
+    """根据开奖号码计算形态：豹子/组三/组六"""
+    counter = Counter(numbers)
+    if len(counter) == 1:
+        return '豹子'
+    elif len(counter) == 2:
+        return '组三'
+    return '组六'
+
+
+def normalize_record(item: Dict) -> Dict:
+    """
+    将爬虫/数据文件中的一条记录转换为 LotteryPeriod 字段
+
+    Args:
+        item: {'period': ..., 'date': 'YYYY-MM-DD', 'numbers': [d1, d2, d3]}
+    """
+    numbers = [int(n) for n in item['numbers']]
+
+    # 解析日期
+    try:
+        date_obj = datetime.strptime(item['date'], '%Y-%m-%d').date()
+    except (KeyError, TypeError, ValueError):
+        date_obj = datetime.now().date()
+
+    return {
+        'period': str(item['period']),
+        'date': date_obj,
+        'digit1': numbers[0],
+        'digit2': numbers[1],
+        'digit3': numbers[2],
+        'sum_value': sum(numbers),
+        'shape': get_shape(numbers),
+        'draw_code': draw_code_of(numbers),
+        'group_key': group_key_of(numbers),
+    }
+
+
+def ingest_records(records: Iterable[Dict], update_type: str = 'crawler',
+                   chunk_size: int = None, log: bool = True,
+                   message: str = None) -> Dict:
+    """
+    批量写入开奖记录
+
+    Args:
+        records: 原始记录列表（见 normalize_record）
+        update_type: 写入 DataUpdateLog 的更新类型（crawler/manual/scheduler）
+        chunk_size: 每批写入的行数，默认取 settings.INGEST_CHUNK_SIZE
+        log: 是否记录 DataUpdateLog
+        message: 日志消息，默认自动生成
+
+    Returns:
+        {'added': 新增期数, 'updated': 更新期数, 'unchanged': 未变化期数, 'total': 输入期数}
+    """
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'INGEST_CHUNK_SIZE', 500)
+
+    # 同一期号以最后一条为准
+    incoming = {}
+    for item in records:
+        row = normalize_record(item)
+        incoming[row['period']] = row
+
+    existing = LotteryPeriod.objects.in_bulk(list(incoming), field_name='period')
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    needs_resequence = False
+    for period, row in incoming.items():
+        obj = existing.get(period)
+        if obj is None:
+            to_create.append(LotteryPeriod(**row))
+            continue
+
+        if any(getattr(obj, field) != row[field] for field in DRAW_FIELDS):
+            if obj.date != row['date']:
+                needs_resequence = True
+            for field in DRAW_FIELDS:
+                setattr(obj, field, row[field])
+            obj.updated_at = now
+            to_update.append(obj)
+
+    # 开奖序号：新数据全部晚于已有数据时直接追加编号，否则（补录历史）整体重排
+    to_create.sort(key=lambda obj: (obj.date, obj.period))
+    if to_create and not needs_resequence:
+        last = LotteryPeriod.objects.order_by('-seq').values('seq', 'date', 'period').first()
+        if last is None:
+            next_seq = 1
+        elif last['seq'] is not None and (to_create[0].date, to_create[0].period) > (last['date'], last['period']):
+            next_seq = last['seq'] + 1
+        else:
+            next_seq = None
+            needs_resequence = True
+
+        if next_seq is not None:
+            for offset, obj in enumerate(to_create):
+                obj.seq = next_seq + offset
+
+    with transaction.atomic():
+        LotteryPeriod.objects.bulk_create(to_create, batch_size=chunk_size)
+        LotteryPeriod.objects.bulk_update(to_update, DRAW_FIELDS + ['updated_at'], batch_size=chunk_size)
+        if needs_resequence:
+            LotteryPeriod.objects.resequence(batch_size=chunk_size)
+        if to_create or to_update:
+            bump_data_version()
+            invalidate_draws()
+        if to_create:
+            # 有新开奖时，提交后立即预计算下一期预测
+            transaction.on_commit(schedule_precompute)
+
+        stats = {
+            'added': len(to_create),
+            'updated': len(to_update),
+            'unchanged': len(incoming) - len(to_create) - len(to_update),
+            'total': len(incoming),
+        }
+
+        if to_create or to_update:
+            latest = to_create[-1] if to_create else None
+            publish('draw_ingested', {
+                'added': stats['added'],
+                'updated': stats['updated'],
+                'latest': {
+                    'period': latest.period,
+                    'date': latest.date,
+                    'numbers': [latest.digit1, latest.digit2, latest.digit3],
+                } if latest else None,
+            })
+
+        if log:
+            DataUpdateLog.objects.create(
+                update_type=update_type,
+                periods_added=stats['added'],
+                periods_updated=stats['updated'],
+                status='success',
+                message=message or f"成功导入{stats['total']}条数据",
+            )
+
+    logger.info(f"数据入库完成: 新增 {stats['added']} 期，更新 {stats['updated']} 期，"
+                f"未变化 {stats['unchanged']} 期")
+    return stats
+
+
+def ingest_backtest(data: Dict, strategy_name: str = 'Top 10% Dynamic') -> BacktestResult:
+    """
+    导入一次回测结果（results/*.json：{'summary': {...}, 'period_results': [...]}）
+
+    Returns:
+        新建的 BacktestResult（明细压缩存入 BacktestDetail）
+    """
+    summary = data['summary']
+    period_results = data['period_results']
+
+    # 期号范围（period_results 按时间倒序）
+    bet_periods = [p for p in period_results if p.get('action') == 'bet']
+    if bet_periods:
+        start_period = bet_periods[-1].get('period', 'Unknown')
+        end_period = bet_periods[0].get('period', 'Unknown')
+    else:
+        start_period = end_period = 'Unknown'
+
+    return BacktestResult.objects.create(
+        strategy_name=strategy_name,
+        start_period=start_period,
+        end_period=end_period,
+        total_periods=summary['total_periods'],
+        starting_capital=summary['starting_capital'],
+        final_capital=summary['final_capital'],
+        total_profit=summary['total_profit'],
+        roi_percentage=summary['roi_percentage'],
+        max_drawdown=summary['max_drawdown'],
+        bet_periods=summary['bet_periods'],
+        skip_periods=summary['skip_periods'],
+        win_periods=summary['win_periods'],
+        win_rate=summary['win_rate'],
+        total_invested=summary['total_invested'],
+        total_prizes=summary['total_prizes'],
+        period_results=period_results,
+        capital_history=summary['capital_history'],
+    )
+
+
+def crawl_records(start_page: int = 1, end_page: int = 3) -> List[Dict]:
+    """
+    抓取最新开奖页面并解析为原始记录（不访问数据库，可在线程池中执行）
+
+    Returns:
+        记录列表（见 normalize_record）；未抓取到数据时抛出 RuntimeError
+    """
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root / 'src'))
+    from data_loader.crawler_simple import SimpleLottery3DCrawler
+
+    crawler = SimpleLottery3DCrawler(
+        output_dir=str(project_root / 'data'),
+        max_workers=3,
+        sources=getattr(settings, 'CRAWLER_SOURCES', None),
+        hedge_options=getattr(settings, 'CRAWLER_HEDGE', None),
+    )
+    crawl_stats = crawler.crawl(start_page=start_page, end_page=end_page)
+
+    if crawl_stats['total_records'] == 0:
+        raise RuntimeError('爬取数据失败，未获取到数据')
+
+    json_file = crawl_stats.get('json_file')
+    if not json_file or not Path(json_file).exists():
+        raise RuntimeError('未找到爬取的数据文件')
+
+    with open(json_file, 'r', encoding='utf-8') as f:
+        return json.load(f).get('data', [])
+
+
+def crawl_and_ingest(start_page: int = 1, end_page: int = 3, update_type: str = 'crawler') -> Dict:
+    """
+    抓取最新开奖页面并入库
+
+    Returns:
+        ingest_records 的统计信息；未抓取到数据时抛出 RuntimeError
+    """
+    data_list = crawl_records(start_page=start_page, end_page=end_page)
+    return ingest_records(data_list, update_type=update_type,
+                          message=f'成功爬取{len(data_list)}条数据')
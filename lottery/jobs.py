@@ -0,0 +1,390 @@
+"""
+后台任务队列
+
+基于数据库（Job 表）的轻量任务队列，不依赖外部消息中间件：
+接口只负责 enqueue() 并返回任务 ID，由 `python manage.py run_jobs` 工作进程
+领取执行（可同时启动多个进程）。任务执行中通过 JobContext 上报进度、检查取消请求，
+客户端轮询 /api/jobs/<id>/ 获取状态。
+
+/api/jobs/ 提交的参数先经过任务类型注册的 clean 函数（白名单 + 取值校验），
+没有注册 clean 函数的任务类型只能由代码内部 enqueue()。
+"""
+import inspect
+import json
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .events import publish
+from .models import Job
+from .offload import get_pool
+
+logger = logging.getLogger(__name__)
+
+
+class JobError(ValueError):
+    """任务参数错误或任务不存在"""
+
+
+class JobCancelled(Exception):
+    """任务被取消（由 JobContext.check_cancelled 抛出）"""
+
+
+# ==================== 任务注册 ====================
+
+JOB_HANDLERS: Dict[str, Callable] = {}
+# 接口提交参数的校验函数：clean(**params) -> 规范化后的参数，参数无效时抛出 JobError
+JOB_CLEANERS: Dict[str, Callable] = {}
+
+
+def register(kind: str, clean: Callable = None):
+    """
+    注册任务处理函数：handler(ctx, **params) -> 可 JSON 序列化的结果
+
+    Args:
+        kind: 任务类型
+        clean: 接口提交参数的校验函数；为 None 时该类型不能通过 /api/jobs/ 提交
+    """
+    def decorator(fn):
+        JOB_HANDLERS[kind] = fn
+        if clean is not None:
+            JOB_CLEANERS[kind] = clean
+        return fn
+    return decorator
+
+
+def clean_params(kind: str, params: Dict) -> Dict:
+    """
+    校验接口提交的任务参数
+
+    Returns:
+        规范化后的参数；任务类型不可提交、参数名不在白名单或取值无效时抛出 JobError
+    """
+    if kind not in JOB_HANDLERS:
+        raise JobError(f'未知任务类型: {kind}')
+    clean = JOB_CLEANERS.get(kind)
+    if clean is None:
+        raise JobError(f'任务类型 {kind} 不能通过接口提交')
+    allowed = set(inspect.signature(clean).parameters)
+    unknown = sorted(set(params) - allowed)
+    if unknown:
+        raise JobError(f"不支持的参数: {', '.join(unknown)}")
+    return clean(**params)
+
+
+def int_param(name: str, value, minimum: int, maximum: int) -> int:
+    """整数参数，限制在 [minimum, maximum]"""
+    if isinstance(value, bool):
+        raise JobError(f'{name} 必须是整数')
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise JobError(f'{name} 必须是整数')
+    if not minimum <= value <= maximum:
+        raise JobError(f'{name} 必须在 {minimum}-{maximum} 之间')
+    return value
+
+
+def results_dir() -> Path:
+    """回测结果文件所在目录（import_backtest 只能读取该目录下的文件）"""
+    return Path(getattr(settings, 'JOB_RESULTS_DIR', Path(settings.BASE_DIR) / 'results')).resolve()
+
+
+def resolve_result_file(result_file) -> Path:
+    """
+    回测结果文件路径（相对路径相对于项目根目录，如 results/xxx.json）
+
+    解析符号链接和 .. 后必须位于 results_dir() 内且为 .json 文件，否则抛出 JobError。
+    """
+    if not isinstance(result_file, str) or not result_file:
+        raise JobError('result_file 必须是文件路径')
+    path = Path(result_file)
+    if not path.is_absolute():
+        path = Path(settings.BASE_DIR) / path
+    path = path.resolve()
+    if not path.is_relative_to(results_dir()) or path.suffix != '.json':
+        raise JobError(f'只能导入 results/ 目录下的 JSON 文件: {result_file}')
+    return path
+
+
+class JobContext:
+    """传给任务处理函数的上下文，用于上报进度和响应取消"""
+
+    def __init__(self, job: Job):
+        self.job = job
+
+    def progress(self, percent: float, message: str = ''):
+        """检查是否已请求取消，然后更新进度（同时刷新心跳）"""
+        self.check_cancelled()
+        percent = max(0.0, min(100.0, float(percent)))
+        Job.objects.filter(pk=self.job.pk).update(
+            progress=percent, message=message[:200], heartbeat_at=timezone.now()
+        )
+        publish('job_progress', job_event(self.job, 'running', percent, message))
+
+    def check_cancelled(self):
+        """已请求取消时抛出 JobCancelled"""
+        if Job.objects.filter(pk=self.job.pk, cancel_requested=True).exists():
+            raise JobCancelled()
+
+
+# ==================== 入队与取消 ====================
+
+def enqueue(kind: str, **params) -> Job:
+    """
+    创建排队任务
+
+    Returns:
+        Job；任务类型未注册时抛出 JobError
+    """
+    if kind not in JOB_HANDLERS:
+        raise JobError(f'未知任务类型: {kind}')
+    job = Job.objects.create(kind=kind, params=params)
+    if getattr(settings, 'JOBS_INPROCESS_WORKER', False):
+        # 开发环境未启动 run_jobs 时，在本进程线程池中执行
+        transaction.on_commit(lambda: get_pool('jobs').submit(_drain_in_background))
+    return job
+
+
+def cancel(job_id: int) -> Job:
+    """
+    取消任务：排队中的任务直接取消，运行中的任务在下一次上报进度时停止
+
+    Returns:
+        更新后的 Job；任务不存在时抛出 JobError
+    """
+    now = timezone.now()
+    cancelled = Job.objects.filter(pk=job_id, status='pending').update(
+        status='cancelled', cancel_requested=True, finished_at=now
+    )
+    Job.objects.filter(pk=job_id, status='running').update(cancel_requested=True)
+    try:
+        job = Job.objects.get(pk=job_id)
+    except Job.DoesNotExist:
+        raise JobError(f'任务不存在: {job_id}')
+    if cancelled:
+        publish('job_progress', job_event(job, 'cancelled', job.progress, '已取消'))
+    return job
+
+
+# ==================== 执行 ====================
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next(worker: str) -> Optional[Job]:
+    """
+    领取最早的排队任务
+
+    条件更新 status='pending' -> 'running'，多个工作进程同时领取时只有一个成功。
+    """
+    while True:
+        job_id = (Job.objects.filter(status='pending').order_by('created_at', 'id')
+                  .values_list('id', flat=True).first())
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=job_id, status='pending').update(
+            status='running', worker=worker, started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+
+
+def _finish(job: Job, status: str, **fields):
+    Job.objects.filter(pk=job.pk).update(status=status, finished_at=timezone.now(), **fields)
+    publish('job_progress', job_event(job, status, fields.get('progress', job.progress),
+                                      fields.get('message') or fields.get('error', '')))
+
+
+def job_event(job: Job, status: str, progress: float, message: str = '') -> Dict:
+    """job_progress 事件数据"""
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': status,
+        'progress': round(float(progress), 1),
+        'message': message,
+    }
+
+
+def run_job(job: Job):
+    """执行已领取的任务并记录结果"""
+    handler = JOB_HANDLERS.get(job.kind)
+    if handler is None:
+        _finish(job, 'failed', error=f'未知任务类型: {job.kind}')
+        return
+
+    ctx = JobContext(job)
+    try:
+        ctx.check_cancelled()
+        result = handler(ctx, **job.params)
+    except JobCancelled:
+        logger.info(f"任务已取消: {job}")
+        _finish(job, 'cancelled', message='已取消')
+    except Exception as e:
+        logger.error(f"任务失败: {job} - {e}", exc_info=True)
+        _finish(job, 'failed', error=str(e))
+    else:
+        _finish(job, 'succeeded', progress=100, result=result)
+
+
+def fail_stale_jobs() -> int:
+    """把心跳超时（工作进程已退出）的运行中任务标记为失败"""
+    timeout = getattr(settings, 'JOB_STALE_TIMEOUT', 1800)
+    deadline = timezone.now() - timedelta(seconds=timeout)
+    return Job.objects.filter(status='running', heartbeat_at__lt=deadline).update(
+        status='failed', error='工作进程无响应', finished_at=timezone.now()
+    )
+
+
+def run_pending(worker: str = None, max_jobs: int = None) -> int:
+    """
+    依次执行排队任务直到队列为空
+
+    Returns:
+        执行的任务数
+    """
+    worker = worker or worker_name()
+    count = 0
+    while max_jobs is None or count < max_jobs:
+        job = claim_next(worker)
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+def work(poll_interval: float = None, stop: Callable[[], bool] = None):
+    """工作进程主循环（run_jobs 命令）"""
+    poll_interval = poll_interval or getattr(settings, 'JOB_POLL_INTERVAL', 2.0)
+    worker = worker_name()
+    logger.info(f"任务工作进程启动: {worker}")
+    while not (stop and stop()):
+        close_old_connections()
+        fail_stale_jobs()
+        if not run_pending(worker):
+            time.sleep(poll_interval)
+
+
+def _drain_in_background():
+    close_old_connections()
+    try:
+        run_pending()
+    finally:
+        close_old_connections()
+
+
+def job_to_dict(job: Job) -> Dict:
+    """任务状态（/api/jobs/<id>/ 响应）"""
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'params': job.params,
+        'status': job.status,
+        'progress': round(job.progress, 1),
+        'message': job.message,
+        'result': job.result,
+        'error': job.error,
+        'cancel_requested': job.cancel_requested,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+# ==================== 任务类型 ====================
+
+def clean_crawl(start_page=1, end_page=3) -> Dict:
+    max_pages = getattr(settings, 'JOB_CRAWL_MAX_PAGES', 50)
+    start_page = int_param('start_page', start_page, 1, max_pages)
+    end_page = int_param('end_page', end_page, start_page, max_pages)
+    return {'start_page': start_page, 'end_page': end_page}
+
+
+@register('crawl', clean=clean_crawl)
+def crawl_job(ctx: JobContext, start_page: int = 1, end_page: int = 3, update_type: str = 'crawler'):
+    """抓取最新开奖页面并入库"""
+    from .ingest import crawl_records, ingest_records
+    from .models import DataUpdateLog
+
+    try:
+        ctx.progress(5, '正在抓取开奖页面')
+        data_list = crawl_records(start_page=start_page, end_page=end_page)
+        ctx.progress(60, f'抓取到{len(data_list)}条数据，正在入库')
+        stats = ingest_records(data_list, update_type=update_type,
+                               message=f'成功爬取{len(data_list)}条数据')
+    except JobCancelled:
+        raise
+    except Exception as e:
+        DataUpdateLog.objects.create(update_type=update_type, periods_added=0, periods_updated=0,
+                                     status='failed', message=str(e))
+        raise
+    return {
+        'message': f"成功导入数据！新增{stats['added']}期，更新{stats['updated']}期",
+        'added': stats['added'],
+        'updated': stats['updated'],
+        'total': stats['total'],
+    }
+
+
+def clean_scheduler_task(task_id=None) -> Dict:
+    from .scheduler import TASKS
+
+    if task_id not in TASKS:
+        raise JobError(f'任务 {task_id} 不存在')
+    return {'task_id': task_id}
+
+
+@register('scheduler_task', clean=clean_scheduler_task)
+def scheduler_task_job(ctx: JobContext, task_id: str):
+    """手动运行定时任务（每日评估/每周爬取/清理记录）"""
+    from .scheduler import TASKS
+
+    func = TASKS.get(task_id)
+    if func is None:
+        raise JobError(f'任务 {task_id} 不存在')
+    ctx.progress(10, f'正在运行 {task_id}')
+    func()
+    return {'message': f'任务 {task_id} 已执行'}
+
+
+def clean_import_backtest(result_file='results/dynamic_betting_results.json',
+                          strategy_name='Top 10% Dynamic') -> Dict:
+    resolve_result_file(result_file)
+    if not isinstance(strategy_name, str) or not 0 < len(strategy_name) <= 50:
+        raise JobError('strategy_name 必须是 1-50 个字符')
+    return {'result_file': result_file, 'strategy_name': strategy_name}
+
+
+@register('import_backtest', clean=clean_import_backtest)
+def import_backtest_job(ctx: JobContext, result_file: str = 'results/dynamic_betting_results.json',
+                        strategy_name: str = 'Top 10% Dynamic'):
+    """从回测结果 JSON 导入 BacktestResult（含压缩明细）"""
+    from .ingest import ingest_backtest
+
+    # 入队后文件可能被替换为符号链接，执行时再次校验
+    path = resolve_result_file(result_file)
+    if not path.exists():
+        raise JobError(f'回测结果文件不存在: {result_file}')
+
+    ctx.progress(10, '正在读取回测结果')
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    ctx.progress(50, f"正在保存{len(data['period_results'])}期回测明细")
+    backtest = ingest_backtest(data, strategy_name=strategy_name)
+    return {
+        'message': f'回测结果导入完成！策略: {backtest.strategy_name}, ROI: {backtest.roi_percentage:.2f}%',
+        'backtest_id': backtest.pk,
+    }
@@ -0,0 +1,44 @@
+"""
+Django management command: 归档并清理冗余的旧预测记录
+
+使用方法:
+    python manage.py compact_predictions                       # 使用 settings.PREDICTION_RETENTION_DAYS
+    python manage.py compact_predictions --older-than-days 7
+    python manage.py compact_predictions --dry-run             # 只统计不删除
+
+功能:
+    - 超过保留期的预测记录，每个 (期号, 模型) 只保留最新一条
+    - 其余记录追加写入 data/archive/predictions/predictions-YYYY-MM.ndjson.gz 后删除
+"""
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = '归档并清理冗余的旧预测记录'
+
+    def add_arguments(self, parser):
+        """添加命令行参数"""
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=None,
+            help='保留期（天），默认取 settings.PREDICTION_RETENTION_DAYS',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='只统计待归档条数，不写入也不删除',
+        )
+
+    def handle(self, *args, **options):
+        """执行命令"""
+        from lottery.retention import compact_predictions
+        
+        stats = compact_predictions(older_than_days=options['older_than_days'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f"待归档 {stats['candidates']} 条预测记录（未修改）")
+            return
+        self.stdout.write(self.style.SUCCESS(f"✓ 已归档并删除 {stats['archived']} 条预测记录"))
+        for path in stats['files']:
+            self.stdout.write(f'  {path}')
@@ -0,0 +1,65 @@
+"""
+Django management command: 导出可内存映射的推理检查点
+
+使用方法:
+    python manage.py export_model                                  # 导出 settings.MODEL_CHECKPOINT_PATH
+    python manage.py export_model --checkpoint models/best_model.pth
+    python manage.py export_model --output /srv/models/best_model.safetensors
+
+功能:
+    - 把 .pth（pickle）检查点转换为同名 .safetensors（平坦布局，可 mmap）
+    - 之后 LotteryModel.load / 模型注册表加载该 .pth 时自动改为内存映射加载同名文件，
+      多个 Web/任务进程共享一份权重；.pth 更新后哈希不一致，回退为读取 .pth 直到重新导出
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = '导出可内存映射的推理检查点（.safetensors）'
+
+    def add_arguments(self, parser):
+        """添加命令行参数"""
+        parser.add_argument(
+            '--checkpoint',
+            default=None,
+            help='.pth 检查点路径，默认取 settings.MODEL_CHECKPOINT_PATH',
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='输出路径，默认与检查点同目录同名（.safetensors）',
+        )
+
+    def handle(self, *args, **options):
+        """执行命令"""
+        import os
+
+        import torch
+        from src.models.flat_checkpoint import file_sha256, flat_path_of
+        from src.models.lottery_model import LotteryModel
+
+        checkpoint = str(options['checkpoint'] or settings.MODEL_CHECKPOINT_PATH)
+        if not os.path.exists(checkpoint):
+            raise CommandError(f'检查点不存在: {checkpoint}')
+        output = options['output'] or flat_path_of(checkpoint)
+
+        model = LotteryModel.load(checkpoint, mmap=False).eval()
+        model.save_flat(output, source_sha256=file_sha256(checkpoint))
+
+        # 校验：映射加载后的输出与原模型一致
+        started = time.perf_counter()
+        mapped = LotteryModel.load_flat(output).eval()
+        load_ms = (time.perf_counter() - started) * 1000
+        sample = torch.randint(0, 10, (2, 30, 3))
+        with torch.no_grad():
+            expected = model(sample)
+            actual = mapped(sample)
+        if not all(torch.equal(expected[key], actual[key]) for key in expected):
+            raise CommandError(f'导出校验失败: {output}')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ 已导出推理检查点: {output}'))
+        self.stdout.write(f'  {os.path.getsize(checkpoint)} -> {os.path.getsize(output)} 字节，'
+                          f'映射加载 {load_ms:.1f}ms')
@@ -0,0 +1,50 @@
+"""
+Django management command: 启动后台任务工作进程
+
+使用方法:
+    python manage.py run_jobs            # 持续运行，轮询排队任务
+    python manage.py run_jobs --once     # 执行完当前排队任务后退出
+
+功能:
+    - 从 Job 表领取排队任务并执行（爬取、回测导入、定时任务手动运行）
+    - 可同时启动多个进程，同一任务只会被一个进程领取
+"""
+
+import logging
+from django.core.management.base import BaseCommand
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '启动后台任务工作进程'
+
+    def add_arguments(self, parser):
+        """添加命令行参数"""
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='执行完当前排队任务后退出',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=None,
+            help='队列为空时的轮询间隔（秒），默认取 settings.JOB_POLL_INTERVAL',
+        )
+
+    def handle(self, *args, **options):
+        """执行命令"""
+        from lottery.jobs import fail_stale_jobs, run_pending, work, worker_name
+        
+        if options['once']:
+            fail_stale_jobs()
+            count = run_pending()
+            self.stdout.write(self.style.SUCCESS(f'✓ 已执行 {count} 个任务'))
+            return
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ 任务工作进程已启动 ({worker_name()})，按 Ctrl+C 停止'))
+        try:
+            work(poll_interval=options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\n工作进程已停止'))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:34
+
+from django.db import migrations, models
+
+
+def assign_seq(apps, schema_editor):
+    """按 (开奖日期, 期号) 为已有期次编号"""
+    LotteryPeriod = apps.get_model('lottery', 'LotteryPeriod')
+    rows = list(LotteryPeriod.objects.order_by('date', 'period').only('id'))
+    for seq, row in enumerate(rows, start=1):
+        row.seq = seq
+    LotteryPeriod.objects.bulk_update(rows, ['seq'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lottery', '0002_auto_20260205_1802'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lotteryperiod',
+            name='seq',
+            field=models.IntegerField(blank=True, db_index=True, null=True, verbose_name='开奖序号'),
+        ),
+        migrations.RunPython(assign_seq, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:35
+
+from django.db import migrations, models
+
+
+def populate_draw_codes(apps, schema_editor):
+    """为已有期次填充直选号码和组选键"""
+    LotteryPeriod = apps.get_model('lottery', 'LotteryPeriod')
+    rows = list(LotteryPeriod.objects.only('id', 'digit1', 'digit2', 'digit3'))
+    for row in rows:
+        digits = [row.digit1, row.digit2, row.digit3]
+        row.draw_code = ''.join(map(str, digits))
+        row.group_key = ''.join(map(str, sorted(digits)))
+    LotteryPeriod.objects.bulk_update(rows, ['draw_code', 'group_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lottery', '0003_lotteryperiod_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lotteryperiod',
+            name='draw_code',
+            field=models.CharField(db_index=True, default='', max_length=3, verbose_name='直选号码'),
+        ),
+        migrations.AddField(
+            model_name='lotteryperiod',
+            name='group_key',
+            field=models.CharField(db_index=True, default='', max_length=3, verbose_name='组选键'),
+        ),
+        migrations.RunPython(populate_draw_codes, migrations.RunPython.noop),
+    ]
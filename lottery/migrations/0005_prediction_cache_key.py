@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lottery', '0004_lotteryperiod_draw_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prediction',
+            name='cache_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=100, verbose_name='结果键'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lottery', '0006_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['-created_at', '-id'], name='prediction_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['recommendation', '-created_at', '-id'], name='prediction_rec_cursor_idx'),
+        ),
+    ]
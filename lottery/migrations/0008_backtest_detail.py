@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:48
+
+import json
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_details(apps, schema_editor):
+    """将期次结果和资金曲线压缩后移入 BacktestDetail"""
+    BacktestResult = apps.get_model('lottery', 'BacktestResult')
+    BacktestDetail = apps.get_model('lottery', 'BacktestDetail')
+    rows = BacktestResult.objects.values_list('id', 'period_results', 'capital_history').iterator(chunk_size=1)
+    for pk, period_results, capital_history in rows:
+        data = {'period_results': period_results or [], 'capital_history': capital_history or []}
+        payload = zlib.compress(json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8'), 6)
+        BacktestDetail.objects.create(backtest_id=pk, payload=payload)
+
+
+def restore_details(apps, schema_editor):
+    """回滚：从 BacktestDetail 写回 JSON 字段"""
+    BacktestResult = apps.get_model('lottery', 'BacktestResult')
+    BacktestDetail = apps.get_model('lottery', 'BacktestDetail')
+    for detail in BacktestDetail.objects.iterator(chunk_size=1):
+        data = json.loads(zlib.decompress(bytes(detail.payload)).decode('utf-8'))
+        BacktestResult.objects.filter(pk=detail.backtest_id).update(**data)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lottery', '0007_prediction_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BacktestDetail',
+            fields=[
+                ('backtest', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='detail', serialize=False, to='lottery.backtestresult', verbose_name='回测结果')),
+                ('payload', models.BinaryField(verbose_name='压缩数据')),
+            ],
+            options={
+                'verbose_name': '回测明细',
+                'verbose_name_plural': '回测明细',
+            },
+        ),
+        # 先改为可空，回滚时重新加回字段后再写回数据
+        migrations.AlterField(
+            model_name='backtestresult',
+            name='period_results',
+            field=models.JSONField(null=True, verbose_name='期次详细结果'),
+        ),
+        migrations.AlterField(
+            model_name='backtestresult',
+            name='capital_history',
+            field=models.JSONField(null=True, verbose_name='资金历史'),
+        ),
+        migrations.RunPython(move_details, restore_details),
+        migrations.RemoveField(
+            model_name='backtestresult',
+            name='capital_history',
+        ),
+        migrations.RemoveField(
+            model_name='backtestresult',
+            name='period_results',
+        ),
+    ]
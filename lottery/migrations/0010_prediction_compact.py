@@ -0,0 +1,109 @@
+import struct
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def _pack(values, fmt):
+    if values is None:
+        return None
+    values = [float(v) for v in values]
+    return struct.pack(f'<{len(values)}{fmt}', *values)
+
+
+def _unpack(blob, fmt):
+    if not blob:
+        return None
+    blob = bytes(blob)
+    return list(struct.unpack(f'<{len(blob) // struct.calcsize(fmt)}{fmt}', blob))
+
+
+def compact_predictions(apps, schema_editor):
+    """概率/注意力权重转为二进制，旧字段并入 recommendation / total_cost / betting_combinations"""
+    Prediction = apps.get_model('lottery', 'Prediction')
+    batch = []
+    for pred in Prediction.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        pred.digit_probs_blob = _pack(pred.digit_probs, 'f') or b''
+        pred.attention_blob = _pack(pred.attention_weights, 'e')
+        if pred.should_bet and pred.recommendation != 'bet':
+            pred.recommendation = 'bet'
+        if not pred.total_cost and pred.bet_amount:
+            pred.total_cost = pred.bet_amount
+        if pred.betting_combinations is None and pred.recommended_bets is not None:
+            pred.betting_combinations = pred.recommended_bets
+        batch.append(pred)
+        if len(batch) >= BATCH_SIZE:
+            Prediction.objects.bulk_update(batch, ['digit_probs_blob', 'attention_blob', 'recommendation',
+                                                   'total_cost', 'betting_combinations'])
+            batch = []
+    if batch:
+        Prediction.objects.bulk_update(batch, ['digit_probs_blob', 'attention_blob', 'recommendation',
+                                               'total_cost', 'betting_combinations'])
+
+
+def expand_predictions(apps, schema_editor):
+    """回滚：写回 JSON 字段和旧字段"""
+    Prediction = apps.get_model('lottery', 'Prediction')
+    batch = []
+    for pred in Prediction.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        pred.digit_probs = _unpack(pred.digit_probs_blob, 'f') or []
+        pred.attention_weights = _unpack(pred.attention_blob, 'e')
+        pred.should_bet = pred.recommendation == 'bet'
+        pred.bet_amount = pred.total_cost
+        pred.recommended_bets = pred.betting_combinations
+        batch.append(pred)
+        if len(batch) >= BATCH_SIZE:
+            Prediction.objects.bulk_update(batch, ['digit_probs', 'attention_weights', 'should_bet',
+                                                   'bet_amount', 'recommended_bets'])
+            batch = []
+    if batch:
+        Prediction.objects.bulk_update(batch, ['digit_probs', 'attention_weights', 'should_bet',
+                                               'bet_amount', 'recommended_bets'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lottery', '0009_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prediction',
+            name='digit_probs_blob',
+            field=models.BinaryField(default=b'', verbose_name='数字概率'),
+        ),
+        migrations.AddField(
+            model_name='prediction',
+            name='attention_blob',
+            field=models.BinaryField(blank=True, null=True, verbose_name='注意力权重'),
+        ),
+        # 先改为可空，回滚时重新加回字段后再写回数据
+        migrations.AlterField(
+            model_name='prediction',
+            name='digit_probs',
+            field=models.JSONField(null=True, verbose_name='数字概率'),
+        ),
+        migrations.RunPython(compact_predictions, expand_predictions),
+        migrations.RemoveField(
+            model_name='prediction',
+            name='digit_probs',
+        ),
+        migrations.RemoveField(
+            model_name='prediction',
+            name='attention_weights',
+        ),
+        migrations.RemoveField(
+            model_name='prediction',
+            name='should_bet',
+        ),
+        migrations.RemoveField(
+            model_name='prediction',
+            name='recommended_bets',
+        ),
+        migrations.RemoveField(
+            model_name='prediction',
+            name='bet_amount',
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def renumber_duplicates(apps, schema_editor):
+    """并发写入可能留下重复序号，加唯一约束前按 (开奖日期, 期号) 重新编号"""
+    LotteryPeriod = apps.get_model('lottery', 'LotteryPeriod')
+    duplicated = (LotteryPeriod.objects.exclude(seq=None).values('seq')
+                  .annotate(count=Count('id')).filter(count__gt=1).exists())
+    if not duplicated:
+        return
+    rows = list(LotteryPeriod.objects.order_by('date', 'period').only('id'))
+    for seq, row in enumerate(rows, start=1):
+        row.seq = seq
+    LotteryPeriod.objects.bulk_update(rows, ['seq'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lottery', '0010_prediction_compact'),
+    ]
+
+    operations = [
+        migrations.RunPython(renumber_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='lotteryperiod',
+            name='seq',
+            field=models.IntegerField(blank=True, null=True, unique=True, verbose_name='开奖序号'),
+        ),
+    ]
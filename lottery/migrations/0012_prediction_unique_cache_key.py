@@ -0,0 +1,27 @@
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def clear_duplicate_keys(apps, schema_editor):
+    """并发写入留下的同键记录只保留最新一条的结果键（记录本身保留）"""
+    Prediction = apps.get_model('lottery', 'Prediction')
+    duplicated = (Prediction.objects.exclude(cache_key='').values('cache_key')
+                  .annotate(count=Count('id'), keep=Max('id')).filter(count__gt=1))
+    for row in duplicated:
+        (Prediction.objects.filter(cache_key=row['cache_key'])
+         .exclude(id=row['keep']).update(cache_key=''))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lottery', '0011_lotteryperiod_seq_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_duplicate_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='prediction',
+            constraint=models.UniqueConstraint(condition=models.Q(('cache_key', ''), _negated=True), fields=('cache_key',), name='prediction_unique_cache_key'),
+        ),
+    ]
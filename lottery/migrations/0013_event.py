@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:03
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lottery', '0012_prediction_unique_cache_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(max_length=32, verbose_name='事件类型')),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='事件数据')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='发布时间')),
+            ],
+            options={
+                'verbose_name': '推送事件',
+                'verbose_name_plural': '推送事件',
+                'ordering': ['id'],
+            },
+        ),
+    ]
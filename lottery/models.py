@@ -1,22 +1,89 @@
 """
 3D彩票数据库模型
 """
-from django.db import models
+import json
+import struct
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import Max, Q
 from django.utils import timezone
 
 
+class LotteryPeriodQuerySet(models.QuerySet):
+    """期次查询集：基于开奖序号 seq 的窗口查询"""
+    
+    def window_before(self, period, n):
+        """
+        返回指定期号之前的 n 期（按时间正序）
+        
+        Args:
+            period: LotteryPeriod 实例或期号字符串
+            n: 期数
+        """
+        if isinstance(period, LotteryPeriod):
+            if period.seq is None:
+                # 尚未编号（回填前保存或批量创建未编号），按 (开奖日期, 期号) 取
+                before = Q(date__lt=period.date) | Q(date=period.date, period__lt=period.period)
+                rows = list(self.filter(before).order_by('-date', '-period')[:n])
+            else:
+                # 序号可能有空缺（删除过期次），不按区间取
+                rows = list(self.filter(seq__lt=period.seq).order_by('-seq')[:n])
+            rows.reverse()
+            return rows
+        
+        seq = self.model.objects.filter(period=period).values('seq')[:1]
+        rows = list(self.filter(seq__lt=models.Subquery(seq)).order_by('-seq')[:n])
+        rows.reverse()
+        return rows
+    
+    def latest_window(self, n):
+        """返回最近的 n 期（按时间正序）"""
+        rows = list(self.order_by('-seq')[:n])
+        rows.reverse()
+        return rows
+
+
+class LotteryPeriodManager(models.Manager.from_queryset(LotteryPeriodQuerySet)):
+    """期次管理器"""
+    
+    def next_seq(self):
+        """下一期的开奖序号"""
+        return (self.aggregate(max_seq=Max('seq'))['max_seq'] or 0) + 1
+    
+    def resequence(self, batch_size=500):
+        """按 (开奖日期, 期号) 重新编排全部开奖序号，用于补录历史数据后"""
+        rows = list(self.order_by('date', 'period').only('id', 'seq'))
+        changed = [(row, seq) for seq, row in enumerate(rows, start=1) if row.seq != seq]
+        if not changed:
+            return 0
+        with transaction.atomic():
+            # seq 唯一且逐行检查：先清空待改的序号，再写入新序号，避免中途与旧序号冲突
+            self.filter(pk__in=[row.pk for row, _ in changed]).update(seq=None)
+            for row, seq in changed:
+                row.seq = seq
+            self.bulk_update([row for row, _ in changed], ['seq'], batch_size=batch_size)
+        return len(changed)
+
+
 class LotteryPeriod(models.Model):
     """彩票期次数据"""
     period = models.CharField(max_length=20, unique=True, db_index=True, verbose_name='期号')
+    seq = models.IntegerField(null=True, blank=True, unique=True, verbose_name='开奖序号')  # 按开奖时间连续编号
     date = models.DateField(db_index=True, verbose_name='开奖日期')
     digit1 = models.IntegerField(verbose_name='第一位')
     digit2 = models.IntegerField(verbose_name='第二位')
     digit3 = models.IntegerField(verbose_name='第三位')
     sum_value = models.IntegerField(verbose_name='和值')
     shape = models.CharField(max_length=10, verbose_name='形态')  # 组六/组三/豹子
+    draw_code = models.CharField(max_length=3, default='', db_index=True, verbose_name='直选号码')  # 如 312
+    group_key = models.CharField(max_length=3, default='', db_index=True, verbose_name='组选键')  # 排序后的号码，如 123
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
     
+    objects = LotteryPeriodManager()
+    
     class Meta:
         ordering = ['-period']
         verbose_name = '彩票期次'
@@ -25,6 +92,39 @@ class LotteryPeriod(models.Model):
     def __str__(self):
         return f"{self.period}: [{self.digit1},{self.digit2},{self.digit3}]"
     
+    # 并发新增时序号被占用的重试次数
+    SEQ_ATTEMPTS = 3
+    
+    def save(self, *args, **kwargs):
+        self.draw_code = self.numbers_str
+        self.group_key = ''.join(str(d) for d in sorted(self.numbers))
+        if self.seq is not None:
+            super().save(*args, **kwargs)
+            return
+        
+        # 单条新增先追加到末尾；批量入库由 ingest 统一编号。
+        # 取最大序号再写入不是原子的，被并发写入抢占时由唯一约束拦下，重新取号
+        for attempt in range(self.SEQ_ATTEMPTS):
+            self.seq = LotteryPeriod.objects.next_seq()
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                    if self._is_backfill():
+                        # 补录早于已有期次的开奖：末尾序号顺序不对，按 (开奖日期, 期号) 重排
+                        LotteryPeriod.objects.resequence()
+                        self.seq = LotteryPeriod.objects.filter(pk=self.pk).values_list('seq', flat=True).get()
+                return
+            except IntegrityError:
+                taken = LotteryPeriod.objects.filter(seq=self.seq).exclude(pk=self.pk).exists()
+                self.seq = None
+                if not taken or attempt == self.SEQ_ATTEMPTS - 1:
+                    raise
+    
+    def _is_backfill(self) -> bool:
+        """是否有已存在的期次按 (开奖日期, 期号) 排在本期之后"""
+        later = Q(date__gt=self.date) | Q(date=self.date, period__gt=self.period)
+        return LotteryPeriod.objects.filter(later).exclude(pk=self.pk).exists()
+    
     @property
     def numbers(self):
         """返回号码列表"""
@@ -41,11 +141,11 @@ class Prediction(models.Model):
     period = models.ForeignKey(LotteryPeriod, on_delete=models.CASCADE, related_name='predictions', verbose_name='关联期号')
     predicted_for_period = models.CharField(max_length=20, db_index=True, verbose_name='预测的期号')
     
-    # 预测结果
+    # 预测结果（概率 float32、注意力权重 float16 定长二进制存储，通过同名属性读写列表）
     top5_digits = models.JSONField(verbose_name='Top5数字')
-    digit_probs = models.JSONField(verbose_name='数字概率')
+    digit_probs_blob = models.BinaryField(default=b'', verbose_name='数字概率')
     confidence_score = models.FloatField(verbose_name='可信度分数')
-    attention_weights = models.JSONField(null=True, blank=True, verbose_name='注意力权重')
+    attention_blob = models.BinaryField(null=True, blank=True, verbose_name='注意力权重')
     
     # 投注建议
     recommendation = models.CharField(
@@ -63,21 +163,92 @@ class Prediction(models.Model):
     bet_count = models.IntegerField(default=0, verbose_name='总注数')
     recommendation_reason = models.TextField(blank=True, verbose_name='建议理由')
     
-    # 兼容旧字段
-    should_bet = models.BooleanField(default=False, verbose_name='建议投注（旧）')
-    recommended_bets = models.JSONField(null=True, blank=True, verbose_name='推荐投注组合（旧）')
-    bet_amount = models.IntegerField(default=0, verbose_name='建议投注金额（旧）')
+    # 结果键 (最新期号, 模型哈希, 注数)，同一键只保存一条
+    cache_key = models.CharField(max_length=100, blank=True, default='', db_index=True, verbose_name='结果键')
     
     # 元数据
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='预测时间')
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # 游标分页按 (created_at, id) 倒序
+            models.Index(fields=['-created_at', '-id'], name='prediction_cursor_idx'),
+            models.Index(fields=['recommendation', '-created_at', '-id'], name='prediction_rec_cursor_idx'),
+        ]
+        constraints = [
+            # 多个进程同时算出同一结果键时只保留一条（未设置结果键的记录不受限制）
+            models.UniqueConstraint(fields=['cache_key'], condition=~Q(cache_key=''),
+                                    name='prediction_unique_cache_key'),
+        ]
         verbose_name = '预测记录'
         verbose_name_plural = '预测记录'
     
     def __str__(self):
         return f"预测{self.predicted_for_period} (可信度:{self.confidence_score:.3f})"
+    
+    @property
+    def digit_probs(self):
+        return unpack_floats(self.digit_probs_blob, PROB_FORMAT)
+    
+    @digit_probs.setter
+    def digit_probs(self, values):
+        self.digit_probs_blob = pack_floats(values, PROB_FORMAT) or b''
+    
+    @property
+    def attention_weights(self):
+        return unpack_floats(self.attention_blob, ATTENTION_FORMAT)
+    
+    @attention_weights.setter
+    def attention_weights(self, values):
+        self.attention_blob = pack_floats(values, ATTENTION_FORMAT)
+    
+    # 旧字段已并入 recommendation / total_cost / betting_combinations，保留读写兼容
+    @property
+    def should_bet(self) -> bool:
+        return self.recommendation == 'bet'
+    
+    @should_bet.setter
+    def should_bet(self, value):
+        self.recommendation = 'bet' if value else 'no_bet'
+    
+    @property
+    def bet_amount(self) -> int:
+        return self.total_cost
+    
+    @bet_amount.setter
+    def bet_amount(self, value):
+        self.total_cost = value or 0
+    
+    @property
+    def recommended_bets(self):
+        return self.betting_combinations
+    
+    @recommended_bets.setter
+    def recommended_bets(self, value):
+        if self.betting_combinations is None:
+            self.betting_combinations = value
+
+
+# 概率用 float32，注意力权重用 float16（仅用于展示，3位有效数字足够）
+PROB_FORMAT = 'f'
+ATTENTION_FORMAT = 'e'
+
+
+def pack_floats(values, fmt: str):
+    """浮点列表打包为小端定长二进制；None 返回 None"""
+    if values is None:
+        return None
+    values = [float(v) for v in values]
+    return struct.pack(f'<{len(values)}{fmt}', *values)
+
+
+def unpack_floats(blob, fmt: str):
+    """pack_floats 的逆操作；空值返回 None"""
+    if not blob:
+        return None
+    blob = bytes(blob)
+    return list(struct.unpack(f'<{len(blob) // struct.calcsize(fmt)}{fmt}', blob))
 
 
 class BacktestResult(models.Model):
@@ -106,9 +277,7 @@ class BacktestResult(models.Model):
     total_invested = models.FloatField(verbose_name='总投入')
     total_prizes = models.FloatField(verbose_name='总奖金')
     
-    # 详细数据
-    period_results = models.JSONField(verbose_name='期次详细结果')
-    capital_history = models.JSONField(verbose_name='资金历史')
+    # 详细数据（period_results/capital_history）压缩存放在 BacktestDetail，访问时才加载
     
     # 元数据
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
@@ -120,6 +289,78 @@ class BacktestResult(models.Model):
     
     def __str__(self):
         return f"{self.strategy_name} (ROI:{self.roi_percentage:.2f}%)"
+    
+    def _detail_data(self) -> dict:
+        """期次结果和资金曲线（首次访问时从 BacktestDetail 加载）"""
+        data = self.__dict__.get('_detail')
+        if data is None:
+            data = {'period_results': [], 'capital_history': []}
+            if self.pk is not None:
+                try:
+                    data = self.detail.load()
+                except BacktestDetail.DoesNotExist:
+                    pass
+            self.__dict__['_detail'] = data
+        return data
+    
+    def _set_detail(self, key, value):
+        self._detail_data()[key] = value
+        self.__dict__['_detail_dirty'] = True
+    
+    @property
+    def period_results(self):
+        return self._detail_data()['period_results']
+    
+    @period_results.setter
+    def period_results(self, value):
+        self._set_detail('period_results', value)
+    
+    @property
+    def capital_history(self):
+        return self._detail_data()['capital_history']
+    
+    @capital_history.setter
+    def capital_history(self, value):
+        self._set_detail('capital_history', value)
+    
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        # 汇总与明细同时写入：明细写入失败时不留下没有资金曲线的回测记录
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            if self.__dict__.get('_detail_dirty', False):
+                BacktestDetail.objects.using(self._state.db).update_or_create(
+                    backtest=self, defaults={'payload': pack_detail(self._detail_data())}
+                )
+        self.__dict__.pop('_detail_dirty', None)
+
+
+def pack_detail(data) -> bytes:
+    """JSON + zlib 压缩"""
+    return zlib.compress(json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8'), 6)
+
+
+def unpack_detail(payload) -> dict:
+    """解压 pack_detail 的结果"""
+    return json.loads(zlib.decompress(bytes(payload)).decode('utf-8'))
+
+
+class BacktestDetail(models.Model):
+    """回测明细（期次结果、资金曲线），与汇总字段分表压缩存储，列表页不会读取"""
+    backtest = models.OneToOneField(BacktestResult, on_delete=models.CASCADE, primary_key=True,
+                                    related_name='detail', verbose_name='回测结果')
+    payload = models.BinaryField(verbose_name='压缩数据')  # {"period_results": [...], "capital_history": [...]}
+    
+    class Meta:
+        verbose_name = '回测明细'
+        verbose_name_plural = '回测明细'
+    
+    def __str__(self):
+        return f"{self.backtest_id} ({len(self.payload)} bytes)"
+    
+    def load(self) -> dict:
+        """解压明细数据"""
+        return unpack_detail(self.payload)
 
 
 class DataUpdateLog(models.Model):
@@ -138,3 +379,79 @@ class DataUpdateLog(models.Model):
     
     def __str__(self):
         return f"{self.update_type} - {self.status} ({self.created_at})"
+
+
+class DataVersion(models.Model):
+    """全局数据版本号（开奖入库、预测、回测导入时递增），用于仪表板缓存失效"""
+    version = models.BigIntegerField(default=1, verbose_name='版本号')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    
+    class Meta:
+        verbose_name = '数据版本'
+        verbose_name_plural = '数据版本'
+    
+    def __str__(self):
+        return f"v{self.version}"
+
+
+class Job(models.Model):
+    """后台任务（爬取、回测导入、定时任务手动运行等），由 run_jobs 工作进程执行"""
+    STATUS_CHOICES = [
+        ('pending', '排队中'),
+        ('running', '运行中'),
+        ('succeeded', '已完成'),
+        ('failed', '失败'),
+        ('cancelled', '已取消'),
+    ]
+    FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+    
+    kind = models.CharField(max_length=50, verbose_name='任务类型')
+    params = models.JSONField(default=dict, blank=True, verbose_name='任务参数')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='状态')
+    progress = models.FloatField(default=0, verbose_name='进度（%）')
+    message = models.CharField(max_length=200, blank=True, default='', verbose_name='进度说明')
+    result = models.JSONField(null=True, blank=True, verbose_name='执行结果')
+    error = models.TextField(blank=True, default='', verbose_name='错误信息')
+    cancel_requested = models.BooleanField(default=False, verbose_name='请求取消')
+    worker = models.CharField(max_length=100, blank=True, default='', verbose_name='执行进程')
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='开始时间')
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name='心跳时间')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='结束时间')
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # 工作进程按创建顺序领取排队任务
+            models.Index(fields=['status', 'created_at'], name='job_queue_idx'),
+        ]
+        verbose_name = '后台任务'
+        verbose_name_plural = '后台任务'
+    
+    def __str__(self):
+        return f"{self.kind}#{self.pk} ({self.status} {self.progress:.0f}%)"
+    
+    @property
+    def is_finished(self) -> bool:
+        return self.status in self.FINISHED_STATUSES
+
+
+class Event(models.Model):
+    """
+    推送事件日志（/api/events/）
+
+    各进程（Web、run_jobs、scheduler）发布的事件写入此表，Web 进程按 ID 顺序轮询读取后推送给
+    SSE 连接；自增 ID 即 SSE 的事件 ID，客户端重连时按 Last-Event-ID 补发。只保留最近的事件。
+    """
+    event = models.CharField(max_length=32, verbose_name='事件类型')
+    data = models.JSONField(encoder=DjangoJSONEncoder, verbose_name='事件数据')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='发布时间')
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = '推送事件'
+        verbose_name_plural = '推送事件'
+    
+    def __str__(self):
+        return f"{self.event}#{self.pk}"
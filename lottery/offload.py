@@ -0,0 +1,56 @@
+"""
+阻塞任务线程池
+
+异步视图把 torch 推理等耗时的同步计算放到按用途划分的有界线程池，
+事件循环只负责等待结果，一个慢请求不会拖住其它轻量请求。
+池大小见 settings.OFFLOAD_POOLS，超出的任务在池内排队。
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from django.conf import settings
+
+DEFAULT_POOLS = {
+    'inference': 2,  # 模型加载与推理
+    'jobs': 1,       # 进程内执行后台任务（JOBS_INPROCESS_WORKER）
+}
+
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+
+
+def get_pool(name: str) -> ThreadPoolExecutor:
+    """获取（必要时创建）指定用途的线程池"""
+    pool = _pools.get(name)
+    if pool is None:
+        with _lock:
+            pool = _pools.get(name)
+            if pool is None:
+                sizes = {**DEFAULT_POOLS, **getattr(settings, 'OFFLOAD_POOLS', {})}
+                if name not in sizes:
+                    raise KeyError(f'未配置的线程池: {name}')
+                pool = ThreadPoolExecutor(max_workers=sizes[name], thread_name_prefix=f'offload-{name}')
+                _pools[name] = pool
+    return pool
+
+
+async def run_blocking(pool_name: str, fn: Callable, *args, **kwargs):
+    """
+    在指定线程池中执行同步函数并等待结果
+
+    注意：fn 不应访问数据库，数据库读写请在视图中使用异步 ORM。
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(pool_name), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown(wait: bool = True):
+    """关闭全部线程池（进程退出或测试清理时调用）"""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
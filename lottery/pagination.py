@@ -0,0 +1,117 @@
+"""
+游标（keyset）分页
+
+按 (created_at, id) 倒序翻页，下一页条件为 "排在游标之后"，
+不使用 OFFSET，任意深度的页面与第一页开销相同。
+游标是不透明的 base64 字符串，客户端原样回传即可。
+"""
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, List, Optional
+
+from django.db.models import Q, QuerySet
+
+from .versioning import versioned
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析"""
+
+
+def encode_cursor(obj) -> str:
+    """根据记录的 (created_at, id) 生成游标"""
+    payload = json.dumps([obj.created_at.isoformat(), obj.pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str):
+    """解析游标，返回 (created_at, id)"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor('无效的分页游标') from e
+
+
+@dataclass
+class CursorPage:
+    """一页结果"""
+    object_list: List[Any]
+    page_size: int
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+    count: Optional[int] = field(default=None)
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self) -> bool:
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _before(cursor):
+    """排在游标之后（更早）的记录；created_at__lte 让 SQLite 走索引区间扫描"""
+    created_at, pk = cursor
+    return Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(pk__lt=pk))
+
+
+def _after(cursor):
+    """排在游标之前（更新）的记录"""
+    created_at, pk = cursor
+    return Q(created_at__gte=created_at) & (Q(created_at__gt=created_at) | Q(pk__gt=pk))
+
+
+def paginate_by_cursor(queryset: QuerySet, page_size: int, after: str = None,
+                       before: str = None) -> CursorPage:
+    """
+    按 (created_at, id) 倒序分页
+
+    Args:
+        queryset: 已筛选的查询集
+        page_size: 每页条数
+        after: 上一页返回的 next_cursor，取其后（更早）的一页
+        before: 上一页返回的 previous_cursor，取其前（更新）的一页
+
+    Returns:
+        CursorPage；游标无效时抛出 InvalidCursor
+    """
+    if before:
+        # 反向取 page_size+1 条再翻转
+        rows = list(queryset.filter(_after(decode_cursor(before)))
+                    .order_by('created_at', 'id')[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        has_newer, has_older = has_more, True
+    else:
+        base = queryset.filter(_before(decode_cursor(after))) if after else queryset
+        rows = list(base.order_by('-created_at', '-id')[:page_size + 1])
+        has_older = len(rows) > page_size
+        rows = rows[:page_size]
+        has_newer = bool(after)
+
+    return CursorPage(
+        object_list=rows,
+        page_size=page_size,
+        next_cursor=encode_cursor(rows[-1]) if rows and has_older else None,
+        previous_cursor=encode_cursor(rows[0]) if rows and has_newer else None,
+    )
+
+
+def cached_count(queryset: QuerySet, name: str) -> int:
+    """总数按数据版本缓存（预测/回测写入时失效）"""
+    return versioned(f'count:{name}', queryset.count)
@@ -0,0 +1,704 @@
+"""
+预测服务
+
+/api/predict/、定时任务等共用的预测流程：
+取最近30期 -> 模型推理 -> 机会评分 -> 投注计划 -> 保存 Prediction。
+结果按 (最新期号, 模型哈希, 注数) 缓存，同一键的并发请求只计算一次。
+"""
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from .draws import DrawWindow, aget_draws, get_draws
+from .events import apublish, publish
+from .models import LotteryPeriod, Prediction
+from .offload import get_pool, run_blocking
+from .singleflight import AsyncSingleFlight, SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Top1%投注阈值
+OPPORTUNITY_THRESHOLD = 58.45
+
+# 模型输入窗口
+WINDOW_SIZE = 30
+
+
+class PredictionError(Exception):
+    """无法生成预测（如历史数据不足）"""
+
+
+# ==================== 投注策略辅助函数 ====================
+
+def calculate_opportunity_score(digit_probs: np.ndarray, history: np.ndarray) -> float:
+    """
+    计算机会评分（0-100分）
+    复用daily_opportunity_check.py中的评分逻辑
+    """
+    # 特征权重
+    FEATURE_WEIGHTS = {
+        'top1_prob': 15,
+        'top3_mean_prob': 15,
+        'gap_1_2': 10,
+        'prob_std': 10,
+        'top3_concentration': 10,
+        'digit_freq_std': 8,
+        'shape_entropy': 7,
+        'sum_std': 5,
+        'recent_5_unique_count': 5,
+        'max_consecutive_shape': 5,
+    }
+    
+    # 模型特征
+    sorted_indices = np.argsort(digit_probs)[::-1]
+    sorted_probs = digit_probs[sorted_indices]
+    
+    top1_prob = sorted_probs[0]
+    top3_mean_prob = np.mean(sorted_probs[:3])
+    gap_1_2 = sorted_probs[0] - sorted_probs[1] if len(sorted_probs) > 1 else 0
+    prob_std = np.std(digit_probs)
+    top3_concentration = np.sum(sorted_probs[:3]) / (np.sum(digit_probs) + 1e-10)
+    
+    # 序列特征
+    flat_history = history.flatten()
+    digit_counts = Counter(flat_history)
+    digit_freq_std = np.std(list(digit_counts.values()))
+    
+    # 形态统计
+    def get_shape(numbers):
+        sorted_nums = sorted(numbers)
+        if sorted_nums[0] == sorted_nums[1] == sorted_nums[2]:
+            return 'leopard'
+        elif sorted_nums[0] == sorted_nums[1] or sorted_nums[1] == sorted_nums[2]:
+            return 'group3'
+        else:
+            return 'group6'
+    
+    shape_counts = Counter()
+    for numbers in history:
+        shape = get_shape(numbers)
+        shape_counts[shape] += 1
+    
+    # 计算熵
+    total = sum(shape_counts.values())
+    shape_entropy = 0
+    if total > 0:
+        for count in shape_counts.values():
+            if count > 0:
+                p = count / total
+                shape_entropy -= p * np.log2(p)
+        max_entropy = np.log2(min(3, len(shape_counts)))
+        if max_entropy > 0:
+            shape_entropy /= max_entropy
+    
+    sum_values = [np.sum(numbers) for numbers in history]
+    sum_std = np.std(sum_values)
+    
+    recent_5 = history[-5:]
+    recent_5_unique_count = len(set(map(tuple, recent_5)))
+    
+    # 最大连续相同形态
+    shapes = [get_shape(numbers) for numbers in history]
+    max_consecutive_shape = 1
+    current_count = 1
+    for i in range(1, len(shapes)):
+        if shapes[i] == shapes[i-1]:
+            current_count += 1
+            max_consecutive_shape = max(max_consecutive_shape, current_count)
+        else:
+            current_count = 1
+    
+    # 计算评分
+    features = {
+        'top1_prob': min(1.0, top1_prob / 0.3),
+        'top3_mean_prob': min(1.0, top3_mean_prob / 0.3),
+        'gap_1_2': min(1.0, gap_1_2 / 0.1),
+        'prob_std': min(1.0, prob_std / 0.3),
+        'top3_concentration': min(1.0, top3_concentration),
+        'digit_freq_std': min(1.0, digit_freq_std / 5.0),
+        'shape_entropy': min(1.0, shape_entropy),
+        'sum_std': min(1.0, sum_std / 5.0),
+        'recent_5_unique_count': min(1.0, recent_5_unique_count / 5.0),
+        'max_consecutive_shape': min(1.0, max_consecutive_shape / 10.0),
+    }
+    
+    score = sum(features[k] * FEATURE_WEIGHTS[k] for k in features.keys())
+    return score
+
+
+def calculate_combination_probability(combo: tuple, digit_probs: np.ndarray) -> float:
+    """
+    计算组合的中奖概率
+    
+    Args:
+        combo: 组合元组,如 (1, 2, 3) 或 (1, 1, 2)
+        digit_probs: 10个数字的预测概率
+        
+    Returns:
+        该组合的理论中奖概率
+    """
+    # 判断是组六还是组三
+    unique_digits = set(combo)
+    
+    if len(unique_digits) == 3:
+        # 组六: 三个不同数字,任意排列都中奖 (6种排列)
+        # P = P(d1) * P(d2) * P(d3) * 6
+        prob = digit_probs[combo[0]] * digit_probs[combo[1]] * digit_probs[combo[2]] * 6
+    else:
+        # 组三: 两个相同 + 一个不同,任意排列都中奖 (3种排列)
+        # P = P(d1)^2 * P(d2) * 3
+        unique_list = list(unique_digits)
+        if combo[0] == combo[1]:
+            prob = digit_probs[combo[0]]**2 * digit_probs[combo[2]] * 3
+        else:
+            prob = digit_probs[combo[1]]**2 * digit_probs[combo[0]] * 3
+    
+    return float(prob)
+
+
+def generate_betting_plan(top_digits: list, digit_probs: np.ndarray, score: float, num_bets: int = 100) -> dict:
+    """
+    生成优化的投注计划 - 基于概率分配注数
+    
+    Args:
+        top_digits: Top10数字列表
+        digit_probs: 10个数字的预测概率数组
+        score: 机会评分
+        num_bets: 总投注注数
+        
+    Returns:
+        {
+            'num_bets': 100,
+            'total_cost': 200,
+            'combinations': [
+                {'combo': [0,1,2], 'probability': 0.025, 'bets': 5, 'type': 'group6', 'expected_return': 865},
+                ...
+            ],
+            'group6_count': 70,
+            'group3_count': 30,
+            'expected_roi': 405.0,
+            'total_probability': 0.85,  # 累计覆盖概率
+            'prize_breakdown': {...}
+        }
+    """
+    # 步骤1: 生成所有可能的组合并计算概率
+    candidates = []
+    
+    # 组六组合 (从Top10中选3个不同数字)
+    from itertools import combinations
+    for combo in combinations(top_digits, 3):
+        combo_sorted = tuple(sorted(combo))
+        prob = calculate_combination_probability(combo_sorted, digit_probs)
+        candidates.append({
+            'combo': list(combo_sorted),
+            'type': 'group6',
+            'probability': prob,
+            'prize': 173
+        })
+    
+    # 组三组合 (从Top10中选2个,其中1个重复)
+    for d1 in top_digits:
+        for d2 in top_digits:
+            if d1 != d2:
+                combo_sorted = tuple(sorted([d1, d1, d2]))
+                prob = calculate_combination_probability(combo_sorted, digit_probs)
+                candidates.append({
+                    'combo': list(combo_sorted),
+                    'type': 'group3',
+                    'probability': prob,
+                    'prize': 346
+                })
+    
+    # 步骤2: 按概率排序
+    candidates.sort(key=lambda x: x['probability'], reverse=True)
+    
+    # 步骤3: 优化分配注数
+    # 使用概率加权分配,高概率组合获得更多注数
+    
+    # 选择Top候选组合 (数量= num_bets的20%-30%, 更集中)
+    top_n = min(max(int(num_bets * 0.25), 15), len(candidates))
+    selected_candidates = candidates[:top_n]
+    
+    # 计算每个组合的权重 - 使用指数衰减
+    # 第1名权重最高,后面指数递减
+    weights = []
+    decay_rate = 0.85  # 衰减率,每个排名降低15%
+    for i in range(len(selected_candidates)):
+        weight = decay_rate ** i  # 指数衰减
+        weights.append(weight)
+    
+    # 归一化
+    weights = np.array(weights)
+    weights = weights / np.sum(weights)
+    
+    # 分配注数
+    allocated_bets = []
+    
+    # 先按权重计算每个组合的理论注数
+    theoretical_bets = []
+    for i, weight in enumerate(weights):
+        bets = max(1, round(num_bets * weight))  # 至少1注
+        theoretical_bets.append(bets)
+    
+    # 调整使总数等于num_bets
+    total_theoretical = sum(theoretical_bets)
+    if total_theoretical != num_bets:
+        # 按比例调整
+        adjustment_factor = num_bets / total_theoretical
+        theoretical_bets = [max(1, round(b * adjustment_factor)) for b in theoretical_bets]
+        
+        # 如果还有差异,从最后开始微调
+        diff = num_bets - sum(theoretical_bets)
+        idx = len(theoretical_bets) - 1
+        while diff != 0 and idx >= 0:
+            if diff > 0 and theoretical_bets[idx] < num_bets:
+                theoretical_bets[idx] += 1
+                diff -= 1
+            elif diff < 0 and theoretical_bets[idx] > 1:
+                theoretical_bets[idx] -= 1
+                diff += 1
+            idx -= 1
+    
+    # 创建最终分配列表
+    for i, candidate in enumerate(selected_candidates):
+        bets = theoretical_bets[i]
+        if bets > 0:
+            allocated_bets.append({
+                'combo': candidate['combo'],
+                'type': candidate['type'],
+                'probability': float(candidate['probability']),
+                'bets': int(bets),
+                'cost': int(bets * 2),
+                'prize': int(candidate['prize']),
+                'expected_return': float(bets * 2 * candidate['probability'] * candidate['prize'])
+            })
+    
+    # 步骤4: 统计信息
+    total_bets = sum(b['bets'] for b in allocated_bets)
+    total_cost = total_bets * 2
+    group6_count = sum(b['bets'] for b in allocated_bets if b['type'] == 'group6')
+    group3_count = sum(b['bets'] for b in allocated_bets if b['type'] == 'group3')
+    total_probability = sum(b['probability'] for b in allocated_bets)
+    total_expected_return = sum(b['expected_return'] for b in allocated_bets)
+    
+    # 预期ROI = (期望收益 - 成本) / 成本 * 100%
+    expected_roi = ((total_expected_return - total_cost) / total_cost * 100) if total_cost > 0 else 0
+    
+    return {
+        'num_bets': int(total_bets),
+        'total_cost': int(total_cost),
+        'combinations': allocated_bets,  # 每个组合包含概率和注数
+        'group6_count': int(group6_count),
+        'group3_count': int(group3_count),
+        'expected_roi': float(round(expected_roi, 2)),
+        'total_probability': float(round(total_probability, 4)),  # 累计覆盖概率
+        'total_expected_return': float(round(total_expected_return, 2)),
+        'prize_breakdown': {
+            'group6_prize': 173,
+            'group3_prize': 346,
+            'direct_prize': 1040
+        }
+    }
+
+
+def next_period_of(latest_period: LotteryPeriod) -> str:
+    """根据最新一期推算下一期号"""
+    try:
+        current_date = datetime.strptime(latest_period.period, '%Y-%m-%d')
+        next_date = current_date + timedelta(days=1)
+        return next_date.strftime('%Y-%m-%d')
+    except ValueError:
+        return f"预测-{latest_period.date}"
+
+
+def get_prediction_model():
+    """从进程级注册表获取模型及其检查点信息"""
+    import torch
+    from src.models.registry import registry
+    
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    registry.configure(settings.MODEL_TORCH_THREADS)
+    return registry.get_entry(settings.MODEL_CHECKPOINT_PATH, device=device)
+
+
+def infer_batch(model_entry, sequences: np.ndarray):
+    """
+    批量前向推理
+    
+    Args:
+        model_entry: 注册表中的模型条目
+        sequences: (batch, 30, 3) 输入窗口
+    
+    Returns:
+        (digit_probs (batch, 10), attention_weights (batch, 30))
+    """
+    import torch
+    
+    with torch.no_grad():
+        input_seq = torch.from_numpy(np.asarray(sequences, dtype=np.int64)).to(model_entry.device)
+        predictions = model_entry.model.predict(input_seq)
+    return predictions['digit_probs'], predictions['attention_weights']
+
+
+def predict_window(model_entry, recent_periods, num_bets: int = 100):
+    """
+    根据最近30期做一次推理（纯计算，不访问数据库）
+    
+    Args:
+        model_entry: 注册表中的模型条目
+        recent_periods: 最近30期（DrawWindow 或 LotteryPeriod 列表，按时间正序）
+        num_bets: 投注注数
+    
+    Returns:
+        (/api/predict/ 的响应数据, 创建 Prediction 的字段)
+    """
+    # 准备输入序列（DrawWindow 直接使用 uint8 数组切片）
+    if isinstance(recent_periods, DrawWindow):
+        sequences = recent_periods.digits
+    else:
+        sequences = np.array([[p.digit1, p.digit2, p.digit3] for p in recent_periods])
+    
+    # 模型预测
+    digit_probs, attention_weights = infer_batch(model_entry, sequences[np.newaxis])
+    return build_prediction(recent_periods, sequences, digit_probs[0], attention_weights[0], num_bets)
+
+
+def build_prediction(recent_periods, sequences: np.ndarray, digit_probs: np.ndarray,
+                     attention_weights: np.ndarray, num_bets: int = 100):
+    """
+    由模型输出生成评分和投注计划
+    
+    Returns:
+        (/api/predict/ 的响应数据, 创建 Prediction 的字段)
+    """
+    # 获取Top10数字（用于生成投注组合）
+    top_indices = np.argsort(digit_probs)[::-1][:10]
+    top10_digits = top_indices.tolist()
+    
+    # 计算机会评分（使用完整的评分系统）
+    score = calculate_opportunity_score(digit_probs, sequences)
+    threshold = OPPORTUNITY_THRESHOLD
+    should_bet = score >= threshold
+    
+    # 确定下一期号
+    latest_period = recent_periods[-1]
+    next_period = next_period_of(latest_period)
+    
+    # 生成投注计划 (传入digit_probs用于概率计算)
+    betting_plan = generate_betting_plan(top10_digits, digit_probs, score, num_bets)
+    
+    prediction_fields = {
+        'period_id': latest_period.pk,
+        'predicted_for_period': next_period,
+        'top5_digits': top10_digits[:5],
+        'digit_probs': digit_probs.tolist(),
+        'confidence_score': score / 100.0,  # 转换为0-1范围
+        'attention_weights': attention_weights.tolist(),
+        # 投注建议字段（get_latest_recommendation 直接读取）
+        'recommendation': 'bet' if should_bet else 'no_bet',
+        'strategy': 'opportunity',
+        'betting_combinations': betting_plan['combinations'] if should_bet else None,
+        'total_cost': betting_plan['total_cost'] if should_bet else 0,
+        'bet_count': betting_plan['num_bets'] if should_bet else 0,
+        'recommendation_reason': (
+            f"机会评分{score:.2f}分，{'达到' if should_bet else '低于'}阈值{threshold}分，"
+            + (f"建议投注{betting_plan['num_bets']}注" if should_bet else '继续观望')
+        ),
+    }
+    
+    response = {
+        'status': 'success',
+        'message': f'成功生成{next_period}期预测',
+        'prediction': {
+            'period': next_period,
+            'score': round(score, 2),  # numpy 标量由 FastJsonResponse 直接序列化
+            'threshold': threshold,
+            'should_bet': should_bet,
+            'top10_digits': top10_digits,
+            'top5_digits': top10_digits[:5],  # 兼容旧版
+            'betting_plan': betting_plan,
+            'recommendation': '建议投注' if should_bet else '继续观望'
+        }
+    }
+    return response, prediction_fields
+
+
+def run_prediction(num_bets: int = 100, model_entry=None, cache_key: str = '') -> dict:
+    """
+    执行一次完整预测并保存 Prediction
+    
+    Args:
+        num_bets: 投注注数
+        model_entry: 注册表中的模型条目，默认取当前检查点
+        cache_key: 写入 Prediction.cache_key 的结果键
+    
+    Returns:
+        /api/predict/ 的响应数据
+    """
+    if model_entry is None:
+        model_entry = get_prediction_model()
+    
+    # 最近30期（进程内开奖历史的切片）
+    recent_periods = get_draws().latest_window(WINDOW_SIZE)
+    if len(recent_periods) < WINDOW_SIZE:
+        raise PredictionError('历史数据不足30期，无法生成预测')
+    
+    response, prediction_fields = predict_window(model_entry, recent_periods, num_bets)
+    
+    # 保存预测到数据库（同一结果键只保存一次，并发写入由唯一约束兜底）
+    if cache_key:
+        _, created = Prediction.objects.get_or_create(cache_key=cache_key, defaults=prediction_fields)
+    else:
+        Prediction.objects.create(**prediction_fields)
+        created = True
+    if created:
+        publish('prediction_ready', prediction_event(response, num_bets))
+    
+    return response
+
+
+async def arun_prediction(num_bets: int, model_entry, cache_key: str = '') -> dict:
+    """run_prediction 的异步版本：数据库走异步 ORM，推理放到 inference 线程池"""
+    recent_periods = (await aget_draws()).latest_window(WINDOW_SIZE)
+    if len(recent_periods) < WINDOW_SIZE:
+        raise PredictionError('历史数据不足30期，无法生成预测')
+    
+    response, prediction_fields = await run_blocking('inference', predict_window,
+                                                     model_entry, recent_periods, num_bets)
+    
+    if cache_key:
+        _, created = await Prediction.objects.aget_or_create(cache_key=cache_key, defaults=prediction_fields)
+    else:
+        await Prediction.objects.acreate(**prediction_fields)
+        created = True
+    if created:
+        await apublish('prediction_ready', prediction_event(response, num_bets))
+    
+    return response
+
+
+def prediction_event(response: dict, num_bets: int) -> dict:
+    """prediction_ready 事件数据（转为 Python 内置类型，评分等是 numpy 标量，写入 Event.data 时无法 JSON 编码）"""
+    prediction = response['prediction']
+    return {
+        'period': prediction['period'],
+        'num_bets': int(num_bets),
+        'score': float(prediction['score']),
+        'should_bet': bool(prediction['should_bet']),
+    }
+
+
+# ==================== 结果缓存 ====================
+
+_inflight = SingleFlight()
+_ainflight = AsyncSingleFlight()
+
+
+def prediction_cache_key(latest_period: str, model_hash: str, num_bets: int) -> str:
+    """预测结果缓存键"""
+    return f"predict:{latest_period}:{model_hash[:16]}:{num_bets}"
+
+
+def get_prediction(num_bets: int = 100) -> dict:
+    """
+    获取预测结果（带缓存）
+    
+    在有新开奖数据入库或模型检查点变化前，相同注数的请求直接返回缓存结果；
+    同一键的并发请求只会有一个真正执行预测，其余等待其结果。
+    
+    Returns:
+        /api/predict/ 的响应数据，附加 'cached' 字段
+    """
+    model_entry = get_prediction_model()
+    latest = get_draws().latest()
+    if latest is None:
+        raise PredictionError('历史数据不足30期，无法生成预测')
+    
+    key = prediction_cache_key(latest.period, model_entry.sha256, num_bets)
+    result = cache.get(key)
+    if result is not None:
+        return {**result, 'cached': True}
+    
+    def compute():
+        # 等待期间可能已被其他进程写入缓存
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        computed = run_prediction(num_bets, model_entry=model_entry, cache_key=key)
+        cache.set(key, computed, settings.PREDICTION_CACHE_TIMEOUT)
+        cache.set(last_good_key(latest.period, num_bets), computed, settings.PREDICTION_LAST_GOOD_TIMEOUT)
+        return computed
+    
+    result, leader = _inflight.do(key, compute)
+    return {**result, 'cached': not leader}
+
+
+async def _aget_fresh(num_bets: int) -> dict:
+    """
+    get_prediction 的异步版本
+    
+    缓存命中只需一次异步查询；模型加载和推理在 inference 线程池执行，
+    同一键的并发请求在事件循环内合并，等待方不占用线程。
+    """
+    model_entry = await run_blocking('inference', get_prediction_model)
+    latest = (await aget_draws()).latest()
+    if latest is None:
+        raise PredictionError('历史数据不足30期，无法生成预测')
+    
+    key = prediction_cache_key(latest.period, model_entry.sha256, num_bets)
+    result = await cache.aget(key)
+    if result is not None:
+        return {**result, 'cached': True}
+    
+    async def compute():
+        cached = await cache.aget(key)
+        if cached is not None:
+            return cached
+        computed = await arun_prediction(num_bets, model_entry, cache_key=key)
+        await cache.aset(key, computed, settings.PREDICTION_CACHE_TIMEOUT)
+        await cache.aset(last_good_key(latest.period, num_bets), computed, settings.PREDICTION_LAST_GOOD_TIMEOUT)
+        return computed
+    
+    result, leader = await _ainflight.do(key, compute)
+    return {**result, 'cached': not leader}
+
+
+# 超时后仍在后台运行的计算（持有引用，避免任务被回收）
+_background = set()
+
+
+def _background_done(task):
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"后台预测失败: {task.exception()}")
+
+
+async def aget_prediction(num_bets: int = 100, deadline: float = None) -> dict:
+    """
+    异步获取预测结果（带延迟目标）
+    
+    在 deadline 秒内未完成（如回测占满 inference 线程池）时不再等待，计算转入后台继续，
+    完成后写入缓存供后续请求使用；本次请求返回:
+        1. 同一最新期号、同一注数的上一次预测结果（模型检查点变化等情况），标记 stale: true
+        2. 否则返回不做模型推理的降级预测（fallback_prediction），标记 fallback: true
+    
+    Args:
+        num_bets: 投注注数
+        deadline: 等待秒数，默认 settings.PREDICT_DEADLINE；None/0 表示一直等待
+    
+    注意：后台完成依赖常驻事件循环（ASGI 部署）；WSGI 下请求结束时未完成的计算会被取消。
+    """
+    if deadline is None:
+        deadline = getattr(settings, 'PREDICT_DEADLINE', None)
+    if not deadline:
+        return await _aget_fresh(num_bets)
+    
+    task = asyncio.ensure_future(_aget_fresh(num_bets))
+    _background.add(task)
+    task.add_done_callback(_background_done)
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), deadline)
+    except asyncio.TimeoutError:
+        pass
+    
+    draws = await aget_draws()
+    latest = draws.latest()
+    if latest is None:
+        raise PredictionError('历史数据不足30期，无法生成预测')
+    stale = await cache.aget(last_good_key(latest.period, num_bets))
+    if stale is not None:
+        logger.warning(f"预测超过{deadline}秒，返回上一次结果（{num_bets}注）")
+        return {**stale, 'cached': True, 'stale': True}
+    
+    logger.warning(f"预测超过{deadline}秒，返回降级预测（{num_bets}注）")
+    return {**fallback_prediction(draws, num_bets), 'cached': False, 'stale': False, 'fallback': True}
+
+
+def last_good_key(latest_period: str, num_bets: int) -> str:
+    """同一最新期号、注数的最近一次预测结果（不含模型哈希，模型更新后仍可作为过期结果返回）"""
+    return f"predict:last:{latest_period}:{num_bets}"
+
+
+# 降级预测统计数字频率的期数
+FALLBACK_WINDOW = 100
+
+
+def fallback_prediction(draws, num_bets: int) -> dict:
+    """
+    不做模型推理的降级预测
+    
+    按最近 FALLBACK_WINDOW 期各数字出现频率（加一平滑）估计概率，
+    沿用同一套评分和投注计划生成；降级结果不建议投注，也不保存 Prediction。
+    """
+    window = draws.latest_window(WINDOW_SIZE)
+    if len(window) < WINDOW_SIZE:
+        raise PredictionError('历史数据不足30期，无法生成预测')
+    
+    counts = np.bincount(draws.latest_window(FALLBACK_WINDOW).digits.ravel(), minlength=10) + 1
+    digit_probs = counts / counts.sum()
+    attention = np.full(WINDOW_SIZE, 1 / WINDOW_SIZE)
+    response, _ = build_prediction(window, window.digits, digit_probs, attention, num_bets)
+    
+    prediction = response['prediction']
+    prediction['should_bet'] = False
+    prediction['recommendation'] = '继续观望'
+    response['message'] = f"模型预测未在时限内完成，返回{prediction['period']}期降级预测（按近期数字频率）"
+    return response
+
+
+# ==================== 入库后预计算 ====================
+
+# 预计算使用的默认注数（与 /api/predict/ 默认值一致）
+DEFAULT_NUM_BETS = 100
+
+
+def precompute_next_prediction(num_bets: int = DEFAULT_NUM_BETS):
+    """
+    为最新一期预先生成下一期预测并写入缓存
+    
+    结果键与 /api/predict/ 相同，已存在时直接跳过。只与同步的 get_prediction 调用合并（_inflight）；
+    异步视图走 _aget_fresh（_ainflight），两者并发时可能各算一次，由 cache_key 唯一约束保证只保存一条。
+    
+    Returns:
+        响应数据；历史数据不足时返回 None
+    """
+    try:
+        result = get_prediction(num_bets)
+    except PredictionError as e:
+        logger.info(f"跳过预计算: {e}")
+        return None
+    
+    if not result['cached']:
+        logger.info(f"已预计算 {result['prediction']['period']} 期预测")
+    return result
+
+
+def _precompute_in_background(num_bets: int):
+    close_old_connections()
+    try:
+        precompute_next_prediction(num_bets)
+    except Exception as e:
+        logger.error(f"预计算失败: {e}", exc_info=True)
+    finally:
+        close_old_connections()
+
+
+def schedule_precompute(num_bets: int = DEFAULT_NUM_BETS):
+    """
+    新开奖数据入库后安排预计算
+    
+    默认提交到 inference 线程池，不阻塞入库调用方；
+    settings.PRECOMPUTE_IN_BACKGROUND=False 时同步执行（测试/脚本）。
+    """
+    if not getattr(settings, 'PRECOMPUTE_ON_INGEST', True):
+        return
+    if getattr(settings, 'PRECOMPUTE_IN_BACKGROUND', True):
+        get_pool('inference').submit(_precompute_in_background, num_bets)
+    else:
+        precompute_next_prediction(num_bets)
@@ -0,0 +1,189 @@
+"""
+请求级性能剖析
+
+RequestProfilingMiddleware 为每个请求记录：SQL 条数、SQL 总耗时、最慢语句、
+Python 耗时（总耗时减 SQL）以及可选的内存分配峰值（tracemalloc），
+写入 Server-Timing 响应头（浏览器开发者工具可直接查看），并以 JSON 记录到
+lottery.profiling 日志。
+
+SQL 统计通过连接的 execute_wrapper 实现，不依赖 DEBUG；统计对象放在 contextvar 中，
+异步视图经 sync_to_async 执行的查询同样计入。
+
+查询预算：settings.QUERY_BUDGETS = {'lottery:period_detail': 10, ...}，超出时记录警告，
+QUERY_BUDGET_RAISE=True（测试中）时抛出 QueryBudgetExceeded，用于发现 N+1 回归。
+"""
+import contextvars
+import json
+import logging
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 最慢语句在日志中保留的长度
+SQL_PREVIEW_LENGTH = 200
+
+
+class QueryBudgetExceeded(AssertionError):
+    """视图的 SQL 条数超出预算"""
+
+
+@dataclass
+class RequestProfile:
+    """单个请求的统计"""
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    sql_time: float = 0.0
+    slowest_time: float = 0.0
+    slowest_sql: str = ''
+    total_time: float = 0.0
+    peak_bytes: Optional[int] = None
+
+    def add_query(self, sql: str, elapsed: float):
+        self.queries += 1
+        self.sql_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_sql = sql
+
+    def finish(self):
+        self.total_time = time.perf_counter() - self.started
+
+    @property
+    def python_time(self) -> float:
+        return max(self.total_time - self.sql_time, 0.0)
+
+    def server_timing(self) -> str:
+        """Server-Timing 响应头"""
+        parts = [
+            f'db;dur={self.sql_time * 1000:.2f};desc="{self.queries} queries"',
+            f'app;dur={self.python_time * 1000:.2f}',
+            f'total;dur={self.total_time * 1000:.2f}',
+        ]
+        if self.peak_bytes is not None:
+            parts.append(f'mem;desc="peak {self.peak_bytes // 1024} KiB"')
+        return ', '.join(parts)
+
+    def as_dict(self) -> dict:
+        return {
+            'queries': self.queries,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'slowest_ms': round(self.slowest_time * 1000, 2),
+            'slowest_sql': self.slowest_sql[:SQL_PREVIEW_LENGTH],
+            'python_ms': round(self.python_time * 1000, 2),
+            'total_ms': round(self.total_time * 1000, 2),
+            'peak_kb': self.peak_bytes // 1024 if self.peak_bytes is not None else None,
+        }
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar('lottery_request_profile', default=None)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    """当前请求的统计（不在请求中时为 None）"""
+    return _current.get()
+
+
+# ==================== SQL 统计 ====================
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper：当前请求开启剖析时计入耗时"""
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add_query(sql, time.perf_counter() - start)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created 信号处理：为新连接挂载 record_query"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# ==================== 中间件 ====================
+
+class RequestProfilingMiddleware:
+    """
+    请求剖析中间件（同时支持同步/异步视图）
+
+    settings:
+        REQUEST_PROFILING: 是否启用（默认 True）
+        PROFILE_TRACEMALLOC: 是否统计内存分配峰值（开销较大，默认 False；
+            tracemalloc 为进程级，并发请求下峰值为近似值）
+        QUERY_BUDGETS / QUERY_BUDGET_RAISE: 见模块说明
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'REQUEST_PROFILING', True):
+            return self.get_response(request)
+        profile, token = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, profile)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'REQUEST_PROFILING', True):
+            return await self.get_response(request)
+        profile, token = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, profile)
+
+    def _start(self):
+        if getattr(settings, 'PROFILE_TRACEMALLOC', False):
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        profile = RequestProfile()
+        return profile, _current.set(profile)
+
+    def _finish(self, request, response, profile: RequestProfile):
+        profile.finish()
+        if getattr(settings, 'PROFILE_TRACEMALLOC', False) and tracemalloc.is_tracing():
+            profile.peak_bytes = tracemalloc.get_traced_memory()[1]
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else ''
+        response['Server-Timing'] = profile.server_timing()
+        logger.info(json.dumps({
+            'view': view_name,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **profile.as_dict(),
+        }, ensure_ascii=False))
+
+        self._check_budget(view_name, profile)
+        return response
+
+    @staticmethod
+    def _check_budget(view_name: str, profile: RequestProfile):
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+        if budget is None or profile.queries <= budget:
+            return
+        message = f'{view_name} 执行了 {profile.queries} 条SQL，超出预算 {budget} 条（最慢: {profile.slowest_sql[:SQL_PREVIEW_LENGTH]}）'
+        if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
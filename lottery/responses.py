@@ -0,0 +1,134 @@
+"""
+JSON 响应与压缩
+
+FastJsonResponse 使用 orjson 序列化：numpy 数组/标量、datetime 原生支持，
+无需在各处 float()/bool()/.tolist() 转换，输出 UTF-8（中文不转义，体积更小）。
+未安装 orjson 时回退到标准库。
+大列表可选按列式编码（?layout=columnar），省去每行重复的键名。
+CompressionMiddleware 对超过阈值的响应做 brotli（已安装时）或 gzip 压缩。
+"""
+import json
+import re
+from datetime import date, datetime
+from typing import Any, Dict, List
+
+import numpy as np
+from django.conf import settings
+from django.http import HttpResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+
+# ==================== 序列化 ====================
+
+def _default(obj):
+    """orjson 不直接支持的类型（非连续数组等）及标准库回退时的 numpy/日期转换"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f'无法序列化的类型: {type(obj).__name__}')
+
+
+def dumps(data: Any) -> bytes:
+    """序列化为 UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def to_columnar(records: List[Dict]) -> Dict:
+    """[{'a': 1, 'b': 2}, ...] -> {'columns': ['a', 'b'], 'rows': [[1, 2], ...]}"""
+    columns = list(records[0].keys())
+    return {'columns': columns, 'rows': [[record.get(c) for c in columns] for record in records]}
+
+
+def columnarize(data: Any, min_rows: int = None) -> Any:
+    """把数据中行数达到 min_rows、键相同的字典列表转为列式编码（递归）"""
+    if min_rows is None:
+        min_rows = getattr(settings, 'JSON_COLUMNAR_MIN_ROWS', 20)
+    if isinstance(data, dict):
+        return {key: columnarize(value, min_rows) for key, value in data.items()}
+    if isinstance(data, list):
+        if (len(data) >= min_rows and all(isinstance(item, dict) for item in data)
+                and all(item.keys() == data[0].keys() for item in data)):
+            return to_columnar(data)
+        return [columnarize(item, min_rows) for item in data]
+    return data
+
+
+class FastJsonResponse(HttpResponse):
+    """
+    JSON 响应（orjson）
+
+    Args:
+        data: 响应数据，可包含 numpy 数组/标量
+        columnar: 是否对大列表使用列式编码
+    """
+
+    def __init__(self, data, columnar: bool = False, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        if columnar:
+            data = columnarize(data)
+        super().__init__(content=dumps(data), **kwargs)
+
+
+def wants_columnar(request) -> bool:
+    """客户端是否请求列式编码（?layout=columnar）"""
+    return request.GET.get('layout') == 'columnar'
+
+
+# ==================== 压缩 ====================
+
+re_accepts_brotli = re.compile(r'\bbr\b')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    响应压缩
+
+    超过 settings.RESPONSE_COMPRESS_MIN_BYTES 的响应：客户端支持且已安装 brotli 时用 br，
+    否则交给 Django 的 gzip（含流式响应）。
+    """
+
+    def process_response(self, request, response):
+        # SSE 逐条推送，压缩会缓冲事件
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        if not response.streaming and len(response.content) < getattr(settings, 'RESPONSE_COMPRESS_MIN_BYTES', 1024):
+            return response
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and not response.streaming and re_accepts_brotli.search(accept_encoding):
+            return self._brotli(response)
+        return super().process_response(request, response)
+
+    @staticmethod
+    def _brotli(response):
+        if response.has_header('Content-Encoding'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        compressed = brotli.compress(response.content, quality=5)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        # 压缩后内容与未压缩版本不同，强 ETag 需弱化（与 GZipMiddleware 一致）
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
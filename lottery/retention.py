@@ -0,0 +1,120 @@
+"""
+预测记录保留与归档
+
+同一 (期号, 模型) 会因注数不同、重复调用而积累多条 Prediction。
+compact_predictions() 对超过保留期的记录，每个 (期号, 模型哈希) 只保留最新一条，
+其余按月追加写入 gzip 压缩的 NDJSON 归档文件后从数据库删除。
+"""
+import gzip
+import logging
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Prediction
+from .responses import dumps
+from .versioning import batch_version_bump
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = [
+    'id', 'predicted_for_period', 'top5_digits', 'confidence_score', 'recommendation',
+    'percentile_rank', 'strategy', 'total_cost', 'bet_count', 'betting_combinations',
+    'recommendation_reason', 'cache_key',
+]
+
+
+def model_hash(cache_key: str) -> str:
+    """从结果键 'predict:{期号}:{模型哈希}:{注数}' 中取模型哈希（旧记录无结果键时为空）"""
+    parts = cache_key.split(':') if cache_key else []
+    return parts[2] if len(parts) > 2 else ''
+
+
+def archive_dir() -> Path:
+    return Path(getattr(settings, 'PREDICTION_ARCHIVE_DIR',
+                        Path(settings.BASE_DIR) / 'data' / 'archive' / 'predictions'))
+
+
+def archive_row(pred: Prediction) -> Dict:
+    """归档记录（含解码后的概率和注意力权重）"""
+    row = {name: getattr(pred, name) for name in ARCHIVE_FIELDS}
+    row['period'] = pred.period.period
+    row['digit_probs'] = pred.digit_probs
+    row['attention_weights'] = pred.attention_weights
+    row['created_at'] = pred.created_at.isoformat()
+    return row
+
+
+def write_archive(preds: Iterable[Prediction]) -> List[Path]:
+    """按创建月份追加写入 predictions-YYYY-MM.ndjson.gz，返回写入的文件"""
+    by_month: Dict[str, List[bytes]] = {}
+    for pred in preds:
+        by_month.setdefault(pred.created_at.strftime('%Y-%m'), []).append(dumps(archive_row(pred)) + b'\n')
+
+    directory = archive_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for month, lines in sorted(by_month.items()):
+        path = directory / f'predictions-{month}.ndjson.gz'
+        # gzip 追加写入会新增一个成员，gzip.open 读取时自动连接
+        with gzip.open(path, 'ab') as f:
+            f.writelines(lines)
+        paths.append(path)
+    return paths
+
+
+def find_redundant(cutoff) -> List[int]:
+    """超过保留期、且同一 (期号, 模型哈希) 下存在更新记录的预测 ID"""
+    rows = (Prediction.objects.order_by('period_id', '-created_at', '-id')
+            .values_list('id', 'period_id', 'cache_key', 'created_at'))
+    seen = set()
+    redundant = []
+    for pk, period_id, cache_key, created_at in rows.iterator(chunk_size=2000):
+        key = (period_id, model_hash(cache_key))
+        if key not in seen:
+            seen.add(key)
+            continue
+        if created_at < cutoff:
+            redundant.append(pk)
+    return redundant
+
+
+def compact_predictions(older_than_days: int = None, dry_run: bool = False, batch_size: int = 500) -> Dict:
+    """
+    归档并删除冗余的旧预测记录
+
+    Args:
+        older_than_days: 保留期（天），默认 settings.PREDICTION_RETENTION_DAYS
+        dry_run: 只统计不写入
+        batch_size: 每批归档/删除的条数
+
+    Returns:
+        {'candidates': 冗余条数, 'archived': 已归档删除条数, 'files': [归档文件]}
+    """
+    if older_than_days is None:
+        older_than_days = getattr(settings, 'PREDICTION_RETENTION_DAYS', 30)
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    redundant = find_redundant(cutoff)
+    stats = {'candidates': len(redundant), 'archived': 0, 'files': []}
+    if dry_run or not redundant:
+        return stats
+
+    files = set()
+    # 删除时每行的 post_delete 不再各自递增版本号，全部完成后递增一次
+    with batch_version_bump():
+        for start in range(0, len(redundant), batch_size):
+            ids = redundant[start:start + batch_size]
+            with transaction.atomic():
+                preds = list(Prediction.objects.filter(pk__in=ids).select_related('period').order_by('id'))
+                # 先写归档再删除，删除失败时归档中可能有重复行，但不会丢数据
+                files.update(write_archive(preds))
+                Prediction.objects.filter(pk__in=ids).delete()
+            stats['archived'] += len(preds)
+
+    stats['files'] = sorted(str(path) for path in files)
+    logger.info(f"预测记录归档完成: {stats['archived']}条 -> {', '.join(stats['files'])}")
+    return stats
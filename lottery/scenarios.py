@@ -0,0 +1,164 @@
+"""
+批量情景预测
+
+一次请求给出多个情景（截至期号 as_of × 投注注数 num_bets），
+相同 as_of 的情景共用一个输入窗口（进程内开奖历史的切片），所有窗口拼成一个 batch 只做一次前向推理，
+再按各自的注数生成投注计划。默认不保存 Prediction，persist=True 时批量写入。
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .draws import get_draws
+from .models import Prediction
+from .prediction import WINDOW_SIZE, PredictionError, build_prediction, get_prediction_model, infer_batch
+from .versioning import bump_data_version
+
+# 注数范围
+MIN_BETS = 1
+MAX_BETS = 1000
+
+
+def parse_scenarios(body: dict) -> List[Dict]:
+    """
+    解析请求中的情景列表
+
+    支持两种写法:
+        {"scenarios": [{"as_of": "2026-02-01", "num_bets": 50}, {"num_bets": 100}]}
+        {"as_of": ["2026-02-01", null], "num_bets": [20, 50, 100]}   # 笛卡尔积
+
+    as_of 为空表示最新一期。
+
+    Returns:
+        [{'as_of': str|None, 'num_bets': int}, ...]；参数错误时抛出 PredictionError
+    """
+    if 'scenarios' in body:
+        raw = body['scenarios']
+        if not isinstance(raw, list):
+            raise PredictionError('scenarios 必须是列表')
+    else:
+        as_ofs = body.get('as_of', [None])
+        budgets = body.get('num_bets', [100])
+        as_ofs = as_ofs if isinstance(as_ofs, list) else [as_ofs]
+        budgets = budgets if isinstance(budgets, list) else [budgets]
+        raw = [{'as_of': as_of, 'num_bets': num_bets} for as_of in as_ofs for num_bets in budgets]
+
+    limit = getattr(settings, 'PREDICT_BATCH_MAX_SCENARIOS', 50)
+    if not raw:
+        raise PredictionError('至少需要一个情景')
+    if len(raw) > limit:
+        raise PredictionError(f'情景数量不能超过{limit}个')
+
+    scenarios = []
+    for item in raw:
+        if not isinstance(item, dict):
+            raise PredictionError('情景格式错误')
+        try:
+            num_bets = int(item.get('num_bets', 100))
+        except (TypeError, ValueError):
+            raise PredictionError(f"无效的注数: {item.get('num_bets')}")
+        if not MIN_BETS <= num_bets <= MAX_BETS:
+            raise PredictionError(f'注数需在{MIN_BETS}~{MAX_BETS}之间')
+        as_of = item.get('as_of') or None
+        scenarios.append({'as_of': str(as_of) if as_of else None, 'num_bets': num_bets})
+    return scenarios
+
+
+def load_windows(as_ofs: List[Optional[str]]) -> Dict[Optional[str], Dict]:
+    """
+    从进程内开奖历史取出各截至期号的输入窗口（含截至期）
+
+    Returns:
+        {as_of: {'window': DrawWindow(30期), 'next': 下一期 Draw|None}
+                或 {'error': 错误信息}}
+    """
+    draws = get_draws()
+    windows = {}
+    for as_of in as_ofs:
+        if as_of:
+            window = draws.window_ending(as_of, WINDOW_SIZE)
+            if window is None:
+                windows[as_of] = {'error': f'期号不存在: {as_of}'}
+                continue
+        elif len(draws):
+            window = draws.latest_window(WINDOW_SIZE)
+        else:
+            windows[as_of] = {'error': '暂无开奖数据'}
+            continue
+        if len(window) < WINDOW_SIZE:
+            windows[as_of] = {'error': f'{as_of or "最新一期"}之前历史数据不足30期'}
+            continue
+        windows[as_of] = {'window': window, 'next': window.following}
+    return windows
+
+
+def predict_scenarios(model_entry, windows: Dict[Optional[str], Dict], scenarios: List[Dict]) -> List[Dict]:
+    """
+    对所有有效窗口做一次批量推理，再逐个情景生成投注计划（纯计算，不访问数据库）
+
+    Returns:
+        与 scenarios 一一对应的结果列表；每项附带内部字段 '_fields' 供保存 Prediction
+    """
+    valid = [as_of for as_of, item in windows.items() if 'window' in item]
+    outputs = {}
+    if valid:
+        sequences = np.stack([windows[as_of]['window'].digits for as_of in valid])
+        digit_probs, attention_weights = infer_batch(model_entry, sequences)
+        for i, as_of in enumerate(valid):
+            outputs[as_of] = (sequences[i], digit_probs[i], attention_weights[i])
+
+    results = []
+    for scenario in scenarios:
+        as_of, num_bets = scenario['as_of'], scenario['num_bets']
+        item = windows[as_of]
+        if 'error' in item:
+            results.append({**scenario, 'status': 'error', 'message': item['error']})
+            continue
+
+        sequence, probs, attention = outputs[as_of]
+        response, fields = build_prediction(item['window'], sequence, probs, attention, num_bets)
+        following = item['next']
+        results.append({
+            'as_of': item['window'][-1].period,
+            'num_bets': num_bets,
+            'status': 'success',
+            'prediction': response['prediction'],
+            # 历史情景附带实际开奖，便于对照
+            'actual_numbers': [following.digit1, following.digit2, following.digit3] if following else None,
+            '_fields': fields,
+        })
+    return results
+
+
+def save_predictions(results: List[Dict]) -> int:
+    """批量保存情景预测结果，返回保存条数"""
+    objs = [Prediction(**result['_fields']) for result in results if result['status'] == 'success']
+    if objs:
+        with transaction.atomic():
+            Prediction.objects.bulk_create(objs)
+            bump_data_version()
+    return len(objs)
+
+
+def finalize(results: List[Dict]) -> List[Dict]:
+    """去掉内部字段"""
+    for result in results:
+        result.pop('_fields', None)
+    return results
+
+
+def run_scenarios(scenarios: List[Dict], persist: bool = False, model_entry=None) -> Dict:
+    """
+    批量情景预测（同步版本，供脚本和定时任务使用）
+
+    Returns:
+        {'status': 'success', 'results': [...], 'saved': 保存条数}
+    """
+    if model_entry is None:
+        model_entry = get_prediction_model()
+    windows = load_windows(list(dict.fromkeys(s['as_of'] for s in scenarios)))
+    results = predict_scenarios(model_entry, windows, scenarios)
+    saved = save_predictions(results) if persist else 0
+    return {'status': 'success', 'results': finalize(results), 'saved': saved}
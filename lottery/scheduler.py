@@ -80,37 +80,13 @@ def weekly_data_crawl():
         logger.info(f"开始每周数据爬取 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         logger.info("=" * 70)
         
-        # 导入爬虫
-        sys.path.insert(0, str(Path(__file__).parent.parent))
-        from tools.crawlers.crawl_real_data import SimpleLottery3DCrawler
-        
-        # 执行爬取
-        crawler = SimpleLottery3DCrawler()
-        results = crawler.crawl_recent_data(days=7)
-        
-        logger.info(f"爬取结果: 获取 {len(results)} 条数据")
+        # 爬取最新页面并批量入库
+        from lottery.ingest import crawl_and_ingest
         
-        # 导入并保存到数据库
-        from lottery.models import LotteryResult
+        stats = crawl_and_ingest(start_page=1, end_page=3, update_type='scheduler')
         
-        added = 0
-        updated = 0
-        for result in results:
-            _, created = LotteryResult.objects.update_or_create(
-                period=result['period'],
-                defaults={
-                    'num1': result['num1'],
-                    'num2': result['num2'],
-                    'num3': result['num3'],
-                    'date': result['date'],
-                }
-            )
-            if created:
-                added += 1
-            else:
-                updated += 1
-        
-        logger.info(f"数据导入完成: 新增 {added} 条，更新 {updated} 条")
+        logger.info(f"爬取结果: 获取 {stats['total']} 条数据")
+        logger.info(f"数据导入完成: 新增 {stats['added']} 条，更新 {stats['updated']} 条")
         logger.info("=" * 70)
         logger.info("每周数据爬取完成")
         logger.info("=" * 70)
@@ -137,6 +113,14 @@ def cleanup_old_job_executions(max_age=604_800):
         logger.error(f"清理任务记录失败: {e}", exc_info=True)
 
 
+# 可手动运行的任务（任务ID -> 函数），后台任务队列的 scheduler_task 使用
+TASKS = {
+    'daily_opportunity_check': daily_opportunity_check,
+    'weekly_data_crawl': weekly_data_crawl,
+    'cleanup_old_job_executions': cleanup_old_job_executions,
+}
+
+
 def start_scheduler():
     """
     启动定时任务调度器
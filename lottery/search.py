@@ -0,0 +1,99 @@
+"""
+开奖号码检索
+
+历史页搜索框支持的写法（多个条件用空格分隔，同时满足）:
+    312        直选号码（按开奖顺序）
+    组123      组选号码，312/231/123 等都匹配（也可写 g123）
+    含5 / 含55 包含指定数字，重复数字表示至少出现相应次数（也可写 d5）
+    和10       和值（也可写 s10）
+    组三       形态：豹子/组三/组六
+    期202      期号前缀（也可写 p202）
+    2026-02    其它输入按期号前缀匹配
+
+三位数字优先当作直选号码；要按三位数字的期号前缀检索，加“期”前缀，如 期202。
+
+除期号外的条件都会换算成 group_key 的候选集合，只走 draw_code/group_key 索引。
+"""
+import re
+from collections import Counter
+from itertools import combinations_with_replacement
+from typing import List
+
+from django.db.models import Q
+
+# 全部220个组选键（000~999按数字排序去重）
+GROUP_KEYS = [''.join(map(str, combo)) for combo in combinations_with_replacement(range(10), 3)]
+
+SHAPES = ('豹子', '组三', '组六')
+
+TOKEN_PATTERNS = [
+    ('exact', re.compile(r'^(\d{3})$')),
+    ('group', re.compile(r'^(?:组|g:?)(\d{3})$', re.IGNORECASE)),
+    ('contains', re.compile(r'^(?:含|d:?)(\d{1,3})$', re.IGNORECASE)),
+    ('sum', re.compile(r'^(?:和|s:?)(\d{1,2})$', re.IGNORECASE)),
+    ('shape', re.compile(r'^(豹子|组三|组六)$')),
+    ('period', re.compile(r'^(?:期|p:?)(\S+)$', re.IGNORECASE)),
+]
+
+
+def draw_code_of(numbers: List[int]) -> str:
+    """直选号码，如 [3, 1, 2] -> '312'"""
+    return ''.join(str(d) for d in numbers)
+
+
+def group_key_of(numbers: List[int]) -> str:
+    """组选键（数字排序后拼接），如 [3, 1, 2] -> '123'"""
+    return ''.join(str(d) for d in sorted(numbers))
+
+
+def shape_of_key(key: str) -> str:
+    """组选键对应的形态"""
+    return {1: '豹子', 2: '组三', 3: '组六'}[len(set(key))]
+
+
+def build_search_filter(query: str) -> Q:
+    """
+    将搜索框输入解析为查询条件
+
+    Args:
+        query: 搜索字符串
+
+    Returns:
+        Q 对象
+    """
+    condition = Q()
+    keys = None  # None 表示不限制组选键
+
+    def narrow(predicate):
+        nonlocal keys
+        keys = [key for key in (GROUP_KEYS if keys is None else keys) if predicate(key)]
+
+    for token in query.split():
+        kind, value = 'period', token
+        for name, pattern in TOKEN_PATTERNS:
+            match = pattern.match(token)
+            if match:
+                kind, value = name, match.group(1)
+                break
+
+        if kind == 'exact':
+            condition &= Q(draw_code=value)
+        elif kind == 'group':
+            group = ''.join(sorted(value))
+            narrow(lambda key: key == group)
+        elif kind == 'contains':
+            wanted = Counter(value)
+            narrow(lambda key: not (wanted - Counter(key)))
+        elif kind == 'sum':
+            total = int(value)
+            narrow(lambda key: sum(map(int, key)) == total)
+        elif kind == 'shape':
+            narrow(lambda key: shape_of_key(key) == value)
+        else:
+            # 期号前缀，用区间查询保证走唯一索引
+            condition &= Q(period__gte=value, period__lt=value + '\uffff')
+
+    if keys is not None:
+        condition &= Q(group_key__in=keys)
+
+    return condition
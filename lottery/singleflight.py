@@ -0,0 +1,100 @@
+"""
+请求合并（single-flight）
+
+同一个键同时只执行一次计算，并发到达的其它调用阻塞等待并共享结果。
+AsyncSingleFlight 是事件循环内的版本，等待方只挂起协程，不占用线程。
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """进程内的请求合并器"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+    
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        执行 fn 或等待同键的进行中调用
+        
+        Returns:
+            (结果, 是否由本次调用实际执行)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+        
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, False
+        
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        
+        return call.result, True
+    
+    def in_flight(self, key: Hashable) -> bool:
+        """该键是否有进行中的调用"""
+        with self._lock:
+            return key in self._calls
+
+
+class AsyncSingleFlight:
+    """事件循环内的请求合并器"""
+    
+    def __init__(self):
+        self._calls = {}
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        执行协程函数 fn 或等待同键的进行中调用
+        
+        Returns:
+            (结果, 是否由本次调用实际执行)
+        """
+        loop = asyncio.get_running_loop()
+        # 各事件循环分别合并（WSGI 下每个异步请求有独立的事件循环）
+        call_key = (loop, key)
+        future = self._calls.get(call_key)
+        if future is not None:
+            return await asyncio.shield(future), False
+        
+        future = loop.create_future()
+        self._calls[call_key] = future
+        try:
+            result = await fn()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # 没有等待方时避免 "exception was never retrieved"
+            raise
+        finally:
+            self._calls.pop(call_key, None)
+        
+        future.set_result(result)
+        return result, True
+    
+    def in_flight(self, key: Hashable) -> bool:
+        """当前事件循环中该键是否有进行中的调用"""
+        return (asyncio.get_running_loop(), key) in self._calls
@@ -33,9 +33,24 @@ urlpatterns = [
     # API接口
     path('api/crawl/', views.crawl_latest_data, name='api_crawl'),
     path('api/predict/', views.generate_prediction, name='api_predict'),
+    path('api/predict/batch/', views.batch_prediction, name='api_predict_batch'),
     path('api/run-task/', views.run_task_now, name='api_run_task'),
     
+    # 后台任务 API
+    path('api/jobs/', views.create_job, name='api_jobs'),
+    path('api/jobs/<int:job_id>/', views.job_status, name='api_job_status'),
+    path('api/jobs/<int:job_id>/cancel/', views.cancel_job, name='api_job_cancel'),
+    
     # 投注建议 API
     path('api/betting/latest-recommendation/', views.get_latest_recommendation, name='api_latest_recommendation'),
     path('api/betting/recommendation-history/', views.get_recommendation_history, name='api_recommendation_history'),
+    
+    # 回测资金曲线区间 API（详情页放大查看）
+    path('api/backtests/<int:pk>/series/', views.backtest_series, name='api_backtest_series'),
+    
+    # 批量导出 API
+    path('api/export/<str:dataset>/', views.export_data, name='api_export'),
+    
+    # 服务器推送事件（SSE）
+    path('api/events/', views.event_stream, name='api_events'),
 ]
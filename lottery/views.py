@@ -2,352 +2,87 @@
 3D彩票预测Web视图
 """
 import json
-import os
 from pathlib import Path
-from datetime import datetime, timedelta
 from collections import Counter
-import numpy as np
+from functools import wraps
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_http_methods
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q
 from django.core.paginator import Paginator
-
-from .models import LotteryPeriod, Prediction, BacktestResult, DataUpdateLog
-
-
-# ==================== 投注策略辅助函数 ====================
-
-def calculate_opportunity_score(digit_probs: np.ndarray, history: np.ndarray) -> float:
-    """
-    计算机会评分（0-100分）
-    复用daily_opportunity_check.py中的评分逻辑
-    """
-    # 特征权重
-    FEATURE_WEIGHTS = {
-        'top1_prob': 15,
-        'top3_mean_prob': 15,
-        'gap_1_2': 10,
-        'prob_std': 10,
-        'top3_concentration': 10,
-        'digit_freq_std': 8,
-        'shape_entropy': 7,
-        'sum_std': 5,
-        'recent_5_unique_count': 5,
-        'max_consecutive_shape': 5,
-    }
-    
-    # 模型特征
-    sorted_indices = np.argsort(digit_probs)[::-1]
-    sorted_probs = digit_probs[sorted_indices]
-    
-    top1_prob = sorted_probs[0]
-    top3_mean_prob = np.mean(sorted_probs[:3])
-    gap_1_2 = sorted_probs[0] - sorted_probs[1] if len(sorted_probs) > 1 else 0
-    prob_std = np.std(digit_probs)
-    top3_concentration = np.sum(sorted_probs[:3]) / (np.sum(digit_probs) + 1e-10)
-    
-    # 序列特征
-    flat_history = history.flatten()
-    digit_counts = Counter(flat_history)
-    digit_freq_std = np.std(list(digit_counts.values()))
-    
-    # 形态统计
-    def get_shape(numbers):
-        sorted_nums = sorted(numbers)
-        if sorted_nums[0] == sorted_nums[1] == sorted_nums[2]:
-            return 'leopard'
-        elif sorted_nums[0] == sorted_nums[1] or sorted_nums[1] == sorted_nums[2]:
-            return 'group3'
-        else:
-            return 'group6'
-    
-    shape_counts = Counter()
-    for numbers in history:
-        shape = get_shape(numbers)
-        shape_counts[shape] += 1
-    
-    # 计算熵
-    total = sum(shape_counts.values())
-    shape_entropy = 0
-    if total > 0:
-        for count in shape_counts.values():
-            if count > 0:
-                p = count / total
-                shape_entropy -= p * np.log2(p)
-        max_entropy = np.log2(min(3, len(shape_counts)))
-        if max_entropy > 0:
-            shape_entropy /= max_entropy
-    
-    sum_values = [np.sum(numbers) for numbers in history]
-    sum_std = np.std(sum_values)
-    
-    recent_5 = history[-5:]
-    recent_5_unique_count = len(set(map(tuple, recent_5)))
-    
-    # 最大连续相同形态
-    shapes = [get_shape(numbers) for numbers in history]
-    max_consecutive_shape = 1
-    current_count = 1
-    for i in range(1, len(shapes)):
-        if shapes[i] == shapes[i-1]:
-            current_count += 1
-            max_consecutive_shape = max(max_consecutive_shape, current_count)
-        else:
-            current_count = 1
-    
-    # 计算评分
-    features = {
-        'top1_prob': min(1.0, top1_prob / 0.3),
-        'top3_mean_prob': min(1.0, top3_mean_prob / 0.3),
-        'gap_1_2': min(1.0, gap_1_2 / 0.1),
-        'prob_std': min(1.0, prob_std / 0.3),
-        'top3_concentration': min(1.0, top3_concentration),
-        'digit_freq_std': min(1.0, digit_freq_std / 5.0),
-        'shape_entropy': min(1.0, shape_entropy),
-        'sum_std': min(1.0, sum_std / 5.0),
-        'recent_5_unique_count': min(1.0, recent_5_unique_count / 5.0),
-        'max_consecutive_shape': min(1.0, max_consecutive_shape / 10.0),
-    }
-    
-    score = sum(features[k] * FEATURE_WEIGHTS[k] for k in features.keys())
-    return score
-
-
-def calculate_combination_probability(combo: tuple, digit_probs: np.ndarray) -> float:
-    """
-    计算组合的中奖概率
-    
-    Args:
-        combo: 组合元组,如 (1, 2, 3) 或 (1, 1, 2)
-        digit_probs: 10个数字的预测概率
-        
-    Returns:
-        该组合的理论中奖概率
-    """
-    # 判断是组六还是组三
-    unique_digits = set(combo)
-    
-    if len(unique_digits) == 3:
-        # 组六: 三个不同数字,任意排列都中奖 (6种排列)
-        # P = P(d1) * P(d2) * P(d3) * 6
-        prob = digit_probs[combo[0]] * digit_probs[combo[1]] * digit_probs[combo[2]] * 6
-    else:
-        # 组三: 两个相同 + 一个不同,任意排列都中奖 (3种排列)
-        # P = P(d1)^2 * P(d2) * 3
-        unique_list = list(unique_digits)
-        if combo[0] == combo[1]:
-            prob = digit_probs[combo[0]]**2 * digit_probs[combo[2]] * 3
-        else:
-            prob = digit_probs[combo[1]]**2 * digit_probs[combo[0]] * 3
-    
-    return float(prob)
-
-
-def generate_betting_plan(top_digits: list, digit_probs: np.ndarray, score: float, num_bets: int = 100) -> dict:
-    """
-    生成优化的投注计划 - 基于概率分配注数
-    
-    Args:
-        top_digits: Top10数字列表
-        digit_probs: 10个数字的预测概率数组
-        score: 机会评分
-        num_bets: 总投注注数
-        
-    Returns:
-        {
-            'num_bets': 100,
-            'total_cost': 200,
-            'combinations': [
-                {'combo': [0,1,2], 'probability': 0.025, 'bets': 5, 'type': 'group6', 'expected_return': 865},
-                ...
-            ],
-            'group6_count': 70,
-            'group3_count': 30,
-            'expected_roi': 405.0,
-            'total_probability': 0.85,  # 累计覆盖概率
-            'prize_breakdown': {...}
-        }
-    """
-    # 步骤1: 生成所有可能的组合并计算概率
-    candidates = []
-    
-    # 组六组合 (从Top10中选3个不同数字)
-    from itertools import combinations
-    for combo in combinations(top_digits, 3):
-        combo_sorted = tuple(sorted(combo))
-        prob = calculate_combination_probability(combo_sorted, digit_probs)
-        candidates.append({
-            'combo': list(combo_sorted),
-            'type': 'group6',
-            'probability': prob,
-            'prize': 173
-        })
-    
-    # 组三组合 (从Top10中选2个,其中1个重复)
-    for d1 in top_digits:
-        for d2 in top_digits:
-            if d1 != d2:
-                combo_sorted = tuple(sorted([d1, d1, d2]))
-                prob = calculate_combination_probability(combo_sorted, digit_probs)
-                candidates.append({
-                    'combo': list(combo_sorted),
-                    'type': 'group3',
-                    'probability': prob,
-                    'prize': 346
-                })
-    
-    # 步骤2: 按概率排序
-    candidates.sort(key=lambda x: x['probability'], reverse=True)
-    
-    # 步骤3: 优化分配注数
-    # 使用概率加权分配,高概率组合获得更多注数
-    
-    # 选择Top候选组合 (数量= num_bets的20%-30%, 更集中)
-    top_n = min(max(int(num_bets * 0.25), 15), len(candidates))
-    selected_candidates = candidates[:top_n]
-    
-    # 计算每个组合的权重 - 使用指数衰减
-    # 第1名权重最高,后面指数递减
-    weights = []
-    decay_rate = 0.85  # 衰减率,每个排名降低15%
-    for i in range(len(selected_candidates)):
-        weight = decay_rate ** i  # 指数衰减
-        weights.append(weight)
-    
-    # 归一化
-    weights = np.array(weights)
-    weights = weights / np.sum(weights)
-    
-    # 分配注数
-    allocated_bets = []
-    
-    # 先按权重计算每个组合的理论注数
-    theoretical_bets = []
-    for i, weight in enumerate(weights):
-        bets = max(1, round(num_bets * weight))  # 至少1注
-        theoretical_bets.append(bets)
-    
-    # 调整使总数等于num_bets
-    total_theoretical = sum(theoretical_bets)
-    if total_theoretical != num_bets:
-        # 按比例调整
-        adjustment_factor = num_bets / total_theoretical
-        theoretical_bets = [max(1, round(b * adjustment_factor)) for b in theoretical_bets]
-        
-        # 如果还有差异,从最后开始微调
-        diff = num_bets - sum(theoretical_bets)
-        idx = len(theoretical_bets) - 1
-        while diff != 0 and idx >= 0:
-            if diff > 0 and theoretical_bets[idx] < num_bets:
-                theoretical_bets[idx] += 1
-                diff -= 1
-            elif diff < 0 and theoretical_bets[idx] > 1:
-                theoretical_bets[idx] -= 1
-                diff += 1
-            idx -= 1
-    
-    # 创建最终分配列表
-    for i, candidate in enumerate(selected_candidates):
-        bets = theoretical_bets[i]
-        if bets > 0:
-            allocated_bets.append({
-                'combo': candidate['combo'],
-                'type': candidate['type'],
-                'probability': float(candidate['probability']),
-                'bets': int(bets),
-                'cost': int(bets * 2),
-                'prize': int(candidate['prize']),
-                'expected_return': float(bets * 2 * candidate['probability'] * candidate['prize'])
-            })
-    
-    # 步骤4: 统计信息
-    total_bets = sum(b['bets'] for b in allocated_bets)
-    total_cost = total_bets * 2
-    group6_count = sum(b['bets'] for b in allocated_bets if b['type'] == 'group6')
-    group3_count = sum(b['bets'] for b in allocated_bets if b['type'] == 'group3')
-    total_probability = sum(b['probability'] for b in allocated_bets)
-    total_expected_return = sum(b['expected_return'] for b in allocated_bets)
-    
-    # 预期ROI = (期望收益 - 成本) / 成本 * 100%
-    expected_roi = ((total_expected_return - total_cost) / total_cost * 100) if total_cost > 0 else 0
-    
+from django.urls import reverse
+
+from .models import LotteryPeriod, Prediction, BacktestResult, BacktestDetail, DataUpdateLog, Job
+from .search import build_search_filter
+from .prediction import aget_prediction, get_prediction_model, PredictionError
+from .scenarios import parse_scenarios, load_windows, predict_scenarios, save_predictions, finalize
+from .offload import run_blocking
+from .versioning import versioned, load_result_json
+from .draws import get_draws
+from .export import async_chunks, export_stream, ExportError
+from .pagination import paginate_by_cursor, cached_count, encode_cursor, InvalidCursor
+from .jobs import enqueue, cancel, clean_params, job_to_dict, JobError
+from .conditional import prediction_etag, prediction_last_modified
+from .responses import FastJsonResponse, dumps, wants_columnar
+from .events import EVENT_TYPES, event_bus, sse_replay, sse_stream
+from .charts import downsample, parse_points
+
+
+def _summary_context():
+    """首页/仪表板共用的统计数据（按数据版本缓存）"""
     return {
-        'num_bets': int(total_bets),
-        'total_cost': int(total_cost),
-        'combinations': allocated_bets,  # 每个组合包含概率和注数
-        'group6_count': int(group6_count),
-        'group3_count': int(group3_count),
-        'expected_roi': float(round(expected_roi, 2)),
-        'total_probability': float(round(total_probability, 4)),  # 累计覆盖概率
-        'total_expected_return': float(round(total_expected_return, 2)),
-        'prize_breakdown': {
-            'group6_prize': 173,
-            'group3_prize': 346,
-            'direct_prize': 1040
-        }
+        'total_periods': LotteryPeriod.objects.count(),
+        'latest_period': LotteryPeriod.objects.first(),
+        'latest_prediction': Prediction.objects.first(),
     }
 
 
 def index(request):
     """首页 - 仪表板"""
-    context = {
-        'total_periods': LotteryPeriod.objects.count(),
-        'latest_period': LotteryPeriod.objects.first(),
-        'latest_prediction': Prediction.objects.first(),
-    }
-    
-    # 获取最新回测结果
-    backtest_results = BacktestResult.objects.all()[:5]
-    context['backtest_results'] = backtest_results
-    
-    # 最近更新日志
-    update_logs = DataUpdateLog.objects.all()[:5]
-    context['update_logs'] = update_logs
+    def build():
+        context = _summary_context()
+        
+        # 获取最新回测结果
+        context['backtest_results'] = list(BacktestResult.objects.all()[:5])
+        
+        # 最近更新日志
+        context['update_logs'] = list(DataUpdateLog.objects.all()[:5])
+        return context
     
-    return render(request, 'lottery/index.html', context)
+    return render(request, 'lottery/index.html', versioned('index', build))
 
 
 def dashboard(request):
     """仪表板 - Tab视图"""
-    context = {}
-    
-    # 统计数据
-    context['total_periods'] = LotteryPeriod.objects.count()
-    context['latest_period'] = LotteryPeriod.objects.first()
-    
-    # 最新预测
-    latest_prediction = Prediction.objects.first()
-    context['latest_prediction'] = latest_prediction
-    
-    # 回测结果对比
-    backtest_results = BacktestResult.objects.all().order_by('-created_at')[:5]
-    context['backtest_results'] = backtest_results
-    
-    # 最佳策略
-    best_strategy = BacktestResult.objects.order_by('-roi_percentage').first()
-    context['best_strategy'] = best_strategy
-    
-    # 数据更新状态
-    latest_update = DataUpdateLog.objects.first()
-    context['latest_update'] = latest_update
+    def build():
+        # 统计数据、最新预测
+        context = _summary_context()
+        
+        # 回测结果对比
+        context['backtest_results'] = list(BacktestResult.objects.all().order_by('-created_at')[:5])
+        
+        # 最佳策略
+        context['best_strategy'] = BacktestResult.objects.order_by('-roi_percentage').first()
+        
+        # 数据更新状态
+        context['latest_update'] = DataUpdateLog.objects.first()
+        return context
     
-    return render(request, 'lottery/dashboard.html', context)
+    return render(request, 'lottery/dashboard.html', versioned('dashboard', build))
 
 
 def history_list(request):
     """历史开奖列表"""
     periods = LotteryPeriod.objects.all()
     
-    # 搜索
-    query = request.GET.get('q', '')
+    # 搜索（期号前缀/直选/组选/含数字/和值/形态，均走索引）
+    query = request.GET.get('q', '').strip()
     if query:
-        periods = periods.filter(
-            Q(period__icontains=query) | 
-            Q(numbers_str__icontains=query)
-        )
+        periods = periods.filter(build_search_filter(query))
     
     # 分页
     paginator = Paginator(periods, 50)
@@ -369,14 +104,10 @@ def period_detail(request, period):
     # 获取该期的预测（如果有）
     predictions = period_obj.predictions.all()
     
-    # 获取前30期历史（用于特征提取）
-    all_periods = list(LotteryPeriod.objects.all())
-    current_index = next((i for i, p in enumerate(all_periods) if p.period == period), None)
-    
-    history_30 = None
-    if current_index is not None and current_index + 30 < len(all_periods):
-        history_30 = all_periods[current_index+1:current_index+31]
-        history_30.reverse()  # 按时间正序
+    # 获取前30期历史（用于特征提取，按时间正序；取自进程内开奖历史）
+    history_30 = get_draws().window_before(period_obj.period, 30)
+    if history_30 is None or len(history_30) < 30:
+        history_30 = None
     
     context = {
         'period': period_obj,
@@ -388,22 +119,84 @@ def period_detail(request, period):
 
 
 def backtest_detail(request, pk):
-    """回测详情"""
-    backtest = get_object_or_404(BacktestResult, pk=pk)
+    """
+    回测详情
+    
+    资金曲线按 LTTB 降采样到 ?points= 个点（默认 settings.BACKTEST_CHART_POINTS）嵌入页面，
+    期次明细不再嵌入；放大区间时页面调用 api_backtest_series 取原始精度数据。
+    """
+    backtest = get_object_or_404(BacktestResult.objects.select_related('detail'), pk=pk)
     
-    # 解析period_results用于图表
-    period_results = backtest.period_results
+    # 明细单独压缩存储，仅详情页加载
     capital_history = backtest.capital_history
+    points = parse_points(request.GET.get('points'), settings.BACKTEST_CHART_POINTS,
+                          settings.BACKTEST_ZOOM_MAX_POINTS)
+    series = downsample(capital_history, points)
     
     context = {
         'backtest': backtest,
-        'period_results': json.dumps(period_results),
-        'capital_history': json.dumps(capital_history),
+        'capital_series': dumps(series).decode(),
+        'total_points': len(capital_history),
+        'shown_points': len(series['x']),
     }
     
     return render(request, 'lottery/backtest_detail.html', context)
 
 
+@require_http_methods(["GET"])
+def backtest_series(request, pk):
+    """
+    回测资金曲线区间数据API（详情页放大查看）
+    
+    路径: /api/backtests/<id>/series/
+    
+    参数:
+        - start / end: 资金曲线下标区间 [start, end)，默认整条曲线
+        - points: 降采样点数；不传时区间不超过 settings.BACKTEST_ZOOM_MAX_POINTS 个点则返回原始精度
+    
+    返回格式:
+    {
+        "status": "success",
+        "total": 2001, "start": 100, "end": 300,
+        "downsampled": false,
+        "x": [100, 101, ...],             // 资金曲线下标
+        "capital": [9940.0, ...],
+        "period_results": [...]           // 仅原始精度时返回；资金曲线第 i 点为第 i 期结束后的资金
+    }
+    """
+    detail = BacktestDetail.objects.filter(pk=pk).first()
+    if detail is None:
+        return JsonResponse({'status': 'error', 'message': f'回测不存在: {pk}'}, status=404)
+    data = detail.load()
+    capital_history = data['capital_history']
+    total = len(capital_history)
+    
+    try:
+        start = int(request.GET.get('start', 0))
+        end = int(request.GET.get('end', total))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'start/end 必须是整数'}, status=400)
+    if not 0 <= start < end <= total:
+        return JsonResponse({'status': 'error', 'message': f'区间无效，应满足 0 <= start < end <= {total}'}, status=400)
+    
+    limit = settings.BACKTEST_ZOOM_MAX_POINTS
+    points = parse_points(request.GET.get('points'), limit, limit)
+    window = capital_history[start:end]
+    response = {'status': 'success', 'total': total, 'start': start, 'end': end}
+    if len(window) <= points:
+        response.update({
+            'downsampled': False,
+            'x': list(range(start, end)),
+            'capital': window,
+            # 资金曲线第 0 点为起始资金，第 i 点对应第 i 期（period_results[i - 1]）
+            'period_results': data['period_results'][max(start - 1, 0):end - 1],
+        })
+    else:
+        series = downsample(window, points, offset=start)
+        response.update({'downsampled': True, 'x': series['x'], 'capital': series['y']})
+    return FastJsonResponse(response)
+
+
 def predictions_list(request):
     """预测列表"""
     predictions = Prediction.objects.all()
@@ -411,14 +204,17 @@ def predictions_list(request):
     # 筛选
     should_bet = request.GET.get('should_bet')
     if should_bet == 'true':
-        predictions = predictions.filter(should_bet=True)
+        predictions = predictions.filter(recommendation='bet')
     elif should_bet == 'false':
-        predictions = predictions.filter(should_bet=False)
+        predictions = predictions.filter(recommendation='no_bet')
     
-    # 分页
-    paginator = Paginator(predictions, 30)
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    # 游标分页
+    try:
+        page_obj = paginate_by_cursor(predictions, 30,
+                                      after=request.GET.get('after'), before=request.GET.get('before'))
+    except InvalidCursor:
+        page_obj = paginate_by_cursor(predictions, 30)
+    page_obj.count = cached_count(predictions, f'predictions:{should_bet or "all"}')
     
     context = {
         'page_obj': page_obj,
@@ -431,127 +227,24 @@ def predictions_list(request):
 @csrf_exempt
 @require_http_methods(["POST"])
 def crawl_latest_data(request):
-    """爬取最新数据API"""
-    try:
-        # 导入爬虫模块
-        import sys
-        from pathlib import Path
-        sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
-        from data_loader.crawler_simple import SimpleLottery3DCrawler
-        
-        # 创建爬虫并抓取前3页（约60条最新数据）
-        crawler = SimpleLottery3DCrawler(
-            output_dir=str(Path(__file__).parent.parent / 'data'),
-            max_workers=3
-        )
-        
-        # 抓取前3页
-        stats = crawler.crawl(start_page=1, end_page=3)
-        
-        if stats['total_records'] == 0:
-            return JsonResponse({
-                'status': 'error',
-                'message': '爬取数据失败，未获取到数据'
-            })
-        
-        # 读取最新生成的JSON文件
-        json_file = stats.get('json_file')
-        if not json_file or not Path(json_file).exists():
-            return JsonResponse({
-                'status': 'error',
-                'message': '未找到爬取的数据文件'
-            })
-        
-        import json as json_lib
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json_lib.load(f)
-        
-        data_list = data.get('data', [])
-        
-        # 导入到数据库
-        added_count = 0
-        updated_count = 0
-        
-        for item in data_list:
-            period_id = item['period']
-            date_str = item['date']
-            numbers = item['numbers']
-            
-            # 解析日期
-            try:
-                date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-            except:
-                date_obj = datetime.now().date()
-            
-            # 计算形态
-            counter = Counter(numbers)
-            if len(counter) == 1:
-                shape = '豹子'
-            elif len(counter) == 2:
-                shape = '组三'
-            else:
-                shape = '组六'
-            
-            # 保存或更新
-            obj, created = LotteryPeriod.objects.update_or_create(
-                period=period_id,
-                defaults={
-                    'date': date_obj,
-                    'digit1': numbers[0],
-                    'digit2': numbers[1],
-                    'digit3': numbers[2],
-                    'sum_value': sum(numbers),
-                    'shape': shape,
-                }
-            )
-            
-            if created:
-                added_count += 1
-            else:
-                updated_count += 1
-        
-        # 记录日志
-        DataUpdateLog.objects.create(
-            update_type='crawler',
-            periods_added=added_count,
-            periods_updated=updated_count,
-            status='success',
-            message=f'成功爬取{len(data_list)}条数据'
-        )
-        
-        return JsonResponse({
-            'status': 'success',
-            'message': f'成功导入数据！新增{added_count}期，更新{updated_count}期',
-            'added': added_count,
-            'updated': updated_count,
-            'total': len(data_list)
-        })
-        
-    except Exception as e:
-        # 记录错误日志
-        DataUpdateLog.objects.create(
-            update_type='crawler',
-            periods_added=0,
-            periods_updated=0,
-            status='failed',
-            message=str(e)
-        )
-        
-        import traceback
-        error_detail = traceback.format_exc()
-        
-        return JsonResponse({
-            'status': 'error',
-            'message': f'爬取失败: {str(e)}'
-        })
+    """爬取最新数据API（加入后台任务队列，通过 /api/jobs/<id>/ 查询进度）"""
+    # 抓取前3页（约60条最新数据）并批量入库
+    job = enqueue('crawl', start_page=1, end_page=3, update_type='crawler')
+    return _job_accepted(job, '爬取任务已提交')
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def generate_prediction(request):
+async def generate_prediction(request):
     """
     生成预测API - 返回完整的投注计划
     
+    异步视图：模型加载与推理在 inference 线程池执行，缓存命中只需一次异步查询。
+    ?layout=columnar 时 combinations 等大列表按列式编码返回 {"columns": [...], "rows": [[...], ...]}。
+    
+    请求体可选 deadline_ms（默认 settings.PREDICT_DEADLINE）：超时返回上一次结果（"stale": true）
+    或按近期频率生成的降级预测（"fallback": true，不建议投注），完整结果在后台继续计算。
+    
     返回格式:
     {
         "status": "success",
@@ -574,95 +267,89 @@ def generate_prediction(request):
     }
     """
     try:
-        # 导入必要模块
-        import sys
-        import torch
-        import numpy as np
-        from collections import Counter
-        sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
-        from models.lottery_model import LotteryModel
-        
         # 从请求中获取投注注数（默认100注）
         try:
             body = json.loads(request.body) if request.body else {}
             num_bets = int(body.get('num_bets', 100))
         except:
+            body = {}
             num_bets = 100
         
-        # 加载模型
-        model_path = Path(__file__).parent.parent / 'models' / 'checkpoints' / 'best_model.pth'
-        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        model = LotteryModel.load(str(model_path), device=device)
-        
-        # 获取最近30期数据
-        recent_periods = list(LotteryPeriod.objects.order_by('-period')[:30])
-        if len(recent_periods) < 30:
-            return JsonResponse({
-                'status': 'error',
-                'message': '历史数据不足30期，无法生成预测'
-            })
-        
-        recent_periods.reverse()  # 按时间正序
-        
-        # 准备输入序列
-        sequences = np.array([[p.digit1, p.digit2, p.digit3] for p in recent_periods])
-        
-        # 模型预测
-        with torch.no_grad():
-            input_seq = torch.LongTensor(sequences).unsqueeze(0).to(device)
-            predictions = model.predict(input_seq)
-            digit_probs = predictions['digit_probs'][0]
-            attention_weights = predictions['attention_weights'][0]
-        
-        # 获取Top10数字（用于生成投注组合）
-        top_indices = np.argsort(digit_probs)[::-1][:10]
-        top10_digits = top_indices.tolist()
+        # 延迟目标（毫秒），默认 settings.PREDICT_DEADLINE
+        try:
+            deadline = float(body['deadline_ms']) / 1000 if body.get('deadline_ms') else None
+        except (TypeError, ValueError):
+            deadline = None
         
-        # 计算机会评分（使用完整的评分系统）
-        score = calculate_opportunity_score(digit_probs, sequences)
-        threshold = 58.45  # Top1%阈值
-        should_bet = score >= threshold
+        # 在新数据入库或模型更新前直接返回缓存结果
+        return FastJsonResponse(await aget_prediction(num_bets, deadline=deadline),
+                                columnar=wants_columnar(request))
         
-        # 确定下一期号
-        latest_period = recent_periods[-1]
-        from datetime import datetime, timedelta
+    except PredictionError as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        })
+    
+    except Exception as e:
+        import traceback
+        return JsonResponse({
+            'status': 'error',
+            'message': f'预测失败: {str(e)}',
+            'traceback': traceback.format_exc()
+        })
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def batch_prediction(request):
+    """
+    批量情景预测API - 多个截至期号 × 多个投注注数，一次推理返回全部投注计划
+    
+    请求格式:
+    {
+        "scenarios": [{"as_of": "2026-02-01", "num_bets": 50}, {"num_bets": 100}],
+        "persist": false   // 是否保存为 Prediction（默认否）
+    }
+    或按笛卡尔积展开:
+    {"as_of": ["2026-02-01", null], "num_bets": [20, 50, 100, 200]}
+    ?layout=columnar 时大列表按列式编码返回（同 /api/predict/）
+    
+    返回格式:
+    {
+        "status": "success",
+        "results": [
+            {"as_of": "2026-02-01", "num_bets": 50, "status": "success",
+             "prediction": {...}, "actual_numbers": [1, 2, 3]},
+            ...
+        ],
+        "saved": 0
+    }
+    """
+    try:
         try:
-            current_date = datetime.strptime(latest_period.period, '%Y-%m-%d')
-            next_date = current_date + timedelta(days=1)
-            next_period = next_date.strftime('%Y-%m-%d')
-        except:
-            next_period = f"预测-{latest_period.date}"
+            body = json.loads(request.body) if request.body else {}
+        except json.JSONDecodeError:
+            return JsonResponse({'status': 'error', 'message': '请求体不是有效的JSON'}, status=400)
         
-        # 生成投注计划 (传入digit_probs用于概率计算)
-        betting_plan = generate_betting_plan(top10_digits, digit_probs, score, num_bets)
+        scenarios = parse_scenarios(body)
+        persist = bool(body.get('persist', False))
         
-        # 保存预测到数据库
-        prediction = Prediction.objects.create(
-            period=latest_period,
-            predicted_for_period=next_period,
-            top5_digits=top10_digits[:5],
-            digit_probs=digit_probs.tolist(),
-            confidence_score=score / 100.0,  # 转换为0-1范围
-            attention_weights=attention_weights.tolist(),
-            should_bet=bool(should_bet),  # 转换为Python bool
-            bet_amount=betting_plan['total_cost'] if should_bet else 0
-        )
+        # 窗口查询走数据库，批量推理和投注计划在 inference 线程池执行
+        model_entry = await run_blocking('inference', get_prediction_model)
+        windows = await sync_to_async(load_windows)(list(dict.fromkeys(s['as_of'] for s in scenarios)))
+        results = await run_blocking('inference', predict_scenarios, model_entry, windows, scenarios)
+        saved = await sync_to_async(save_predictions)(results) if persist else 0
         
-        return JsonResponse({
+        return FastJsonResponse({
             'status': 'success',
-            'message': f'成功生成{next_period}期预测',
-            'prediction': {
-                'period': next_period,
-                'score': float(round(score, 2)),  # 确保是 Python float
-                'threshold': float(threshold),
-                'should_bet': bool(should_bet),  # 转换为Python bool
-                'top10_digits': top10_digits,
-                'top5_digits': top10_digits[:5],  # 兼容旧版
-                'betting_plan': betting_plan,
-                'recommendation': '建议投注' if should_bet else '继续观望'
-            }
-        })
+            'results': finalize(results),
+            'saved': saved,
+        }, columnar=wants_columnar(request))
         
+    except PredictionError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    
     except Exception as e:
         import traceback
         return JsonResponse({
@@ -673,26 +360,22 @@ def generate_prediction(request):
 
 
 def feature_extraction_view(request, period):
-    """特征提取视图"""
-    period_obj = get_object_or_404(LotteryPeriod, period=period)
-    
-    # 获取前30期作为输入特征
-    all_periods = list(LotteryPeriod.objects.all())
-    current_index = next((i for i, p in enumerate(all_periods) if p.period == period), None)
-    
-    if current_index is None or current_index + 30 >= len(all_periods):
+    """特征提取视图（数据取自进程内开奖历史，不查询期次表）"""
+    draws = get_draws()
+    history_30 = draws.window_before(period, 30)
+    if history_30 is None:
+        raise Http404(f'期号不存在: {period}')
+    period_obj = draws.draw(draws.index[period])
+    
+    if len(history_30) < 30:
         context = {
             'period': period_obj,
             'error': '历史数据不足30期'
         }
         return render(request, 'lottery/feature_extraction.html', context)
     
-    # 获取输入序列（前30期）
-    history_30 = all_periods[current_index+1:current_index+31]
-    history_30.reverse()
-    
     # 提取特征
-    sequences = [[p.digit1, p.digit2, p.digit3] for p in history_30]
+    sequences = history_30.digits.tolist()
     
     # 统计分析
     all_digits = [d for seq in sequences for d in seq]
@@ -731,7 +414,7 @@ def feature_extraction_view(request, period):
             'avg': sum(sum_values) / len(sum_values)
         },
         'shape_freq': shape_freq_with_pct,
-        'sequences_json': json.dumps(sequences),
+        'sequences_json': dumps(sequences).decode(),
     }
     
     return render(request, 'lottery/feature_extraction.html', context)
@@ -739,47 +422,17 @@ def feature_extraction_view(request, period):
 
 def investment_strategy_view(request):
     """投资策略分析视图"""
-    # 读取分析结果
+    # 读取分析结果（文件未变化时使用缓存）
     results_dir = Path(__file__).parent.parent / 'results'
     
-    # 读取当前机会评估
-    current_opportunity = None
-    opportunity_file = results_dir / 'current_opportunity.json'
-    if opportunity_file.exists():
-        try:
-            with open(opportunity_file, 'r', encoding='utf-8') as f:
-                current_opportunity = json.load(f)
-        except json.JSONDecodeError as e:
-            print(f"警告: current_opportunity.json 解析失败: {e}")
-            current_opportunity = None
-    
-    # 读取策略对比结果（如果存在）
-    strategy_comparison = None
-    comparison_file = results_dir / 'strategy_comparison.json'
-    if comparison_file.exists():
-        try:
-            with open(comparison_file, 'r', encoding='utf-8') as f:
-                strategy_comparison = json.load(f)
-        except json.JSONDecodeError as e:
-            print(f"警告: strategy_comparison.json 解析失败: {e}")
-            strategy_comparison = None
-    
-    # 读取golden opportunities（如果存在）
-    golden_opportunities = None
-    golden_file = results_dir / 'golden_opportunities.json'
-    if golden_file.exists():
-        try:
-            with open(golden_file, 'r', encoding='utf-8') as f:
-                golden_opportunities = json.load(f)
-        except json.JSONDecodeError as e:
-            print(f"警告: golden_opportunities.json 解析失败: {e}")
-            golden_opportunities = None
-    
     context = {
-        'current_opportunity': current_opportunity,
-        'strategy_comparison': strategy_comparison,
-        'golden_opportunities': golden_opportunities,
-        'total_periods': LotteryPeriod.objects.count(),
+        # 当前机会评估
+        'current_opportunity': load_result_json(results_dir / 'current_opportunity.json'),
+        # 策略对比结果（如果存在）
+        'strategy_comparison': load_result_json(results_dir / 'strategy_comparison.json'),
+        # golden opportunities（如果存在）
+        'golden_opportunities': load_result_json(results_dir / 'golden_opportunities.json'),
+        'total_periods': versioned('total_periods', LotteryPeriod.objects.count),
     }
     
     return render(request, 'lottery/investment_strategy.html', context)
@@ -815,42 +468,125 @@ def betting_recommendation_view(request):
 @csrf_exempt
 @require_http_methods(["POST"])
 def run_task_now(request):
-    """立即运行指定任务的API"""
+    """立即运行指定任务的API（加入后台任务队列）"""
     try:
         data = json.loads(request.body)
-        task_id = data.get('task_id')
-        
-        if not task_id:
-            return JsonResponse({
-                'status': 'error',
-                'message': '缺少task_id参数'
-            })
-        
-        from lottery.scheduler import run_job_now
-        success = run_job_now(task_id)
-        
-        if success:
-            return JsonResponse({
-                'status': 'success',
-                'message': f'任务 {task_id} 已执行'
-            })
-        else:
-            return JsonResponse({
-                'status': 'error',
-                'message': f'任务 {task_id} 不存在或执行失败'
-            })
+    except json.JSONDecodeError:
+        return JsonResponse({'status': 'error', 'message': '请求体不是有效的JSON'}, status=400)
     
-    except Exception as e:
+    task_id = data.get('task_id')
+    if not task_id:
         return JsonResponse({
             'status': 'error',
-            'message': f'执行失败: {str(e)}'
+            'message': '缺少task_id参数'
         })
+    
+    from lottery.scheduler import TASKS
+    if task_id not in TASKS:
+        return JsonResponse({
+            'status': 'error',
+            'message': f'任务 {task_id} 不存在'
+        })
+    
+    job = enqueue('scheduler_task', task_id=task_id)
+    return _job_accepted(job, f'任务 {task_id} 已提交')
+
+
+# ==================== 后台任务 API ====================
+
+def _job_accepted(job, message):
+    """任务已入队的响应（202）"""
+    return JsonResponse({
+        'status': 'queued',
+        'message': message,
+        'job_id': job.pk,
+        'status_url': reverse('lottery:api_job_status', args=[job.pk]),
+    }, status=202)
+
+
+def staff_required(view):
+    """仅管理员（已登录的 is_staff 用户）可调用，其余返回 403"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not (request.user.is_authenticated and request.user.is_staff):
+            return JsonResponse({'status': 'error', 'message': '需要管理员登录'}, status=403)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@staff_required
+@require_http_methods(["POST"])
+def create_job(request):
+    """
+    提交后台任务（需管理员登录，并携带 CSRF 令牌）
+    
+    请求体: {"kind": "import_backtest", "params": {"result_file": "results/xxx.json"}}
+    任务类型及可用参数:
+        - crawl: start_page, end_page（不超过 settings.JOB_CRAWL_MAX_PAGES）
+        - scheduler_task: task_id
+        - import_backtest: result_file（限 results/ 目录下的 JSON）, strategy_name
+    """
+    try:
+        data = json.loads(request.body or b'{}')
+        params = data.get('params') or {}
+        if not isinstance(params, dict):
+            raise JobError('params 必须是对象')
+        kind = data.get('kind', '')
+        job = enqueue(kind, **clean_params(kind, params))
+    except (json.JSONDecodeError, JobError) as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return _job_accepted(job, f'任务 {job.kind} 已提交')
+
+
+@require_http_methods(["GET"])
+def job_status(request, job_id):
+    """查询后台任务状态与进度"""
+    job = Job.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({'status': 'error', 'message': f'任务不存在: {job_id}'}, status=404)
+    return JsonResponse({'status': 'success', 'job': job_to_dict(job)})
+
+
+@staff_required
+@require_http_methods(["POST"])
+def cancel_job(request, job_id):
+    """取消后台任务（需管理员登录，并携带 CSRF 令牌）"""
+    try:
+        job = cancel(job_id)
+    except JobError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=404)
+    return JsonResponse({'status': 'success', 'job': job_to_dict(job)})
 
 
 # ==================== 投注建议 API ====================
 
+def _latest_recommendation_data():
+    """最新预测的投注建议数据"""
+    latest_pred = Prediction.objects.select_related('period').order_by('-created_at', '-id').first()
+    if not latest_pred:
+        return None
+    
+    return {
+        'id': latest_pred.id,
+        'date': latest_pred.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'current_period': latest_pred.period.period,
+        'next_period': latest_pred.predicted_for_period,
+        'recommendation': latest_pred.recommendation,
+        'confidence_score': float(latest_pred.confidence_score),
+        'percentile_rank': float(latest_pred.percentile_rank) if latest_pred.percentile_rank else None,
+        'strategy': latest_pred.strategy,
+        'top5_digits': latest_pred.top5_digits,
+        'top5_probs': [float(latest_pred.digit_probs[d]) for d in latest_pred.top5_digits] if latest_pred.digit_probs else None,
+        'betting_combinations': latest_pred.betting_combinations,
+        'total_cost': latest_pred.total_cost,
+        'bet_count': latest_pred.bet_count,
+        'reason': latest_pred.recommendation_reason,
+    }
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
+@condition(etag_func=prediction_etag, last_modified_func=prediction_last_modified)
 def get_latest_recommendation(request):
     """
     获取最新投注建议API
@@ -876,33 +612,15 @@ def get_latest_recommendation(request):
     }
     """
     try:
-        # 获取最新的预测
-        latest_pred = Prediction.objects.order_by('-created_at').first()
+        # 新开奖入库时已预计算下一期预测，这里只读取结果（按数据版本缓存）
+        recommendation_data = versioned('latest_recommendation', _latest_recommendation_data)
         
-        if not latest_pred:
+        if recommendation_data is None:
             return JsonResponse({
                 'status': 'error',
                 'message': '暂无预测数据，请先生成预测'
             })
         
-        # 构建返回数据
-        recommendation_data = {
-            'id': latest_pred.id,
-            'date': latest_pred.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            'current_period': latest_pred.period.period,
-            'next_period': latest_pred.predicted_for_period,
-            'recommendation': latest_pred.recommendation,
-            'confidence_score': float(latest_pred.confidence_score),
-            'percentile_rank': float(latest_pred.percentile_rank) if latest_pred.percentile_rank else None,
-            'strategy': latest_pred.strategy,
-            'top5_digits': latest_pred.top5_digits,
-            'top5_probs': [float(latest_pred.digit_probs[d]) for d in latest_pred.top5_digits] if latest_pred.digit_probs else None,
-            'betting_combinations': latest_pred.betting_combinations,
-            'total_cost': latest_pred.total_cost,
-            'bet_count': latest_pred.bet_count,
-            'reason': latest_pred.recommendation_reason,
-        }
-        
         return JsonResponse({
             'status': 'success',
             'recommendation': recommendation_data
@@ -919,48 +637,70 @@ def get_latest_recommendation(request):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@condition(etag_func=prediction_etag, last_modified_func=prediction_last_modified)
 def get_recommendation_history(request):
     """
     获取历史投注建议列表API
     
     参数:
-        - page: 页码（默认1）
-        - page_size: 每页数量（默认10）
+        - cursor: 上一次返回的 next_cursor（不传为第一页）
+        - page_size: 每页数量（默认10，最大100）
         - recommendation: 筛选 'bet' | 'no_bet' | 'all'（默认all）
+        - include_total: 是否返回总数（默认true，按数据版本缓存）
+        - page: 旧版页码参数，仍可使用（OFFSET分页，深页较慢）
     
     返回格式:
     {
         "status": "success",
         "data": {
             "total": 100,
-            "page": 1,
             "page_size": 10,
-            "total_pages": 10,
+            "next_cursor": "WyIyMDI2LTAy...",  // 没有更多数据时为null
+            "has_next": true,
             "recommendations": [...]
         }
     }
     """
     try:
         # 获取参数
-        page = int(request.GET.get('page', 1))
-        page_size = int(request.GET.get('page_size', 10))
+        page_size = min(max(int(request.GET.get('page_size', 10)), 1), 100)
         recommendation_filter = request.GET.get('recommendation', 'all')
+        include_total = request.GET.get('include_total', 'true') != 'false'
         
-        # 查询
-        predictions = Prediction.objects.all().order_by('-created_at')
+        # 查询（只取列表需要的字段）
+        predictions = Prediction.objects.only(
+            'id', 'created_at', 'predicted_for_period', 'recommendation', 'confidence_score',
+            'percentile_rank', 'strategy', 'top5_digits', 'total_cost', 'bet_count',
+        )
         
         # 筛选
         if recommendation_filter in ['bet', 'no_bet']:
             predictions = predictions.filter(recommendation=recommendation_filter)
+        else:
+            recommendation_filter = 'all'
+        
+        data = {'page_size': page_size}
         
         # 总数
-        total = predictions.count()
-        total_pages = (total + page_size - 1) // page_size
+        if include_total:
+            data['total'] = cached_count(predictions, f'recommendations:{recommendation_filter}')
         
         # 分页
-        start = (page - 1) * page_size
-        end = start + page_size
-        page_predictions = predictions[start:end]
+        if 'page' in request.GET and 'cursor' not in request.GET:
+            page = int(request.GET['page'])
+            start = (page - 1) * page_size
+            page_predictions = list(predictions.order_by('-created_at', '-id')[start:start + page_size + 1])
+            next_cursor = encode_cursor(page_predictions[page_size - 1]) if len(page_predictions) > page_size else None
+            page_predictions = page_predictions[:page_size]
+            data['page'] = page
+            if include_total:
+                data['total_pages'] = (data['total'] + page_size - 1) // page_size
+        else:
+            page_obj = paginate_by_cursor(predictions, page_size, after=request.GET.get('cursor'))
+            page_predictions = page_obj.object_list
+            next_cursor = page_obj.next_cursor
+        data['next_cursor'] = next_cursor
+        data['has_next'] = next_cursor is not None
         
         # 构建返回数据
         recommendations_list = []
@@ -978,17 +718,14 @@ def get_recommendation_history(request):
                 'bet_count': pred.bet_count,
             })
         
+        data['recommendations'] = recommendations_list
         return JsonResponse({
             'status': 'success',
-            'data': {
-                'total': total,
-                'page': page,
-                'page_size': page_size,
-                'total_pages': total_pages,
-                'recommendations': recommendations_list
-            }
+            'data': data
         })
         
+    except InvalidCursor as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
     except Exception as e:
         import traceback
         return JsonResponse({
@@ -996,3 +733,70 @@ def get_recommendation_history(request):
             'message': f'获取历史建议失败: {str(e)}',
             'traceback': traceback.format_exc()
         })
+
+
+@require_http_methods(["GET"])
+def export_data(request, dataset):
+    """
+    流式批量导出API
+    
+    路径: /api/export/<history|predictions|backtests>/
+    
+    参数:
+        - format: 'ndjson'（默认）| 'csv'
+        - since: 只导出该期号之后的数据（增量拉取）
+        - backtest: 回测ID（仅 backtests，默认全部回测）
+    """
+    fmt = request.GET.get('format', 'ndjson')
+    since = request.GET.get('since') or None
+    filters = {}
+    
+    try:
+        if dataset == 'backtests' and request.GET.get('backtest'):
+            filters['backtest_id'] = int(request.GET['backtest'])
+        stream = export_stream(dataset, fmt, since=since, **filters)
+    except (ExportError, ValueError) as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    
+    if isinstance(request, ASGIRequest):
+        # 同步迭代器在 ASGI 下会被整体读入内存后才发送
+        stream = async_chunks(stream)
+    content_type = 'text/csv; charset=utf-8' if fmt == 'csv' else 'application/x-ndjson; charset=utf-8'
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{fmt}"'
+    return response
+
+
+@require_http_methods(["GET"])
+async def event_stream(request):
+    """
+    服务器推送事件流（Server-Sent Events）
+    
+    路径: /api/events/
+    
+    参数:
+        - events: 逗号分隔的事件类型，默认全部（draw_ingested,prediction_ready,job_progress）
+    
+    浏览器使用 EventSource 订阅，断线后自动重连并带上 Last-Event-ID，服务端补发错过的事件。
+    需要通过 ASGI（uvicorn）部署才能保持长连接；WSGI 下只返回错过的事件，由客户端按 retry 间隔重连。
+    """
+    types = [t for t in request.GET.get('events', '').split(',') if t]
+    unknown = [t for t in types if t not in EVENT_TYPES]
+    if unknown:
+        return JsonResponse({'status': 'error', 'message': f"未知事件类型: {', '.join(unknown)}"}, status=400)
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    if isinstance(request, ASGIRequest):
+        content = sse_stream(await event_bus.subscribe(types, last_event_id))
+    else:
+        content = await sync_to_async(sse_replay)(last_event_id, set(types) or None)
+    response = StreamingHttpResponse(content, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # 关闭 nginx 的响应缓冲，事件立即送达
+    response['X-Accel-Buffering'] = 'no'
+    return response
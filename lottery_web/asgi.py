@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
 
 application = get_asgi_application()
+
+# 预先把开奖历史加载到进程内存（lottery.draws）
+from lottery.draws import warm_up  # noqa: E402
+
+warm_up()
@@ -42,7 +42,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'lottery.profiling.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'lottery.responses.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -79,7 +81,28 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': 600,  # 持久连接，避免每个请求重新打开数据库并重设PRAGMA
+        'CONN_HEALTH_CHECKS': True,
+    },
+    # 只读分析连接：分析工具的大范围扫描使用 .using('analytics')，不与Web写入争用
+    'analytics': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{BASE_DIR / 'db.sqlite3'}?mode=ro",
+        'OPTIONS': {'uri': True},
+        'CONN_MAX_AGE': 600,
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+# SQLite 性能配置（每个新连接执行，见 lottery/db.py）
+# WAL 允许读写并发；设为 None 或 {} 则使用 SQLite 默认设置
+SQLITE_PROFILE = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',    # WAL 模式下 NORMAL 已足够安全
+    'busy_timeout': 5000,       # 遇到锁时最多等待 5 秒，而不是立即报 database is locked
+    'cache_size': -64000,       # 页缓存约 64MB（负数单位为 KiB）
+    'mmap_size': 268435456,     # 256MB 内存映射读取
+    'temp_store': 'MEMORY',
 }
 
 
@@ -136,3 +159,97 @@ APSCHEDULER_RUN_NOW_TIMEOUT = 25  # 超时时间（秒）
 # 调度器配置
 SCHEDULER_DEFAULT = True  # 启用默认调度器
 SCHEDULER_AUTOSTART = True  # 应用启动时自动启动调度器
+
+# 爬虫数据源配置（按优先级排列）
+# 首选源在 p95 延迟内未返回时，向下一个源发送对冲请求，取最先解析成功的结果
+CRAWLER_SOURCES = [
+    {'name': 'zhcw_jsp', 'url': 'http://kaijiang.zhcw.com/zhcw/inc/3d/3d_wqhg.jsp?pageNum={page}'},
+    {'name': 'zhcw_html', 'url': 'https://kaijiang.zhcw.com/zhcw/html/3d/list_{page}.html'},
+]
+CRAWLER_HEDGE = {
+    'initial_delay': 1.0,  # 延迟样本不足时的对冲等待时间（秒）
+    'min_delay': 0.2,
+    'max_delay': 5.0,
+    'percentile': 95,
+}
+
+# 开奖数据批量入库每批写入行数（bulk_create/bulk_update 的 batch_size）
+INGEST_CHUNK_SIZE = 500
+
+# 预测模型配置
+MODEL_CHECKPOINT_PATH = BASE_DIR / 'models' / 'checkpoints' / 'best_model.pth'
+MODEL_TORCH_THREADS = 2  # 每个Web进程的torch CPU线程数
+
+# 异步视图的阻塞任务线程池大小（模型推理 / 进程内执行后台任务）
+OFFLOAD_POOLS = {
+    'inference': 2,
+    'jobs': 1,
+}
+
+# 后台任务队列（python manage.py run_jobs 工作进程执行）
+JOB_POLL_INTERVAL = 2.0      # 队列为空时的轮询间隔（秒）
+JOB_STALE_TIMEOUT = 1800     # 运行中任务超过该时间无心跳视为失败（秒）
+JOBS_INPROCESS_WORKER = False  # True 时 Web 进程自行执行任务（未启动 run_jobs 的开发环境）
+JOB_CRAWL_MAX_PAGES = 50     # /api/jobs/ 提交爬取任务的最大页数
+JOB_RESULTS_DIR = BASE_DIR / 'results'  # /api/jobs/ 导入回测结果只能读取该目录
+
+# 预测结果缓存有效期（秒）；缓存键包含最新期号和模型哈希，数据更新后自动失效
+PREDICTION_CACHE_TIMEOUT = 24 * 3600
+
+# /api/predict/ 延迟目标（秒）：超时返回同一最新期的上一次结果（stale）或降级预测（fallback），
+# 完整计算在后台继续并写入缓存；None 表示一直等待
+PREDICT_DEADLINE = 2.0
+PREDICTION_LAST_GOOD_TIMEOUT = 7 * 24 * 3600
+
+# 新开奖入库后预计算下一期预测；PRECOMPUTE_IN_BACKGROUND=False 时在入库调用中同步执行
+PRECOMPUTE_ON_INGEST = True
+PRECOMPUTE_IN_BACKGROUND = True
+
+# 预测记录保留期（天）：更早的记录每个 (期号, 模型) 只保留最新一条，其余归档后删除（compact_predictions）
+PREDICTION_RETENTION_DAYS = 30
+PREDICTION_ARCHIVE_DIR = BASE_DIR / 'data' / 'archive' / 'predictions'
+
+# 批量情景预测单次请求的最大情景数
+PREDICT_BATCH_MAX_SCENARIOS = 50
+
+# 响应压缩阈值（字节）：超过该大小的响应按 Accept-Encoding 使用 brotli（已安装时）或 gzip
+RESPONSE_COMPRESS_MIN_BYTES = 1024
+# ?layout=columnar 时，达到该行数的字典列表按列式编码
+JSON_COLUMNAR_MIN_ROWS = 20
+
+# 服务器推送事件（/api/events/，需 ASGI 部署）
+SSE_HEARTBEAT = 15       # 无事件时的心跳间隔（秒）
+SSE_RETRY_MS = 3000      # 客户端断线重连间隔（毫秒）
+SSE_QUEUE_SIZE = 100     # 每个连接最多积压的事件数，超出丢弃最旧的
+SSE_REPLAY = 200         # 重连时按 Last-Event-ID 最多补发的事件数
+SSE_POLL_INTERVAL = 1    # 轮询事件表的间隔（秒），其它进程（run_jobs、scheduler）发布的事件最迟这么久后送达
+SSE_EVENT_KEEP = 1000    # 事件表保留的最近事件数
+
+# 请求剖析：SQL 条数/耗时、Python 耗时写入 Server-Timing 响应头并记录到 lottery.profiling 日志
+REQUEST_PROFILING = True
+PROFILE_TRACEMALLOC = False  # 统计内存分配峰值（开销较大，排查时开启）
+# 各视图的 SQL 条数预算（URL 名称 -> 最大条数），超出时记录警告；QUERY_BUDGET_RAISE=True 时抛出异常
+QUERY_BUDGETS = {
+    'lottery:index': 8,
+    'lottery:dashboard': 9,
+    'lottery:history_list': 4,
+    'lottery:period_detail': 4,
+    'lottery:predictions_list': 4,
+    'lottery:backtest_detail': 2,
+    'lottery:api_backtest_series': 1,
+    'lottery:api_latest_recommendation': 5,
+    'lottery:api_recommendation_history': 6,
+}
+QUERY_BUDGET_RAISE = False
+
+# 仪表板缓存有效期（秒）；缓存键包含全局数据版本号，入库/预测/回测导入后自动失效
+DASHBOARD_CACHE_TIMEOUT = 3600
+
+# 回测详情页资金曲线降采样点数（LTTB，?points= 可覆盖）；
+# 区间接口不超过 BACKTEST_ZOOM_MAX_POINTS 个点时返回原始精度，超过时降采样到该点数
+BACKTEST_CHART_POINTS = 500
+BACKTEST_ZOOM_MAX_POINTS = 5000
+
+# 批量导出：每批读取行数，使用只读 analytics 连接
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_DATABASE = 'analytics'
@@ -28,6 +28,10 @@ echo "  python src/cli.py info            # 查看系统信息"
 echo "  python src/cli.py crawl --pages 10    # 抓取数据（测试）"
 echo "  python src/cli.py extract --numbers 1,2,3  # 提取特征"
 echo ""
+echo "  启动Web服务（同时启动后台任务工作进程，执行网页上的爬取/手动运行任务）:"
+echo "  ./start_web.sh"
+echo "  或分别运行: python manage.py runserver 与 python manage.py run_jobs"
+echo ""
 echo "详细文档请参阅:"
 echo "  - README.md"
 echo "  - docs/user_guide/quick_start.md"
@@ -12,6 +12,8 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
 
+from .sources import ListingSource, HedgedFetcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,13 +22,20 @@ class SimpleLottery3DCrawler:
     
     BASE_URL = "http://kaijiang.zhcw.com/zhcw/inc/3d/3d_wqhg.jsp?pageNum={page}"
     
-    def __init__(self, output_dir: str = "./data", max_workers: int = 5):
+    # 单页重试间隔（秒）
+    RETRY_DELAY = 2
+    
+    def __init__(self, output_dir: str = "./data", max_workers: int = 5,
+                 sources: Optional[List[Dict]] = None, hedge_options: Optional[Dict] = None):
         """
         初始化爬虫
         
         Args:
             output_dir: 数据输出目录
             max_workers: 最大并发线程数
+            sources: 数据源配置列表（按优先级），如 [{'name': 'zhcw', 'url': '...{page}'}]；
+                     为空时只使用 BASE_URL
+            hedge_options: 传给 HedgedFetcher 的对冲参数
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -38,6 +47,20 @@ class SimpleLottery3DCrawler:
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
         })
         
+        self.fetcher = None
+        if sources:
+            listing_sources = [
+                ListingSource(
+                    name=source['name'],
+                    url_template=source['url'],
+                    parser=self._parse_html_simple,
+                    timeout=source.get('timeout', 15),
+                    encoding=source.get('encoding', 'utf-8'),
+                )
+                for source in sources
+            ]
+            self.fetcher = HedgedFetcher(listing_sources, session=self.session, **(hedge_options or {}))
+        
     def _parse_html_simple(self, html: str) -> List[Dict]:
         """
         使用正则表达式解析HTML
@@ -111,6 +134,9 @@ class SimpleLottery3DCrawler:
         Returns:
             该页所有期号的数据列表
         """
+        if self.fetcher is not None:
+            return self._fetch_page_hedged(page_num, retry)
+        
         url = self.BASE_URL.format(page=page_num)
         
         for attempt in range(retry):
@@ -132,13 +158,26 @@ class SimpleLottery3DCrawler:
             except requests.RequestException as e:
                 logger.warning(f"Page {page_num}: Attempt {attempt + 1} failed - {e}")
                 if attempt < retry - 1:
-                    time.sleep(2)
+                    time.sleep(self.RETRY_DELAY)
                 else:
                     logger.error(f"Page {page_num}: All attempts failed")
                     return None
         
         return None
     
+    def _fetch_page_hedged(self, page_num: int, retry: int) -> Optional[List[Dict]]:
+        """通过多数据源抓取单页，所有数据源都失败时按同样的间隔整体重试"""
+        for attempt in range(retry):
+            records = self.fetcher.fetch(page_num)
+            if records:
+                return records
+            logger.warning(f"Page {page_num}: Attempt {attempt + 1} failed on all sources")
+            if attempt < retry - 1:
+                time.sleep(self.RETRY_DELAY)
+        
+        logger.error(f"Page {page_num}: All attempts failed")
+        return None
+    
     def crawl(self, start_page: int = 1, end_page: int = 100, 
               save_interval: int = 20) -> Dict:
         """
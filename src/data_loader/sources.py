@@ -0,0 +1,187 @@
+"""
+开奖列表数据源适配器与对冲请求
+
+同一份开奖列表可以从多个镜像/备用页面获取。HedgedFetcher 先请求首选源，
+若其在 p95 延迟内仍未返回有效数据，则向下一个源发送对冲请求，
+取最先解析成功的结果。
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class ListingSource:
+    """开奖列表数据源（镜像或备用列表页）"""
+
+    def __init__(self, name: str, url_template: str,
+                 parser: Callable[[str], List[Dict]], timeout: float = 15,
+                 encoding: str = 'utf-8'):
+        """
+        初始化数据源
+
+        Args:
+            name: 数据源名称
+            url_template: 页面URL模板，包含 {page} 占位符
+            parser: HTML解析函数，返回数据记录列表
+            timeout: 单次请求超时（秒）
+            encoding: 页面编码
+        """
+        self.name = name
+        self.url_template = url_template
+        self.parser = parser
+        self.timeout = timeout
+        self.encoding = encoding
+
+    def fetch(self, session: requests.Session, page_num: int) -> List[Dict]:
+        """抓取并解析单页，失败时抛出异常"""
+        response = session.get(self.url_template.format(page=page_num), timeout=self.timeout)
+        response.raise_for_status()
+        response.encoding = self.encoding
+        return self.parser(response.text)
+
+    def __repr__(self):
+        return f"ListingSource({self.name!r})"
+
+
+class LatencyTracker:
+    """按数据源记录最近的请求延迟（进程内共享，跨爬虫实例累积）"""
+
+    def __init__(self, window: int = 50):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        """记录一次成功请求的延迟"""
+        with self._lock:
+            self._samples.setdefault(name, deque(maxlen=self.window)).append(seconds)
+
+    def samples(self, name: str) -> List[float]:
+        with self._lock:
+            return list(self._samples.get(name, ()))
+
+
+# 默认的进程级延迟记录，Web请求每次新建爬虫时仍可复用历史延迟
+default_tracker = LatencyTracker()
+
+
+class HedgedFetcher:
+    """
+    多数据源对冲抓取器
+
+    对冲等待时间取首选源近期延迟的 p95（限制在 [min_delay, max_delay] 内），
+    样本不足时使用 initial_delay。某个源报错或解析为空时立即切换下一个源。
+    """
+
+    def __init__(self, sources: List[ListingSource], session: requests.Session = None,
+                 initial_delay: float = 1.0, min_delay: float = 0.05,
+                 max_delay: float = 5.0, percentile: float = 95,
+                 min_samples: int = 5, tracker: Optional[LatencyTracker] = None):
+        """
+        初始化对冲抓取器
+
+        Args:
+            sources: 数据源列表（按优先级排列）
+            session: 共享的 requests 会话
+            initial_delay: 延迟样本不足时的对冲等待时间（秒）
+            min_delay: 对冲等待时间下限（秒）
+            max_delay: 对冲等待时间上限（秒）
+            percentile: 计算对冲等待时间所用的延迟分位数
+            min_samples: 启用分位数估计所需的最少样本数
+            tracker: 延迟记录器，默认使用进程级共享记录
+        """
+        if not sources:
+            raise ValueError("至少需要一个数据源")
+
+        self.sources = list(sources)
+        self.session = session or requests.Session()
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.tracker = tracker or default_tracker
+
+    def hedge_delay(self, source: ListingSource) -> float:
+        """返回对该源发出对冲请求前的等待时间"""
+        samples = self.tracker.samples(source.name)
+
+        if len(samples) < self.min_samples:
+            delay = self.initial_delay
+        else:
+            delay = float(np.percentile(samples, self.percentile))
+
+        return min(max(delay, self.min_delay), self.max_delay)
+
+    def _attempt(self, source: ListingSource, page_num: int) -> Optional[List[Dict]]:
+        start = time.perf_counter()
+        records = source.fetch(self.session, page_num)
+        if records:
+            self.tracker.record(source.name, time.perf_counter() - start)
+        return records
+
+    def fetch(self, page_num: int) -> Optional[List[Dict]]:
+        """
+        抓取单页数据，返回最先解析成功的数据源结果
+
+        Args:
+            page_num: 页码
+
+        Returns:
+            数据记录列表，所有数据源都失败时返回 None
+        """
+        pending = {}
+        next_index = 0
+        executor = ThreadPoolExecutor(max_workers=len(self.sources))
+
+        def launch():
+            nonlocal next_index
+            source = self.sources[next_index]
+            next_index += 1
+            pending[executor.submit(self._attempt, source, page_num)] = source
+            return source
+
+        try:
+            current = launch()
+            while pending:
+                can_hedge = next_index < len(self.sources)
+                timeout = self.hedge_delay(current) if can_hedge else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                if not done:
+                    current = launch()
+                    logger.info(f"Page {page_num}: hedging to {current.name}")
+                    continue
+
+                for future in done:
+                    source = pending.pop(future)
+                    try:
+                        records = future.result()
+                    except Exception as e:
+                        logger.warning(f"Page {page_num}: source {source.name} failed - {e}")
+                        records = None
+
+                    if records:
+                        logger.info(f"Page {page_num}: Fetched {len(records)} records from {source.name}")
+                        return records
+
+                    if records is not None:
+                        logger.warning(f"Page {page_num}: source {source.name} returned no records")
+
+                # 失败的源不再等待，直接向下一个源请求
+                if next_index < len(self.sources):
+                    current = launch()
+
+            logger.error(f"Page {page_num}: All sources failed")
+            return None
+        finally:
+            # 不等待落后的请求，它们的结果会被丢弃
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -1,4 +1,5 @@
 """深度学习模型模块"""
 from .lottery_model import LotteryModel
+from .registry import ModelRegistry, get_model
 
-__all__ = ['LotteryModel']
+__all__ = ['LotteryModel', 'ModelRegistry', 'get_model']
@@ -0,0 +1,134 @@
+"""
+可内存映射的推理检查点（safetensors 布局）
+
+.pth 是 pickle：每个进程加载时都要反序列化，并把权重复制进模型自己分配的参数。
+推理检查点把 state_dict 写成一个平坦文件:
+    8 字节小端头长度 N | N 字节 JSON 头 | 各张量的原始数据（连续存放）
+    JSON 头: {name: {"dtype": "F32", "shape": [...], "data_offsets": [begin, end]}, "__metadata__": {str: str}}
+与 safetensors 库的格式相同（可以用它读取），但这里只依赖 torch。
+
+加载时以写时复制方式 mmap 整个文件，张量直接指向映射内存：不解析 pickle、不复制权重，
+多个进程加载同一文件时共享页缓存中的同一份物理内存（只读使用，不会触发复制）。
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from typing import Dict, Tuple
+
+import torch
+
+FLAT_SUFFIX = '.safetensors'
+
+DTYPE_NAMES = {
+    torch.float64: 'F64',
+    torch.float32: 'F32',
+    torch.float16: 'F16',
+    torch.bfloat16: 'BF16',
+    torch.int64: 'I64',
+    torch.int32: 'I32',
+    torch.int16: 'I16',
+    torch.int8: 'I8',
+    torch.uint8: 'U8',
+    torch.bool: 'BOOL',
+}
+DTYPES = {name: dtype for dtype, name in DTYPE_NAMES.items()}
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def flat_path_of(path: str) -> str:
+    """.pth 检查点对应的推理检查点路径（同目录同名）"""
+    return os.path.splitext(str(path))[0] + FLAT_SUFFIX
+
+
+def save_flat(tensors: Dict[str, torch.Tensor], path: str, metadata: Dict[str, str] = None):
+    """
+    写入推理检查点
+
+    先写临时文件再原子替换：已映射旧文件的进程继续使用旧 inode，不会读到写了一半的数据。
+    """
+    # 按元素字节数从大到小排列，连续存放时各张量的起始偏移自然对齐
+    items = sorted(((name, t.detach().cpu().contiguous()) for name, t in tensors.items()),
+                   key=lambda item: (-item[1].element_size(), item[0]))
+    header = {}
+    offset = 0
+    for name, tensor in items:
+        if tensor.dtype not in DTYPE_NAMES:
+            raise ValueError(f'不支持的张量类型: {name} ({tensor.dtype})')
+        size = tensor.numel() * tensor.element_size()
+        header[name] = {'dtype': DTYPE_NAMES[tensor.dtype], 'shape': list(tensor.shape),
+                        'data_offsets': [offset, offset + size]}
+        offset += size
+    if metadata:
+        header['__metadata__'] = {str(k): str(v) for k, v in metadata.items()}
+
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    # 数据区从 8 字节边界开始
+    header_bytes += b' ' * (-len(header_bytes) % 8)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(struct.pack('<Q', len(header_bytes)))
+            f.write(header_bytes)
+            for _, tensor in items:
+                if tensor.numel():
+                    f.write(tensor.reshape(-1).view(torch.uint8).numpy().tobytes())
+        # mkstemp 创建的文件仅属主可读，其他用户运行的 Web/任务进程也需要读取
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_metadata(path: str) -> Dict[str, str]:
+    """只读取文件头中的 __metadata__"""
+    with open(path, 'rb') as f:
+        header_len = struct.unpack('<Q', f.read(8))[0]
+        return json.loads(f.read(header_len)).get('__metadata__', {})
+
+
+def load_flat(path: str) -> Tuple[Dict[str, torch.Tensor], Dict[str, str]]:
+    """
+    内存映射加载推理检查点
+
+    Returns:
+        (state_dict, metadata)；张量引用映射内存，不应原地修改
+        （写时复制映射下修改只影响本进程，但会失去共享）
+    """
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    if len(buffer) < 8:
+        raise ValueError(f'推理检查点格式错误: {path}')
+    header_len = struct.unpack('<Q', buffer[:8])[0]
+    if 8 + header_len > len(buffer):
+        raise ValueError(f'推理检查点格式错误: {path}')
+    header = json.loads(buffer[8:8 + header_len])
+    metadata = header.pop('__metadata__', {})
+    base = 8 + header_len
+
+    tensors = {}
+    for name, info in header.items():
+        dtype = DTYPES[info['dtype']]
+        begin, end = info['data_offsets']
+        if base + end > len(buffer):
+            raise ValueError(f'推理检查点数据不完整: {path} ({name})')
+        count = (end - begin) // dtype.itemsize
+        if count:
+            tensor = torch.frombuffer(buffer, dtype=dtype, count=count, offset=base + begin)
+        else:
+            tensor = torch.empty(0, dtype=dtype)
+        tensors[name] = tensor.reshape(info['shape'])
+    return tensors, metadata
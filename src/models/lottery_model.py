@@ -3,7 +3,9 @@
 
 使用LSTM + Attention实现多任务学习
 """
+import json
 import logging
+import os
 from typing import Dict, Tuple, Optional
 import numpy as np
 
@@ -11,6 +13,8 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+from .flat_checkpoint import FLAT_SUFFIX, file_sha256, flat_path_of, load_flat, read_metadata, save_flat
+
 logger = logging.getLogger(__name__)
 
 
@@ -244,21 +248,55 @@ class LotteryModel(nn.Module):
         
         return total_loss, loss_dict
     
+    @property
+    def config(self) -> Dict:
+        return {
+            'embedding_dim': self.embedding_dim,
+            'hidden_dim': self.hidden_dim,
+            'num_layers': self.num_layers,
+        }
+    
     def save(self, path: str):
-        """保存模型"""
+        """保存模型（同时写出同名 .safetensors 推理检查点）"""
         torch.save({
             'model_state_dict': self.state_dict(),
-            'config': {
-                'embedding_dim': self.embedding_dim,
-                'hidden_dim': self.hidden_dim,
-                'num_layers': self.num_layers,
-            }
+            'config': self.config,
         }, path)
         logger.info(f"Model saved to {path}")
+        self.save_flat(flat_path_of(path), source_sha256=file_sha256(path))
+    
+    def save_flat(self, path: str, source_sha256: str = ''):
+        """
+        保存可内存映射的推理检查点
+        
+        Args:
+            path: .safetensors 路径
+            source_sha256: 对应 .pth 的哈希，加载 .pth 时据此判断推理检查点是否过期
+        """
+        save_flat(self.state_dict(), path, {'config': json.dumps(self.config), 'source_sha256': source_sha256})
+        logger.info(f"Inference checkpoint saved to {path}")
     
     @classmethod
-    def load(cls, path: str, device='cpu'):
-        """加载模型"""
+    def load(cls, path: str, device='cpu', mmap: bool = True, sha256: str = None):
+        """
+        加载模型
+        
+        Args:
+            path: .pth 或 .safetensors 检查点
+            device: 设备
+            mmap: 加载 .pth 时，如同名 .safetensors 由该 .pth 导出（哈希一致），改为内存映射加载
+            sha256: 调用方已算出的 .pth 哈希（如模型注册表），给出时不再重新读取文件计算
+        """
+        path = str(path)
+        if path.endswith(FLAT_SUFFIX):
+            return cls.load_flat(path, device)
+        if mmap:
+            flat_path = flat_path_of(path)
+            if os.path.exists(flat_path):
+                if read_metadata(flat_path).get('source_sha256') == (sha256 or file_sha256(path)):
+                    return cls.load_flat(flat_path, device)
+                logger.warning(f"{flat_path} 与 {path} 不一致，请重新导出（python manage.py export_model）")
+        
         checkpoint = torch.load(path, map_location=device)
         config = checkpoint['config']
         
@@ -268,3 +306,21 @@ class LotteryModel(nn.Module):
         
         logger.info(f"Model loaded from {path}")
         return model
+    
+    @classmethod
+    def load_flat(cls, path: str, device='cpu'):
+        """
+        内存映射加载推理检查点
+        
+        load_state_dict(assign=True) 直接采用映射内存中的张量作为参数（构建时初始化的参数随即释放），
+        权重不复制，多个进程共享同一份物理内存。仅用于推理。
+        """
+        state_dict, metadata = load_flat(path)
+        # 不在 meta 设备上构建：首次使用 meta 设备要初始化约 2 秒，比随机初始化参数慢得多
+        model = cls(**json.loads(metadata['config']))
+        model.load_state_dict(state_dict, assign=True)
+        if str(device) != 'cpu':
+            model.to(device)
+        
+        logger.info(f"Model mapped from {path}")
+        return model
@@ -0,0 +1,131 @@
+"""
+进程级模型注册表
+
+每个检查点在进程内只加载一次并保持 eval 模式，所有请求共享同一个实例。
+检查点文件的 mtime/大小变化后重新计算哈希，内容确实改变时在该检查点的锁内同步加载新模型，
+加载完成后整体替换：发现文件变化的请求等待加载完成，不会拿到加载到一半的模型。
+
+Web 代码统一以 src.models.registry 导入；以 models.registry 导入会成为另一个模块，
+得到第二个注册表和第二份模型。
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import torch
+
+from .flat_checkpoint import file_sha256
+from .lottery_model import LotteryModel
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelEntry:
+    """已加载的模型及其检查点信息"""
+    model: LotteryModel
+    path: str
+    device: str
+    sha256: str
+    mtime_ns: int
+    size: int
+    loaded_at: float
+
+
+class ModelRegistry:
+    """进程级模型注册表"""
+
+    def __init__(self, num_threads: Optional[int] = None):
+        """
+        初始化注册表
+
+        Args:
+            num_threads: torch CPU 线程数，None 表示保持 torch 默认值
+        """
+        self.num_threads = num_threads
+        self._entries: Dict[Tuple[str, str], ModelEntry] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._threads_applied = False
+
+    def configure(self, num_threads: Optional[int] = None):
+        """设置 torch 线程数（进程级设置，只生效一次）"""
+        if num_threads is not None and num_threads != self.num_threads:
+            self.num_threads = num_threads
+            self._threads_applied = False
+
+    def _apply_threads(self):
+        if self.num_threads and not self._threads_applied:
+            torch.set_num_threads(self.num_threads)
+            self._threads_applied = True
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get_entry(self, path: str, device='cpu') -> ModelEntry:
+        """
+        获取模型条目，必要时加载或热更新
+
+        Args:
+            path: 检查点路径
+            device: 设备
+
+        Returns:
+            ModelEntry
+        """
+        path = os.path.abspath(str(path))
+        key = (path, str(device))
+        stat = os.stat(path)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+            return entry
+
+        with self._key_lock(key):
+            # 等锁期间可能已被其他线程加载
+            entry = self._entries.get(key)
+            stat = os.stat(path)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                return entry
+
+            sha256 = file_sha256(path)
+            if entry is not None and entry.sha256 == sha256:
+                # 文件被touch但内容未变，沿用已加载的模型
+                entry = ModelEntry(entry.model, path, str(device), sha256,
+                                   stat.st_mtime_ns, stat.st_size, entry.loaded_at)
+            else:
+                self._apply_threads()
+                start = time.perf_counter()
+                model = LotteryModel.load(path, device=device, sha256=sha256)
+                model.eval()
+                entry = ModelEntry(model, path, str(device), sha256,
+                                   stat.st_mtime_ns, stat.st_size, time.time())
+                logger.info(f"Registry loaded {path} ({sha256[:12]}) in "
+                            f"{(time.perf_counter() - start) * 1000:.1f}ms")
+
+            self._entries[key] = entry
+            return entry
+
+    def get(self, path: str, device='cpu') -> LotteryModel:
+        """获取共享的 eval 模式模型"""
+        return self.get_entry(path, device).model
+
+    def clear(self):
+        """清空已加载的模型"""
+        with self._lock:
+            self._entries.clear()
+            self._locks.clear()
+
+
+# 默认的进程级注册表
+registry = ModelRegistry()
+
+
+def get_model(path: str, device='cpu', num_threads: Optional[int] = None) -> LotteryModel:
+    """从默认注册表获取模型"""
+    registry.configure(num_threads)
+    return registry.get(path, device)
@@ -13,6 +13,12 @@ if [ ! -f "db.sqlite3" ]; then
     /usr/local/miniconda3/bin/python import_data.py
 fi
 
+# 爬取、手动运行任务等由后台任务工作进程执行，随Web服务一起启动和退出
+echo "启动后台任务工作进程..."
+/usr/local/miniconda3/bin/python manage.py run_jobs &
+JOBS_PID=$!
+trap 'kill $JOBS_PID 2>/dev/null' EXIT
+
 echo "启动Web服务..."
 echo ""
 echo "访问地址: http://localhost:8000/"
@@ -0,0 +1,20 @@
+"""
+测试数据工厂
+
+各测试模块共用的合成开奖记录（ingest_records 的输入格式）
+"""
+from datetime import date, timedelta
+
+
+def make_records(count=10, start_day=1, start=date(2026, 1, 1), numbers=None):
+    """
+    逐日连续的 count 期开奖记录，从 start 起的第 start_day 天开始，期号与日期相同（YYYY-MM-DD）
+
+    号码默认由天序号 n 推出：[n % 10, 3n % 10, 7n % 10]；给出 numbers 时各期都用该号码
+    """
+    records = []
+    for n in range(start_day, start_day + count):
+        day = (start + timedelta(days=n - 1)).strftime('%Y-%m-%d')
+        records.append({'period': day, 'date': day,
+                        'numbers': list(numbers) if numbers else [n % 10, (n * 3) % 10, (n * 7) % 10]})
+    return records
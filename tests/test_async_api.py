@@ -0,0 +1,101 @@
+"""
+异步预测接口测试
+
+运行: python manage.py test tests.test_async_api
+"""
+import asyncio
+import json
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from lottery.ingest import ingest_records
+from lottery.models import Prediction
+from lottery.offload import run_blocking
+from lottery.prediction import aget_prediction
+from lottery.singleflight import AsyncSingleFlight
+from tests.factories import make_records
+
+
+@override_settings(PREDICT_DEADLINE=None)
+class AsyncPredictionTest(TestCase):
+    """测试异步预测"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ingest_records(make_records(count=30), log=False)
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_repeat_request_served_from_cache(self):
+        first = await aget_prediction(100)
+        second = await aget_prediction(100)
+
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(first['prediction'], second['prediction'])
+        self.assertEqual(await Prediction.objects.acount(), 1)
+
+    async def test_concurrent_requests_coalesced(self):
+        results = await asyncio.gather(*[aget_prediction(100) for _ in range(5)])
+
+        self.assertEqual(sum(1 for r in results if not r['cached']), 1)
+        self.assertEqual(await Prediction.objects.acount(), 1)
+
+    async def test_api_endpoint(self):
+        response = await self.async_client.post('/api/predict/', data=json.dumps({'num_bets': 20}),
+                                                content_type='application/json')
+        data = response.json()
+        self.assertEqual(data['status'], 'success')
+        self.assertEqual(data['prediction']['period'], '2026-01-31')
+
+
+class OffloadTest(SimpleTestCase):
+    """测试阻塞任务不会拖住事件循环"""
+
+    async def test_light_tasks_not_starved(self):
+        async def light():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            return time.perf_counter() - start
+
+        heavy = asyncio.ensure_future(run_blocking('inference', time.sleep, 0.5))
+        latencies = await asyncio.gather(*[light() for _ in range(20)])
+        await heavy
+
+        self.assertLess(max(latencies), 0.2)
+
+    async def test_async_single_flight(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 42
+
+        results = await asyncio.gather(*[flight.do('key', compute) for _ in range(6)])
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([value for value, _ in results], [42] * 6)
+        self.assertEqual(sum(1 for _, leader in results if leader), 1)
+        self.assertFalse(flight.in_flight('key'))
+
+    async def test_async_single_flight_error(self):
+        flight = AsyncSingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError('boom')
+
+        results = await asyncio.gather(*[flight.do('key', compute) for _ in range(3)],
+                                       return_exceptions=True)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
@@ -0,0 +1,129 @@
+"""
+回测资金曲线降采样（LTTB）与区间接口测试
+
+运行: python manage.py test tests.test_backtest_charts
+"""
+import json
+import os
+
+import django
+import numpy as np
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from lottery.charts import MIN_POINTS, downsample, downsample_indices, lttb_indices, parse_points
+from lottery.models import BacktestResult
+
+
+def random_walk(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return 10000 + np.cumsum(rng.normal(0, 20, n))
+
+
+def create_backtest(capital_history):
+    period_results = [{'period': f'P{i}', 'capital': c} for i, c in enumerate(capital_history[1:])]
+    return BacktestResult.objects.create(
+        strategy_name='LTTB', start_period='P0', end_period=f'P{len(period_results) - 1}',
+        total_periods=len(period_results), starting_capital=capital_history[0],
+        final_capital=capital_history[-1], total_profit=0, roi_percentage=0, max_drawdown=0,
+        bet_periods=0, skip_periods=0, win_periods=0, win_rate=0, total_invested=0, total_prizes=0,
+        period_results=period_results, capital_history=capital_history,
+    )
+
+
+class LttbTest(SimpleTestCase):
+    """测试 LTTB 降采样"""
+
+    def test_keeps_endpoints_and_order(self):
+        y = random_walk()
+        indices = lttb_indices(np.arange(len(y), dtype=float), y, 200)
+        self.assertEqual(len(indices), 200)
+        self.assertEqual((indices[0], indices[-1]), (0, len(y) - 1))
+        self.assertTrue((np.diff(indices) > 0).all())
+
+    def test_short_series_unchanged(self):
+        self.assertEqual(downsample([1, 2, 3], 100), {'x': [0, 1, 2], 'y': [1.0, 2.0, 3.0]})
+        self.assertEqual(downsample([], 100), {'x': [], 'y': []})
+
+    def test_drawdown_spike_preserved(self):
+        y = np.full(10000, 10000.0)
+        y[6789] = 4000.0  # 单期深度回撤
+        y[1234] = 12000.0
+        indices = downsample_indices(y, 50)
+        self.assertIn(6789, indices)
+        self.assertIn(1234, indices)
+        self.assertLessEqual(len(indices), 50)
+
+    def test_landmarks_in_same_bucket_all_kept(self):
+        y = np.full(10000, 10000.0)
+        y[1234] = 12000.0  # 峰
+        y[1236] = 4000.0   # 紧随其后的谷，与峰落在同一个桶
+        indices = downsample_indices(y, 50)
+        self.assertIn(1234, indices)
+        self.assertIn(1236, indices)
+        self.assertLessEqual(len(indices), 51)
+        self.assertTrue((np.diff(indices) > 0).all())
+
+    def test_offset(self):
+        series = downsample(random_walk(1000), 20, offset=300)
+        self.assertEqual(series['x'][0], 300)
+        self.assertEqual(series['x'][-1], 1299)
+
+    def test_parse_points(self):
+        self.assertEqual(parse_points(None, 500, 5000), 500)
+        self.assertEqual(parse_points('abc', 500, 5000), 500)
+        self.assertEqual(parse_points('1', 500, 5000), MIN_POINTS)
+        self.assertEqual(parse_points('99999', 500, 5000), 5000)
+
+
+@override_settings(BACKTEST_CHART_POINTS=100, BACKTEST_ZOOM_MAX_POINTS=1000)
+class BacktestChartViewTest(TestCase):
+    """测试详情页降采样和区间接口"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.capital = [round(float(v), 2) for v in random_walk(3001)]
+        cls.backtest = create_backtest(cls.capital)
+
+    def test_detail_page_downsampled(self):
+        response = self.client.get(reverse('lottery:backtest_detail', args=[self.backtest.pk]))
+        series = json.loads(response.context['capital_series'])
+        self.assertEqual(len(series['x']), 100)
+        self.assertEqual(response.context['total_points'], 3001)
+        self.assertNotIn('period_results', response.context)
+
+        response = self.client.get(reverse('lottery:backtest_detail', args=[self.backtest.pk]), {'points': 300})
+        self.assertEqual(len(json.loads(response.context['capital_series'])['x']), 300)
+
+    def test_zoom_full_resolution(self):
+        url = reverse('lottery:api_backtest_series', args=[self.backtest.pk])
+        data = self.client.get(url, {'start': 100, 'end': 300}).json()
+        self.assertFalse(data['downsampled'])
+        self.assertEqual(data['x'], list(range(100, 300)))
+        self.assertEqual(data['capital'], self.capital[100:300])
+        # 资金曲线第 i 点是第 i 期（period_results[i - 1]）结束后的资金
+        self.assertEqual(len(data['period_results']), 200)
+        self.assertEqual(data['period_results'][1]['capital'], self.capital[101])
+
+    def test_zoom_large_range_downsampled(self):
+        url = reverse('lottery:api_backtest_series', args=[self.backtest.pk])
+        data = self.client.get(url).json()
+        self.assertTrue(data['downsampled'])
+        self.assertEqual(len(data['x']), 1000)
+        self.assertNotIn('period_results', data)
+
+        data = self.client.get(url, {'start': 0, 'end': 500, 'points': 50}).json()
+        self.assertTrue(data['downsampled'])
+        self.assertEqual(len(data['x']), 50)
+
+    def test_zoom_invalid(self):
+        url = reverse('lottery:api_backtest_series', args=[self.backtest.pk])
+        self.assertEqual(self.client.get(url, {'start': 300, 'end': 100}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'end': 99999}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': 'x'}).status_code, 400)
+        missing = reverse('lottery:api_backtest_series', args=[self.backtest.pk + 1])
+        self.assertEqual(self.client.get(missing).status_code, 404)
@@ -0,0 +1,90 @@
+"""
+回测明细分表压缩存储测试
+
+运行: python manage.py test tests.test_backtest_detail
+"""
+import json
+import os
+from unittest import mock
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from lottery.models import BacktestDetail, BacktestResult
+
+PERIOD_RESULTS = [
+    {'period': f'2025-07-{day:02d}', 'action': 'bet', 'cost': 60, 'prize': 0, 'profit': -60,
+     'capital': 10000 - day * 60, 'actual_numbers': [0, 1, 8]}
+    for day in range(1, 31)
+]
+
+
+def create_backtest(**kwargs):
+    fields = dict(
+        strategy_name='Top 10% Dynamic', start_period='2025-07-01', end_period='2025-07-30',
+        total_periods=30, starting_capital=10000, final_capital=8200, total_profit=-1800,
+        roi_percentage=-18.0, max_drawdown=18.0, bet_periods=30, skip_periods=0, win_periods=0,
+        win_rate=0, total_invested=1800, total_prizes=0,
+        period_results=PERIOD_RESULTS, capital_history=[r['capital'] for r in PERIOD_RESULTS],
+    )
+    fields.update(kwargs)
+    return BacktestResult.objects.create(**fields)
+
+
+class BacktestDetailTest(TestCase):
+    """测试回测明细的分表存储与延迟加载"""
+
+    def test_create_stores_compressed_detail(self):
+        backtest = create_backtest()
+        detail = BacktestDetail.objects.get(pk=backtest.pk)
+
+        self.assertEqual(detail.load()['period_results'], PERIOD_RESULTS)
+        self.assertLess(len(detail.payload), len(json.dumps(PERIOD_RESULTS)) / 3)
+
+    def test_list_query_skips_detail_table(self):
+        create_backtest()
+        with CaptureQueriesContext(connection) as ctx:
+            rows = list(BacktestResult.objects.all()[:5])
+            [row.roi_percentage for row in rows]
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('backtestdetail', ctx.captured_queries[0]['sql'])
+
+    def test_detail_loaded_lazily_once(self):
+        pk = create_backtest().pk
+        backtest = BacktestResult.objects.get(pk=pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(backtest.period_results), 30)
+            self.assertEqual(backtest.capital_history[-1], 8200)
+
+    def test_update_detail(self):
+        pk = create_backtest().pk
+        backtest = BacktestResult.objects.get(pk=pk)
+        backtest.capital_history = [10000, 9000]
+        backtest.save()
+
+        reloaded = BacktestResult.objects.get(pk=pk)
+        self.assertEqual(reloaded.capital_history, [10000, 9000])
+        self.assertEqual(reloaded.period_results, PERIOD_RESULTS)
+
+    def test_failed_detail_write_rolls_back_summary(self):
+        """明细写入失败时汇总也不保存"""
+        with mock.patch('lottery.models.pack_detail', side_effect=RuntimeError('disk full')):
+            with self.assertRaises(RuntimeError):
+                create_backtest()
+        self.assertFalse(BacktestResult.objects.exists())
+        self.assertFalse(BacktestDetail.objects.exists())
+
+    def test_detail_view(self):
+        backtest = create_backtest()
+        response = self.client.get(reverse('lottery:backtest_detail', args=[backtest.pk]))
+        self.assertEqual(response.status_code, 200)
+        # 30 个点不超过默认降采样点数，原样嵌入
+        series = json.loads(response.context['capital_series'])
+        self.assertEqual(series['y'], [r['capital'] for r in PERIOD_RESULTS])
@@ -0,0 +1,97 @@
+"""
+批量情景预测测试
+
+运行: python manage.py test tests.test_batch_prediction
+"""
+import json
+import os
+from unittest import mock
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.test import TestCase
+from django.urls import reverse
+
+from lottery import scenarios as scenario_module
+from lottery.ingest import ingest_records
+from lottery.models import LotteryPeriod, Prediction
+from lottery.prediction import PredictionError, get_prediction_model, predict_window
+from lottery.scenarios import parse_scenarios, run_scenarios
+from tests.factories import make_records
+
+
+class ParseScenariosTest(TestCase):
+    """测试情景参数解析"""
+
+    def test_cartesian_product(self):
+        scenarios = parse_scenarios({'as_of': ['2026-01-30', None], 'num_bets': [20, 50]})
+        self.assertEqual(len(scenarios), 4)
+        self.assertEqual(scenarios[0], {'as_of': '2026-01-30', 'num_bets': 20})
+        self.assertEqual(scenarios[-1], {'as_of': None, 'num_bets': 50})
+
+    def test_invalid(self):
+        with self.assertRaises(PredictionError):
+            parse_scenarios({'scenarios': []})
+        with self.assertRaises(PredictionError):
+            parse_scenarios({'num_bets': [0]})
+        with self.assertRaises(PredictionError):
+            parse_scenarios({'num_bets': list(range(1, 60))})
+
+
+class BatchPredictionTest(TestCase):
+    """测试批量推理"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ingest_records(make_records(40), log=False)
+
+    def test_single_forward_pass(self):
+        with mock.patch.object(scenario_module, 'infer_batch', wraps=scenario_module.infer_batch) as infer:
+            result = run_scenarios(parse_scenarios({'as_of': ['2026-01-31', '2026-02-05', None],
+                                                    'num_bets': [20, 50, 100, 200]}))
+
+        self.assertEqual(infer.call_count, 1)
+        self.assertEqual(infer.call_args[0][1].shape, (3, 30, 3))
+        self.assertEqual(len(result['results']), 12)
+        self.assertEqual([r['prediction']['betting_plan']['num_bets'] for r in result['results'][:4]],
+                         [20, 50, 100, 200])
+        self.assertEqual(Prediction.objects.count(), 0)
+
+    def test_matches_single_prediction(self):
+        result = run_scenarios([{'as_of': None, 'num_bets': 100}])['results'][0]
+        single, _ = predict_window(get_prediction_model(), LotteryPeriod.objects.latest_window(30), 100)
+
+        self.assertEqual(result['as_of'], '2026-02-09')
+        self.assertIsNone(result['actual_numbers'])
+        self.assertEqual(result['prediction']['top10_digits'], single['prediction']['top10_digits'])
+        self.assertAlmostEqual(result['prediction']['score'], single['prediction']['score'], places=2)
+
+    def test_historical_as_of_includes_actual(self):
+        result = run_scenarios([{'as_of': '2026-01-30', 'num_bets': 20}])['results'][0]
+        following = LotteryPeriod.objects.get(period='2026-01-31')
+        self.assertEqual(result['actual_numbers'], [following.digit1, following.digit2, following.digit3])
+        self.assertEqual(result['prediction']['period'], '2026-01-31')
+
+    def test_per_scenario_errors(self):
+        results = run_scenarios([{'as_of': '1999-01-01', 'num_bets': 20},
+                                 {'as_of': '2026-01-10', 'num_bets': 20},
+                                 {'as_of': None, 'num_bets': 20}])['results']
+        self.assertEqual([r['status'] for r in results], ['error', 'error', 'success'])
+
+    def test_api_persist(self):
+        response = self.client.post(reverse('lottery:api_predict_batch'),
+                                    data=json.dumps({'num_bets': [20, 50], 'persist': True}),
+                                    content_type='application/json')
+        data = response.json()
+        self.assertEqual(data['status'], 'success')
+        self.assertEqual(data['saved'], 2)
+        self.assertEqual(Prediction.objects.count(), 2)
+        self.assertNotIn('_fields', data['results'][0])
+
+    def test_api_bad_request(self):
+        response = self.client.post(reverse('lottery:api_predict_batch'), data='{bad',
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
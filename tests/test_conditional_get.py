@@ -0,0 +1,79 @@
+"""
+投注建议接口条件请求测试
+
+运行: python manage.py test tests.test_conditional_get
+"""
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from lottery.models import LotteryPeriod, Prediction
+
+LATEST_URL = '/api/betting/latest-recommendation/'
+HISTORY_URL = '/api/betting/recommendation-history/'
+
+
+def make_prediction(period, predicted_for):
+    return Prediction.objects.create(
+        period=period, predicted_for_period=predicted_for, top5_digits=[1, 2, 3, 4, 5],
+        digit_probs=[0.1] * 10, confidence_score=0.5, recommendation='bet',
+        betting_combinations=[{'numbers': [1, 2, 3]}] * 50, total_cost=100, bet_count=50,
+    )
+
+
+class ConditionalGetTest(TestCase):
+    """测试 ETag / Last-Modified 与 304 响应"""
+
+    def setUp(self):
+        cache.clear()
+        self.period = LotteryPeriod.objects.create(
+            period='2026-01-01', date='2026-01-01', digit1=1, digit2=2, digit3=3, sum_value=6, shape='组六',
+        )
+        self.prediction = make_prediction(self.period, '2026-01-02')
+
+    def test_headers_present(self):
+        for url in (LATEST_URL, HISTORY_URL):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(f'"{self.prediction.pk}-v', response['ETag'])
+            self.assertIn('Last-Modified', response)
+
+    def test_unchanged_poll_returns_304(self):
+        etag = self.client.get(LATEST_URL)['ETag']
+        self.client.get(LATEST_URL, HTTP_IF_NONE_MATCH=etag)  # 预热版本缓存
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(LATEST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        # 只查询数据版本号，不读取预测记录
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('lottery_prediction', queries[0]['sql'])
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(HISTORY_URL)['Last-Modified']
+        response = self.client.get(HISTORY_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_prediction_changes_etag(self):
+        etag = self.client.get(LATEST_URL)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            make_prediction(self.period, '2026-01-03')
+
+        response = self.client.get(LATEST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_no_predictions(self):
+        Prediction.objects.all().delete()
+        response = self.client.get(LATEST_URL)
+        self.assertEqual(response.json()['status'], 'error')
+        self.assertNotIn('Last-Modified', response)
@@ -0,0 +1,111 @@
+"""
+游标分页测试
+
+运行: python manage.py test tests.test_cursor_pagination
+"""
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from lottery.ingest import ingest_records
+from lottery.models import LotteryPeriod, Prediction
+from lottery.pagination import InvalidCursor, decode_cursor, paginate_by_cursor
+
+
+class CursorPaginationTest(TestCase):
+    """测试按 (created_at, id) 的游标分页"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ingest_records([{'period': '2026-01-01', 'date': '2026-01-01', 'numbers': [1, 2, 3]}], log=False)
+        period = LotteryPeriod.objects.get()
+        base = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        for i in range(25):
+            pred = Prediction.objects.create(
+                period=period, predicted_for_period=f'P{i:02d}', top5_digits=[1, 2, 3, 4, 5],
+                digit_probs=[0.1] * 10, confidence_score=0.19,
+                recommendation='bet' if i % 2 else 'no_bet',
+            )
+            # 每3条共用一个时间，验证 id 作为次序键
+            Prediction.objects.filter(pk=pred.pk).update(created_at=base + timedelta(minutes=i // 3))
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, queryset, page_size):
+        seen, after = [], None
+        while True:
+            page = paginate_by_cursor(queryset, page_size, after=after)
+            seen.extend(p.pk for p in page)
+            if not page.has_next:
+                return seen
+            after = page.next_cursor
+
+    def test_walk_matches_ordering(self):
+        expected = list(Prediction.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.assertEqual(self.walk(Prediction.objects.all(), 7), expected)
+
+    def test_previous_page(self):
+        first = paginate_by_cursor(Prediction.objects.all(), 10)
+        second = paginate_by_cursor(Prediction.objects.all(), 10, after=first.next_cursor)
+        back = paginate_by_cursor(Prediction.objects.all(), 10, before=second.previous_cursor)
+
+        self.assertEqual([p.pk for p in back], [p.pk for p in first])
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+
+    def test_deep_page_query_count(self):
+        page = paginate_by_cursor(Prediction.objects.all(), 5)
+        for _ in range(3):
+            page = paginate_by_cursor(Prediction.objects.all(), 5, after=page.next_cursor)
+        with self.assertNumQueries(1):
+            paginate_by_cursor(Prediction.objects.all(), 5, after=page.next_cursor)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('not-a-cursor')
+
+    def test_recommendation_history_api(self):
+        url = reverse('lottery:api_recommendation_history')
+        ids, cursor = [], None
+        while True:
+            params = {'page_size': 4, 'recommendation': 'bet'}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(url, params).json()['data']
+            self.assertEqual(data['total'], 12)
+            ids.extend(r['id'] for r in data['recommendations'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        expected = list(Prediction.objects.filter(recommendation='bet')
+                        .order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_recommendation_history_legacy_page(self):
+        data = self.client.get(reverse('lottery:api_recommendation_history'),
+                               {'page': 2, 'page_size': 10}).json()['data']
+        self.assertEqual(data['page'], 2)
+        self.assertEqual(data['total_pages'], 3)
+        self.assertEqual(len(data['recommendations']), 10)
+        self.assertTrue(data['has_next'])
+
+    def test_predictions_list_page(self):
+        response = self.client.get(reverse('lottery:predictions_list'))
+        self.assertEqual(response.status_code, 200)
+        page = response.context['page_obj']
+        self.assertEqual(page.count, 25)
+        self.assertEqual(len(page), 25)
+        self.assertFalse(page.has_other_pages)
+
+        # 无效游标回到第一页
+        response = self.client.get(reverse('lottery:predictions_list'), {'after': 'bad'})
+        self.assertEqual(len(response.context['page_obj']), 25)
@@ -0,0 +1,115 @@
+"""
+仪表板版本缓存测试
+
+运行: python manage.py test tests.test_dashboard_cache
+"""
+import json
+import os
+import tempfile
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from lottery.ingest import ingest_records
+from lottery.models import DataUpdateLog, LotteryPeriod
+from lottery.versioning import get_data_version, load_result_json
+from tests.factories import make_records
+
+
+@override_settings(PRECOMPUTE_ON_INGEST=False)
+class DataVersionTest(TestCase):
+    """测试数据版本号递增"""
+
+    def test_ingest_bumps_version(self):
+        before = get_data_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_records(make_records(5), log=False)
+        self.assertEqual(get_data_version(), before + 1)
+
+    def test_unchanged_ingest_keeps_version(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_records(make_records(5), log=False)
+        before = get_data_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_records(make_records(5), log=False)
+        self.assertEqual(get_data_version(), before)
+
+    def test_model_save_bumps_version(self):
+        before = get_data_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            DataUpdateLog.objects.create(update_type='manual', status='success')
+        self.assertEqual(get_data_version(), before + 1)
+
+
+@override_settings(PRECOMPUTE_ON_INGEST=False)
+class DashboardCacheTest(TestCase):
+    """测试仪表板按版本缓存"""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_records(make_records(5), log=False)
+
+    def test_cached_between_updates(self):
+        self.client.get(reverse('lottery:dashboard'))
+        # 仅查询数据版本号
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('lottery:dashboard'))
+        self.assertEqual(response.context['total_periods'], 5)
+
+    def test_invalidated_after_ingest(self):
+        self.client.get(reverse('lottery:dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_records(make_records(start_day=6, count=2), log=False)
+
+        response = self.client.get(reverse('lottery:dashboard'))
+        self.assertEqual(response.context['total_periods'], 7)
+        self.assertEqual(response.context['latest_period'].period, '2026-01-07')
+
+    def test_invalidated_after_single_period_change(self):
+        """单条保存/后台编辑/删除期次（不经过 ingest）也使缓存失效"""
+        self.client.get(reverse('lottery:dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            LotteryPeriod.objects.create(period='2026-01-06', date='2026-01-06', digit1=1, digit2=2,
+                                         digit3=3, sum_value=6, shape='组六')
+        response = self.client.get(reverse('lottery:dashboard'))
+        self.assertEqual(response.context['total_periods'], 6)
+        self.assertEqual(response.context['latest_period'].period, '2026-01-06')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            LotteryPeriod.objects.get(period='2026-01-06').delete()
+        response = self.client.get(reverse('lottery:dashboard'))
+        self.assertEqual(response.context['total_periods'], 5)
+        self.assertEqual(response.context['latest_period'].period, '2026-01-05')
+
+
+class ResultJsonCacheTest(SimpleTestCase):
+    """测试结果文件按 mtime 缓存"""
+
+    def test_reload_on_change(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'result.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'score': 1}, f)
+
+            first = load_result_json(path)
+            self.assertIs(load_result_json(path), first)
+
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'score': 22}, f)
+            os.utime(path, ns=(0, 10 ** 18))
+            self.assertEqual(load_result_json(path), {'score': 22})
+
+    def test_missing_or_invalid(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertIsNone(load_result_json(os.path.join(tmp, 'missing.json')))
+            path = os.path.join(tmp, 'bad.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('{')
+            self.assertIsNone(load_result_json(path))
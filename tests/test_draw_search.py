@@ -0,0 +1,92 @@
+"""
+开奖号码检索测试
+
+运行: python manage.py test tests.test_draw_search
+"""
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.test import TestCase
+
+from lottery.ingest import ingest_records
+from lottery.models import LotteryPeriod
+from lottery.search import GROUP_KEYS, build_search_filter
+
+
+DRAWS = {
+    '2026-01-01': [3, 1, 2],
+    '2026-01-02': [2, 3, 1],
+    '2026-01-03': [5, 5, 0],
+    '2026-01-04': [7, 7, 7],
+    '2026-01-05': [9, 0, 1],
+    '2026-02-01': [1, 2, 3],
+}
+
+
+class DrawSearchTest(TestCase):
+    """测试号码检索"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ingest_records(
+            [{'period': period, 'date': period, 'numbers': numbers} for period, numbers in DRAWS.items()],
+            log=False,
+        )
+
+    def search(self, query):
+        rows = LotteryPeriod.objects.filter(build_search_filter(query)).order_by('period')
+        return [row.period for row in rows]
+
+    def test_codes_stored(self):
+        row = LotteryPeriod.objects.get(period='2026-01-01')
+        self.assertEqual((row.draw_code, row.group_key), ('312', '123'))
+
+    def test_exact(self):
+        self.assertEqual(self.search('312'), ['2026-01-01'])
+
+    def test_group(self):
+        self.assertEqual(self.search('组312'), ['2026-01-01', '2026-01-02', '2026-02-01'])
+        self.assertEqual(self.search('g:055'), ['2026-01-03'])
+
+    def test_contains(self):
+        self.assertEqual(self.search('含0'), ['2026-01-03', '2026-01-05'])
+        self.assertEqual(self.search('含55'), ['2026-01-03'])
+        self.assertEqual(self.search('d777'), ['2026-01-04'])
+
+    def test_sum_and_shape(self):
+        self.assertEqual(self.search('和6'), ['2026-01-01', '2026-01-02', '2026-02-01'])
+        self.assertEqual(self.search('豹子'), ['2026-01-04'])
+        self.assertEqual(self.search('组三 和10'), ['2026-01-03'])
+        self.assertEqual(self.search('组六 含9'), ['2026-01-05'])
+
+    def test_period_prefix(self):
+        self.assertEqual(self.search('2026-02'), ['2026-02-01'])
+        self.assertEqual(self.search('2026-01 123'), [])
+
+    def test_three_digit_period_prefix(self):
+        """三位数字按直选号码匹配，加“期”前缀才按期号前缀匹配"""
+        self.assertEqual(self.search('202'), [])
+        self.assertEqual(self.search('期202'), list(DRAWS))
+        self.assertEqual(self.search('p:2026-02'), ['2026-02-01'])
+        self.assertEqual(self.search('期202 123'), ['2026-02-01'])
+
+    def test_no_match(self):
+        self.assertEqual(self.search('和28'), [])
+
+    def test_group_keys(self):
+        self.assertEqual(len(GROUP_KEYS), 220)
+
+    def test_uses_index(self):
+        """各类条件都走索引，不做全表扫描"""
+        for query in ['312', '组123', '含5', '和10', '组三', '2026-01']:
+            plan = LotteryPeriod.objects.filter(build_search_filter(query)).explain()
+            self.assertIn('INDEX', plan, query)
+
+    def test_history_view_search(self):
+        response = self.client.get('/history/', {'q': '组123'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].paginator.count, 3)
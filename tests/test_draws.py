@@ -0,0 +1,148 @@
+"""
+进程内开奖历史快照测试
+
+运行: python manage.py test tests.test_draws
+"""
+import os
+from datetime import date, timedelta
+from unittest import mock
+
+import django
+import numpy as np
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from lottery import draws
+from lottery.draws import get_draws
+from lottery.ingest import ingest_records
+from lottery.models import LotteryPeriod
+from tests.factories import make_records
+
+
+@override_settings(PRECOMPUTE_ON_INGEST=False)
+class DrawSnapshotTest(TestCase):
+    """测试快照内容与窗口切片"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ingest_records(make_records(40), log=False)
+
+    def setUp(self):
+        draws.reset()
+
+    def test_matches_database(self):
+        snapshot = get_draws()
+        rows = list(LotteryPeriod.objects.order_by('seq').values_list('period', 'digit1', 'digit2', 'digit3'))
+        self.assertEqual(snapshot.digits.dtype, np.uint8)
+        self.assertEqual(snapshot.digits.shape, (40, 3))
+        self.assertEqual(snapshot.periods, [row[0] for row in rows])
+        self.assertEqual(snapshot.digits.tolist(), [list(row[1:]) for row in rows])
+        self.assertFalse(snapshot.digits.flags.writeable)
+
+    def test_windows_are_views(self):
+        snapshot = get_draws()
+        window = snapshot.latest_window(30)
+        self.assertEqual(len(window), 30)
+        self.assertTrue(np.shares_memory(window.digits, snapshot.digits))
+        self.assertEqual(window[-1].period, '2026-02-09')
+        self.assertIsNone(window.following)
+
+        before = snapshot.window_before('2026-02-05', 30)
+        self.assertEqual(before[0].period, '2026-01-06')
+        self.assertEqual(before[-1].period, '2026-02-04')
+        self.assertEqual(before.following.period, '2026-02-05')
+        self.assertEqual([d.period for d in before],
+                         [p.period for p in LotteryPeriod.objects.window_before('2026-02-05', 30)])
+
+        ending = snapshot.window_ending('2026-02-05', 30)
+        self.assertEqual(ending[-1].period, '2026-02-05')
+        self.assertIsNone(snapshot.window_ending('1999-01-01', 30))
+
+    def test_draw_fields(self):
+        draw = get_draws().latest()
+        period = LotteryPeriod.objects.get(period=draw.period)
+        self.assertEqual((draw.pk, draw.seq, draw.date), (period.pk, period.seq, period.date))
+        self.assertEqual((draw.sum_value, draw.shape), (period.sum_value, period.shape))
+
+    def test_unchanged_costs_one_query(self):
+        first = get_draws()
+        with self.assertNumQueries(1):
+            self.assertIs(get_draws(), first)
+
+
+@override_settings(PRECOMPUTE_ON_INGEST=False)
+class DrawRefreshTest(TestCase):
+    """测试入库后的增量刷新"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ingest_records(make_records(40), log=False)
+
+    def setUp(self):
+        draws.reset()
+        self.snapshot = get_draws()
+
+    def test_append(self):
+        ingest_records(make_records(2, start=date(2026, 2, 10)), log=False)
+        with mock.patch.object(draws, 'load_snapshot', wraps=draws.load_snapshot) as load:
+            snapshot = get_draws()
+        load.assert_not_called()
+        self.assertEqual(len(snapshot), 42)
+        self.assertEqual(snapshot.latest().period, '2026-02-11')
+        # 旧快照不受影响
+        self.assertEqual(len(self.snapshot), 40)
+
+    def test_correction_in_place(self):
+        ingest_records([{'period': '2026-01-05', 'date': '2026-01-05', 'numbers': [9, 9, 9]}], log=False)
+        with mock.patch.object(draws, 'load_snapshot', wraps=draws.load_snapshot) as load:
+            snapshot = get_draws()
+        load.assert_not_called()
+        self.assertEqual(snapshot.digits[snapshot.index['2026-01-05']].tolist(), [9, 9, 9])
+        self.assertNotEqual(self.snapshot.digits[self.snapshot.index['2026-01-05']].tolist(), [9, 9, 9])
+
+    def test_backfill_reloads(self):
+        ingest_records([{'period': '2025-12-31', 'date': '2025-12-31', 'numbers': [1, 1, 2]}], log=False)
+        snapshot = get_draws()
+        self.assertEqual(snapshot.periods[0], '2025-12-31')
+        self.assertEqual(snapshot.seqs, list(range(1, 42)))
+
+    def test_single_save_invalidates(self):
+        LotteryPeriod.objects.create(period='2026-02-10', date=date(2026, 2, 10),
+                                     digit1=1, digit2=2, digit3=3, sum_value=6, shape='组六')
+        self.assertEqual(get_draws().latest().period, '2026-02-10')
+
+    def test_change_from_other_process(self):
+        # 其他进程入库不会调用本进程的 invalidate，靠 (版本号, 最大序号) 发现
+        with mock.patch('lottery.ingest.invalidate_draws'):
+            ingest_records(make_records(1, start=date(2026, 2, 10)), log=False)
+        self.assertEqual(get_draws().latest().period, '2026-02-10')
+
+
+@override_settings(PRECOMPUTE_ON_INGEST=False)
+class DrawViewsTest(TestCase):
+    """测试特征页使用进程内开奖历史"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ingest_records(make_records(40), log=False)
+
+    def setUp(self):
+        draws.reset()
+        get_draws()
+
+    def test_feature_extraction(self):
+        url = reverse('lottery:feature_extraction', args=['2026-02-05'])
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        history = response.context['history_30']
+        self.assertEqual(history[0][0].period, '2026-01-06')
+        self.assertEqual(len(history), 30)
+
+    def test_feature_extraction_unknown_period(self):
+        response = self.client.get(reverse('lottery:feature_extraction', args=['1999-01-01']))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,228 @@
+"""
+服务器推送事件（SSE）测试
+
+运行: python manage.py test tests.test_events
+"""
+import asyncio
+import json
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from lottery import jobs
+from lottery.events import (PRUNE_EVERY, EventBus, apublish, format_event, latest_event_id, publish,
+                            sse_stream)
+from lottery.ingest import ingest_records
+from lottery.models import Event
+from lottery.prediction import arun_prediction, get_prediction_model, run_prediction
+from tests.factories import make_records
+
+
+def parse_frames(chunk: bytes):
+    """把 SSE 文本解析为 [(event, data)]，跳过注释和无事件的帧"""
+    frames = []
+    for block in chunk.decode().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line and not line.startswith(':'))
+        if 'event' in fields:
+            frames.append((fields['event'], json.loads(fields['data'])))
+    return frames
+
+
+class FormatTest(SimpleTestCase):
+    """测试消息帧"""
+
+    def test_format(self):
+        self.assertEqual(format_event(3, 'draw_ingested', {'added': 1}),
+                         b'id: 3\nevent: draw_ingested\ndata: {"added":1}\n\n')
+
+
+@override_settings(SSE_POLL_INTERVAL=0.01)
+class EventBusTest(TestCase):
+    """测试事件表轮询和订阅者分发"""
+
+    async def test_fan_out_and_filter(self):
+        bus = EventBus()
+        everything = await bus.subscribe()
+        only_jobs = await bus.subscribe(['job_progress'])
+        await apublish('draw_ingested', {'added': 1})
+        await apublish('job_progress', {'id': 1})
+
+        self.assertIn(b'draw_ingested', await asyncio.wait_for(everything.get(), 1))
+        self.assertIn(b'job_progress', await asyncio.wait_for(everything.get(), 1))
+        self.assertIn(b'job_progress', await asyncio.wait_for(only_jobs.get(), 1))
+        self.assertTrue(only_jobs.queue.empty())
+
+        everything.close()
+        only_jobs.close()
+        self.assertEqual(bus.subscriber_count, 0)
+
+    async def test_event_from_other_process(self):
+        """其它进程（run_jobs、scheduler）写入的事件由轮询读取，不需要本进程唤醒"""
+        bus = EventBus()
+        sub = await bus.subscribe()
+        event = await Event.objects.acreate(event='job_progress', data={'id': 7, 'status': 'running'})
+
+        message = await asyncio.wait_for(sub.get(), 1)
+        sub.close()
+        self.assertEqual(message, format_event(event.pk, 'job_progress', {'id': 7, 'status': 'running'}))
+
+    async def test_one_poll_per_loop(self):
+        bus = EventBus()
+        subs = [await bus.subscribe() for _ in range(3)]
+        self.assertEqual(len({sub.relay for sub in subs}), 1)
+        for sub in subs:
+            sub.close()
+        self.assertIsNone(subs[0].relay.task)
+
+    async def test_replay_after_last_event_id(self):
+        first = await apublish('draw_ingested', {'n': 1})
+        await apublish('draw_ingested', {'n': 2})
+
+        sub = await EventBus().subscribe(last_event_id=first)
+        message = sub.queue.get_nowait()
+        sub.close()
+        self.assertIn(b'"n":2', message)
+        self.assertTrue(sub.queue.empty())
+
+    @override_settings(SSE_HEARTBEAT=0.01)
+    async def test_stream_heartbeat_and_unsubscribe(self):
+        bus = EventBus()
+        last_id = await sync_to_async(latest_event_id)()
+        stream = sse_stream(await bus.subscribe())
+        handshake = await anext(stream)
+        ping = await anext(stream)
+        await stream.aclose()
+
+        self.assertEqual(handshake, b'retry: 3000\nid: %d\n\n' % last_id)
+        self.assertEqual(ping, b': ping\n\n')
+        self.assertEqual(bus.subscriber_count, 0)
+
+    @override_settings(SSE_QUEUE_SIZE=2)
+    async def test_slow_consumer_drops_oldest(self):
+        bus = EventBus()
+        sub = await bus.subscribe()
+        for n in range(5):
+            await apublish('job_progress', {'n': n})
+        for _ in range(100):
+            if sub.dropped == 3:
+                break
+            await asyncio.sleep(0.01)
+
+        messages = [sub.queue.get_nowait() for _ in range(sub.queue.qsize())]
+        sub.close()
+        self.assertEqual(sub.dropped, 3)
+        self.assertIn(b'"n":4', messages[-1])
+
+    @override_settings(SSE_EVENT_KEEP=10)
+    def test_old_events_pruned(self):
+        ids = [publish('job_progress', {'n': n}) for n in range(PRUNE_EVERY)]
+        pruned_at = next(event_id for event_id in ids if event_id % PRUNE_EVERY == 0)
+        self.assertEqual(Event.objects.order_by('id').first().pk, pruned_at - 10 + 1)
+
+    def test_rolled_back_event_not_published(self):
+        last_id = latest_event_id()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            publish('draw_ingested', {'added': 1})
+            raise RuntimeError
+        self.assertEqual(latest_event_id(), last_id)
+
+
+@override_settings(PRECOMPUTE_ON_INGEST=False)
+class PublishTest(TestCase):
+    """测试入库和后台任务发布事件"""
+
+    def events_since(self, last_id):
+        return [(event, data) for event, data in
+                Event.objects.filter(id__gt=last_id).values_list('event', 'data')]
+
+    def test_draw_ingested(self):
+        last_id = latest_event_id()
+        ingest_records([{'period': '2026-01-01', 'date': '2026-01-01', 'numbers': [1, 2, 3]}])
+        self.assertEqual(self.events_since(last_id), [('draw_ingested', {
+            'added': 1, 'updated': 0,
+            'latest': {'period': '2026-01-01', 'date': '2026-01-01', 'numbers': [1, 2, 3]},
+        })])
+
+    def test_unchanged_ingest_is_silent(self):
+        ingest_records([{'period': '2026-01-01', 'date': '2026-01-01', 'numbers': [1, 2, 3]}])
+        last_id = latest_event_id()
+        ingest_records([{'period': '2026-01-01', 'date': '2026-01-01', 'numbers': [1, 2, 3]}])
+        self.assertEqual(self.events_since(last_id), [])
+
+    def test_job_progress(self):
+        @jobs.register('test_events_job')
+        def handler(ctx):
+            ctx.progress(50, '一半')
+            return {}
+
+        self.addCleanup(jobs.JOB_HANDLERS.pop, 'test_events_job')
+        job = jobs.enqueue('test_events_job')
+        last_id = latest_event_id()
+        jobs.run_pending()
+
+        frames = [data for event, data in self.events_since(last_id) if data['id'] == job.pk]
+        self.assertEqual([(f['status'], f['progress']) for f in frames], [('running', 50.0), ('succeeded', 100.0)])
+
+    def assert_prediction_ready(self, last_id, response):
+        prediction = response['prediction']
+        self.assertEqual(self.events_since(last_id), [('prediction_ready', {
+            'period': prediction['period'], 'num_bets': 20,
+            'score': float(prediction['score']), 'should_bet': bool(prediction['should_bet']),
+        })])
+
+    def test_prediction_ready(self):
+        ingest_records(make_records(30), log=False)
+        last_id = latest_event_id()
+        self.assert_prediction_ready(last_id, run_prediction(20))
+
+    async def test_prediction_ready_async(self):
+        await sync_to_async(ingest_records)(make_records(30), log=False)
+        last_id = await sync_to_async(latest_event_id)()
+        model_entry = await sync_to_async(get_prediction_model)()
+        response = await arun_prediction(20, model_entry)
+        await sync_to_async(self.assert_prediction_ready)(last_id, response)
+
+
+class EventStreamViewTest(TestCase):
+    """测试 /api/events/ 接口"""
+
+    def test_unknown_event_type(self):
+        response = self.client.get(reverse('lottery:api_events'), {'events': 'draw_ingested,nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_wsgi_replays_missed_events(self):
+        last_id = publish('draw_ingested', {'added': 1})
+        publish('prediction_ready', {'period': '2026-01-02'})
+
+        response = self.client.get(reverse('lottery:api_events'), HTTP_LAST_EVENT_ID=str(last_id))
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content)
+        self.assertIn(b'retry: ', body)
+        self.assertEqual(parse_frames(body), [('prediction_ready', {'period': '2026-01-02'})])
+
+    @override_settings(SSE_POLL_INTERVAL=0.01)
+    async def test_asgi_stream(self):
+        response = await self.async_client.get(reverse('lottery:api_events'), {'events': 'draw_ingested'},
+                                               HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertNotIn('Content-Encoding', response)
+        chunks = aiter(response.streaming_content)
+        try:
+            handshake = await anext(chunks)
+            self.assertIn(b'retry: ', handshake)
+
+            await apublish('job_progress', {'id': 1})
+            await apublish('draw_ingested', {'added': 2})
+            message = await asyncio.wait_for(anext(chunks), 1)
+            self.assertEqual(parse_frames(message), [('draw_ingested', {'added': 2})])
+        finally:
+            await chunks.aclose()
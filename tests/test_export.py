@@ -0,0 +1,95 @@
+"""
+流式批量导出测试
+
+运行: python manage.py test tests.test_export
+"""
+import csv
+import io
+import json
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from lottery.ingest import ingest_records
+from lottery.models import BacktestResult
+from tests.factories import make_records
+
+
+@override_settings(EXPORT_DATABASE='default', EXPORT_CHUNK_SIZE=3)
+class ExportTest(TestCase):
+    """测试 /api/export/<dataset>/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ingest_records(make_records(), log=False)
+        BacktestResult.objects.create(
+            strategy_name='Top 10% Dynamic', start_period='2026-01-01', end_period='2026-01-03',
+            total_periods=3, starting_capital=10000, final_capital=9940, total_profit=-60,
+            roi_percentage=-0.6, max_drawdown=0.6, bet_periods=1, skip_periods=2, win_periods=0,
+            win_rate=0, total_invested=60, total_prizes=0, capital_history=[10000, 9940],
+            period_results=[
+                {'period': '2026-01-01', 'action': 'skip', 'capital': 10000},
+                {'period': '2026-01-02', 'action': 'bet', 'cost': 60, 'actual_numbers': [0, 1, 8]},
+                {'period': '2026-01-03', 'action': 'skip', 'capital': 9940},
+            ],
+        )
+
+    def export(self, dataset, **params):
+        response = self.client.get(reverse('lottery:api_export', args=[dataset]), params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_history_ndjson(self):
+        response, body = self.export('history')
+        rows = [json.loads(line) for line in body.splitlines()]
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[0]['period'], '2026-01-01')
+        self.assertEqual(rows[-1]['seq'], 10)
+
+    def test_history_since(self):
+        _, body = self.export('history', since='2026-01-07')
+        periods = [json.loads(line)['period'] for line in body.splitlines()]
+        self.assertEqual(periods, ['2026-01-08', '2026-01-09', '2026-01-10'])
+
+    def test_history_csv(self):
+        _, body = self.export('history', format='csv')
+        rows = list(csv.DictReader(io.StringIO(body.lstrip('\ufeff'))))
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[0]['shape'], '组六')
+
+    def test_backtest_periods(self):
+        _, body = self.export('backtests', format='csv', since='2026-01-01')
+        rows = list(csv.DictReader(io.StringIO(body.lstrip('\ufeff'))))
+        self.assertEqual([row['period'] for row in rows], ['2026-01-02', '2026-01-03'])
+        self.assertEqual(json.loads(rows[0]['actual_numbers']), [0, 1, 8])
+
+    def test_invalid_params(self):
+        url = reverse('lottery:api_export', args=['history'])
+        self.assertEqual(self.client.get(url, {'format': 'xml'}).status_code, 400)
+        url = reverse('lottery:api_export', args=['unknown'])
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+    async def test_asgi_streams_in_chunks(self):
+        """ASGI 下按批发送，而不是整体读入内存后一次发送"""
+        response = await self.async_client.get(reverse('lottery:api_export', args=['history']))
+
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        # EXPORT_CHUNK_SIZE=3：10 行分 4 批
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [3, 3, 3, 1])
+        rows = [json.loads(line) for line in b''.join(chunks).decode('utf-8').splitlines()]
+        self.assertEqual([row['seq'] for row in rows], list(range(1, 11)))
+
+    async def test_asgi_csv(self):
+        response = await self.async_client.get(reverse('lottery:api_export', args=['history']), {'format': 'csv'})
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode('utf-8')
+        rows = list(csv.DictReader(io.StringIO(body.lstrip('\ufeff'))))
+        self.assertEqual(len(rows), 10)
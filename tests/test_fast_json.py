@@ -0,0 +1,109 @@
+"""
+JSON 序列化与响应压缩测试
+
+运行: python manage.py test tests.test_fast_json
+"""
+import gzip
+import json
+import os
+from datetime import datetime
+from unittest import mock
+
+import django
+import numpy as np
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from lottery import responses
+from lottery.responses import CompressionMiddleware, FastJsonResponse, columnarize, dumps
+
+
+class DumpsTest(SimpleTestCase):
+    """测试 numpy 类型序列化"""
+
+    def payload(self):
+        probs = np.array([0.1, 0.2, 0.7], dtype=np.float32)
+        return {
+            'probs': probs,
+            'reversed': np.arange(5)[::-1],  # 非连续数组
+            'score': np.float64(55.65),
+            'count': np.int64(3),
+            'should_bet': np.bool_(True),
+            'time': datetime(2026, 1, 1, 9, 0),
+            'message': '建议投注',
+        }
+
+    def check(self, raw):
+        data = json.loads(raw)
+        self.assertEqual(len(data['probs']), 3)
+        self.assertAlmostEqual(data['probs'][2], 0.7, places=5)
+        self.assertEqual(data['reversed'], [4, 3, 2, 1, 0])
+        self.assertEqual(data['score'], 55.65)
+        self.assertEqual(data['count'], 3)
+        self.assertIs(data['should_bet'], True)
+        self.assertEqual(data['time'], '2026-01-01T09:00:00')
+        self.assertEqual(data['message'], '建议投注')
+
+    def test_numpy_types(self):
+        self.check(dumps(self.payload()))
+
+    def test_stdlib_fallback(self):
+        with mock.patch.object(responses, 'orjson', None):
+            self.check(dumps(self.payload()))
+
+    def test_utf8_output(self):
+        self.assertIn('建议投注'.encode('utf-8'), dumps({'m': '建议投注'}))
+
+
+class ColumnarTest(SimpleTestCase):
+    """测试列式编码"""
+
+    def test_large_lists_columnarized(self):
+        combos = [{'combo': [i, i, i], 'bets': i} for i in range(30)]
+        data = columnarize({'plan': {'combinations': combos}, 'top': [1, 2, 3]}, min_rows=20)
+        encoded = data['plan']['combinations']
+        self.assertEqual(encoded['columns'], ['combo', 'bets'])
+        self.assertEqual(encoded['rows'][5], [[5, 5, 5], 5])
+        self.assertEqual(data['top'], [1, 2, 3])
+
+    def test_small_or_mixed_lists_unchanged(self):
+        small = [{'a': 1}] * 3
+        mixed = [{'a': 1}] * 25 + [{'b': 2}]
+        self.assertEqual(columnarize(small, min_rows=20), small)
+        self.assertEqual(columnarize(mixed, min_rows=20), mixed)
+
+    def test_response(self):
+        response = FastJsonResponse({'rows': [{'a': i} for i in range(30)]}, columnar=True)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content)['rows']['columns'], ['a'])
+
+
+@override_settings(RESPONSE_COMPRESS_MIN_BYTES=1024)
+class CompressionTest(SimpleTestCase):
+    """测试响应压缩阈值"""
+
+    def run_middleware(self, response, accept='gzip'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda r: response)(request)
+
+    def test_large_response_gzipped(self):
+        body = {'rows': [{'combo': [1, 2, 3], 'bets': 5}] * 200}
+        response = self.run_middleware(FastJsonResponse(body))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content)), body)
+
+    def test_small_response_untouched(self):
+        response = self.run_middleware(HttpResponse(b'x' * 500))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_brotli_preferred_when_installed(self):
+        fake = mock.Mock()
+        fake.compress.return_value = b'br-data'
+        with mock.patch.object(responses, 'brotli', fake):
+            response = self.run_middleware(HttpResponse(b'x' * 2000), accept='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response.content, b'br-data')
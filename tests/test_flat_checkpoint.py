@@ -0,0 +1,148 @@
+"""
+内存映射推理检查点测试
+
+运行: python manage.py test tests.test_flat_checkpoint
+"""
+import os
+import struct
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import django
+import torch
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.test import SimpleTestCase
+
+# 添加src到路径
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from models import lottery_model
+from models.flat_checkpoint import file_sha256, flat_path_of, load_flat, read_metadata, save_flat
+from models.lottery_model import LotteryModel
+
+
+def outputs(model, x):
+    with torch.no_grad():
+        return model.eval()(x)
+
+
+class TempDirTestCase(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp_path = Path(tmp.name)
+
+    def assertSameOutputs(self, expected, actual):
+        self.assertTrue(all(torch.equal(expected[key], actual[key]) for key in expected))
+
+
+class FlatCheckpointTest(TempDirTestCase):
+    """测试平坦文件读写"""
+
+    def test_roundtrip(self):
+        tensors = {
+            'weight': torch.randn(3, 4),
+            'steps': torch.arange(5, dtype=torch.int64),
+            'mask': torch.tensor([True, False]),
+            'half': torch.randn(7).half(),
+            'empty': torch.empty(0, 2),
+        }
+        path = self.tmp_path / 'flat.safetensors'
+        save_flat(tensors, str(path), metadata={'version': 2})
+
+        loaded, metadata = load_flat(str(path))
+        self.assertEqual(metadata, {'version': '2'})
+        self.assertEqual(read_metadata(str(path)), {'version': '2'})
+        self.assertEqual(set(loaded), set(tensors))
+        for name, tensor in tensors.items():
+            self.assertEqual(loaded[name].dtype, tensor.dtype)
+            self.assertEqual(loaded[name].shape, tensor.shape)
+            self.assertTrue(torch.equal(loaded[name], tensor))
+
+    def test_truncated_file_rejected(self):
+        path = self.tmp_path / 'flat.safetensors'
+        save_flat({'weight': torch.randn(16)}, str(path))
+        data = path.read_bytes()
+        path.write_bytes(data[:-8])
+
+        with self.assertRaises(ValueError):
+            load_flat(str(path))
+
+        path.write_bytes(struct.pack('<Q', 1 << 20) + b'{}')
+        with self.assertRaises(ValueError):
+            load_flat(str(path))
+
+
+class LotteryModelFlatLoadTest(TempDirTestCase):
+    """测试 LotteryModel 自动使用推理检查点"""
+
+    def setUp(self):
+        super().setUp()
+        self.checkpoint = self.tmp_path / 'model.pth'
+        LotteryModel(hidden_dim=8, num_layers=1).save(str(self.checkpoint))
+
+    def record_load_flat(self):
+        """替换 lottery_model.load_flat，返回其调用记录 [(path, state_dict)]"""
+        calls = []
+
+        def recording_load_flat(path):
+            state, metadata = load_flat(path)
+            calls.append((path, state))
+            return state, metadata
+
+        patcher = mock.patch.object(lottery_model, 'load_flat', recording_load_flat)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return calls
+
+    def test_save_writes_flat_sibling(self):
+        flat_path = flat_path_of(self.checkpoint)
+        self.assertTrue(Path(flat_path).exists())
+        self.assertEqual(read_metadata(flat_path)['source_sha256'], file_sha256(str(self.checkpoint)))
+
+    def test_load_uses_mapped_weights(self):
+        calls = self.record_load_flat()
+        x = torch.randint(0, 10, (2, 30, 3))
+        reference = LotteryModel.load(str(self.checkpoint), mmap=False)
+        mapped = LotteryModel.load(str(self.checkpoint))
+
+        self.assertSameOutputs(outputs(reference, x), outputs(mapped, x))
+
+        # 参数直接引用映射内存，而不是复制
+        self.assertEqual(len(calls), 1)
+        state = calls[0][1]
+        for name, param in mapped.named_parameters():
+            self.assertEqual(param.data_ptr(), state[name].data_ptr())
+
+    def test_stale_flat_falls_back_to_pth(self):
+        stale = LotteryModel(hidden_dim=8, num_layers=1)
+        stale.save_flat(flat_path_of(self.checkpoint), source_sha256='0' * 64)
+
+        x = torch.randint(0, 10, (2, 30, 3))
+        expected = outputs(LotteryModel.load(str(self.checkpoint), mmap=False), x)
+        actual = outputs(LotteryModel.load(str(self.checkpoint)), x)
+        self.assertSameOutputs(expected, actual)
+
+    def test_load_flat_path_directly(self):
+        model = LotteryModel.load(flat_path_of(self.checkpoint))
+        self.assertEqual(model.config, LotteryModel.load(str(self.checkpoint), mmap=False).config)
+
+    def test_known_sha256_skips_rehash(self):
+        sha256 = file_sha256(str(self.checkpoint))
+        calls = self.record_load_flat()
+
+        def unexpected_hash(path):
+            raise AssertionError('不应重新计算哈希')
+
+        with mock.patch.object(lottery_model, 'file_sha256', unexpected_hash):
+            LotteryModel.load(str(self.checkpoint), sha256=sha256)
+            self.assertEqual([path for path, _ in calls], [flat_path_of(self.checkpoint)])
+
+            # 给出的哈希与推理检查点不一致时回退读取 .pth
+            LotteryModel.load(str(self.checkpoint), sha256='0' * 64)
+            self.assertEqual(len(calls), 1)
@@ -0,0 +1,218 @@
+"""
+多数据源对冲抓取测试
+
+使用本地HTTP服务模拟镜像源，并注入延迟/错误
+
+运行: python manage.py test tests.test_hedged_crawler
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.test import SimpleTestCase
+
+# 添加src到路径
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from data_loader.crawler_simple import SimpleLottery3DCrawler
+from data_loader.sources import HedgedFetcher, LatencyTracker, ListingSource
+
+
+LISTING_HTML = """
+<table>
+<tr><td>期号</td></tr>
+<tr><td>日期</td></tr>
+<tr><td>2026-02-05</td><td>2026-02-05</td><td><em>1</em><em>2</em><em>3</em></td><td>100</td><td>5</td></tr>
+<tr><td>2026-02-04</td><td>2026-02-04</td><td><em>4</em><em>5</em><em>6</em></td><td>100</td><td>5</td></tr>
+</table>
+"""
+
+
+def make_server(delay=0.0, status=200, body=LISTING_HTML):
+    """启动一个带注入延迟的本地列表页服务"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.server.hits += 1
+            time.sleep(delay)
+            payload = body.encode('utf-8')
+            try:
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.hits = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def build_fetcher(urls, **options):
+    crawler = SimpleLottery3DCrawler.__new__(SimpleLottery3DCrawler)
+    sources = [
+        ListingSource(f"source{i}", url, parser=crawler._parse_html_simple, timeout=5)
+        for i, url in enumerate(urls)
+    ]
+    options.setdefault('tracker', LatencyTracker())
+    return HedgedFetcher(sources, **options)
+
+
+class ServerTestCase(SimpleTestCase):
+    """每个测试按需启动本地列表页服务，结束时关闭"""
+
+    def servers(self, **kwargs):
+        server = make_server(**kwargs)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_address[1]}/list?page={{page}}", server
+
+    def output_dir(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        return tmp.name
+
+
+class HedgedFetcherTest(ServerTestCase):
+    """测试对冲抓取"""
+
+    def test_fast_primary_no_hedge(self):
+        """首选源足够快时不发送对冲请求"""
+        primary_url, primary = self.servers(delay=0.0)
+        mirror_url, mirror = self.servers(delay=0.0)
+        fetcher = build_fetcher([primary_url, mirror_url], initial_delay=1.0)
+
+        records = fetcher.fetch(1)
+
+        self.assertEqual([r['numbers'] for r in records], [[1, 2, 3], [4, 5, 6]])
+        self.assertEqual(primary.hits, 1)
+        self.assertEqual(mirror.hits, 0)
+
+    def test_slow_primary_hedges_to_mirror(self):
+        """首选源超过对冲等待时间后，取镜像源的结果"""
+        primary_url, primary = self.servers(delay=2.0)
+        mirror_url, mirror = self.servers(delay=0.0)
+        fetcher = build_fetcher([primary_url, mirror_url], initial_delay=0.1, min_delay=0.05)
+
+        start = time.perf_counter()
+        records = fetcher.fetch(1)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(records), 2)
+        self.assertEqual(mirror.hits, 1)
+        self.assertLess(elapsed, 1.0)
+
+    def test_failed_primary_switches_immediately(self):
+        """首选源报错时不等待对冲时间，立即请求下一个源"""
+        primary_url, _ = self.servers(status=500)
+        mirror_url, mirror = self.servers(delay=0.0)
+        fetcher = build_fetcher([primary_url, mirror_url], initial_delay=3.0, max_delay=3.0)
+
+        start = time.perf_counter()
+        records = fetcher.fetch(1)
+
+        self.assertEqual(len(records), 2)
+        self.assertEqual(mirror.hits, 1)
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+    def test_empty_parse_is_not_valid(self):
+        """解析为空的页面不算有效结果"""
+        primary_url, _ = self.servers(body='<html>维护中</html>')
+        mirror_url, _ = self.servers(delay=0.0)
+        fetcher = build_fetcher([primary_url, mirror_url])
+
+        self.assertEqual(len(fetcher.fetch(1)), 2)
+
+    def test_all_sources_fail(self):
+        """所有源都失败时返回None"""
+        urls = [self.servers(status=503)[0], self.servers(status=404)[0]]
+        fetcher = build_fetcher(urls)
+
+        self.assertIsNone(fetcher.fetch(1))
+
+    def test_hedge_delay_tracks_p95(self):
+        """对冲等待时间跟随延迟p95，并受上下限约束"""
+        tracker = LatencyTracker()
+        fetcher = build_fetcher(['http://127.0.0.1:1/{page}'], tracker=tracker,
+                                initial_delay=1.0, min_delay=0.05, max_delay=2.0, min_samples=5)
+        source = fetcher.sources[0]
+
+        self.assertEqual(fetcher.hedge_delay(source), 1.0)
+
+        for latency in [0.1] * 19 + [0.5]:
+            tracker.record(source.name, latency)
+        self.assertTrue(0.1 < fetcher.hedge_delay(source) < 0.5)
+
+        for _ in range(50):
+            tracker.record(source.name, 10.0)
+        self.assertEqual(fetcher.hedge_delay(source), 2.0)
+
+
+class CrawlerWithSourcesTest(ServerTestCase):
+    """测试爬虫接入多数据源"""
+
+    def test_crawl_uses_hedged_sources(self):
+        primary_url, _ = self.servers(delay=2.0)
+        mirror_url, mirror = self.servers(delay=0.0)
+
+        crawler = SimpleLottery3DCrawler(
+            output_dir=self.output_dir(),
+            max_workers=2,
+            sources=[{'name': 'slow', 'url': primary_url}, {'name': 'mirror', 'url': mirror_url}],
+            hedge_options={'initial_delay': 0.1, 'tracker': LatencyTracker()},
+        )
+        stats = crawler.crawl(start_page=1, end_page=2)
+
+        self.assertEqual(stats['failed_pages'], 0)
+        self.assertEqual(stats['total_records'], 4)
+        self.assertEqual(mirror.hits, 2)
+
+    def test_retries_when_all_sources_fail(self):
+        """所有数据源都失败时，整页按重试间隔重新抓取"""
+        mirror_url, _ = self.servers(delay=0.0)
+        crawler = SimpleLottery3DCrawler(
+            output_dir=self.output_dir(),
+            sources=[{'name': 'mirror', 'url': mirror_url}],
+            hedge_options={'tracker': LatencyTracker()},
+        )
+        crawler.RETRY_DELAY = 0
+        calls = []
+        original = crawler.fetcher.fetch
+
+        def flaky_fetch(page_num):
+            calls.append(page_num)
+            return None if len(calls) == 1 else original(page_num)
+
+        crawler.fetcher.fetch = flaky_fetch
+
+        self.assertEqual(len(crawler._fetch_page(1)), 2)
+        self.assertEqual(calls, [1, 1])
+
+    def test_gives_up_after_retries(self):
+        """重试次数用尽后放弃该页"""
+        primary_url, primary = self.servers(status=503)
+        crawler = SimpleLottery3DCrawler(
+            output_dir=self.output_dir(),
+            sources=[{'name': 'primary', 'url': primary_url}],
+            hedge_options={'tracker': LatencyTracker()},
+        )
+        crawler.RETRY_DELAY = 0
+
+        self.assertIsNone(crawler._fetch_page(1, retry=2))
+        self.assertEqual(primary.hits, 2)
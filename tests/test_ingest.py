@@ -0,0 +1,91 @@
+"""
+开奖数据批量入库测试
+
+运行: python manage.py test tests.test_ingest
+"""
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.test import TestCase
+
+from lottery.ingest import ingest_records, get_shape
+from lottery.models import LotteryPeriod, DataUpdateLog
+from tests.factories import make_records
+
+
+class IngestRecordsTest(TestCase):
+    """测试批量入库"""
+
+    def test_bulk_insert_new_records(self):
+        stats = ingest_records(make_records(count=10), chunk_size=3)
+
+        self.assertEqual(stats, {'added': 10, 'updated': 0, 'unchanged': 0, 'total': 10})
+        self.assertEqual(LotteryPeriod.objects.count(), 10)
+
+        period = LotteryPeriod.objects.get(period='2026-01-04')
+        self.assertEqual(period.numbers, [4, 2, 8])
+        self.assertEqual(period.sum_value, 14)
+        self.assertEqual(period.shape, '组六')
+
+    def test_diff_against_existing(self):
+        ingest_records(make_records(count=5), log=False)
+
+        records = make_records(count=8)
+        records[0]['numbers'] = [7, 7, 7]  # 修正已有一期
+
+        stats = ingest_records(records)
+
+        self.assertEqual(stats, {'added': 3, 'updated': 1, 'unchanged': 4, 'total': 8})
+        corrected = LotteryPeriod.objects.get(period='2026-01-01')
+        self.assertEqual(corrected.shape, '豹子')
+        self.assertEqual(corrected.sum_value, 21)
+
+    def test_query_count_is_constant(self):
+        """写入行数增加时查询次数不随行数增长"""
+        ingest_records(make_records(count=20), log=False)
+
+        records = make_records(count=28)
+        for record in records[:10]:
+            record['numbers'] = [1, 1, 2]
+
+        # 比对1次 + 末期序号1次 + 事务开始/结束 + 插入1批 + 更新1批 + 推送事件（保存点内1次）+ 日志1次
+        with self.assertNumQueries(10):
+            ingest_records(records, chunk_size=500)
+
+    def test_duplicate_periods_last_wins(self):
+        records = make_records(count=1) + make_records(count=1, numbers=[3, 3, 9])
+        stats = ingest_records(records, log=False)
+
+        self.assertEqual(stats['added'], 1)
+        self.assertEqual(LotteryPeriod.objects.get().numbers, [3, 3, 9])
+
+    def test_update_log_written(self):
+        ingest_records(make_records(count=4), update_type='manual')
+
+        log = DataUpdateLog.objects.get()
+        self.assertEqual(log.update_type, 'manual')
+        self.assertEqual(log.periods_added, 4)
+        self.assertEqual(log.status, 'success')
+
+    def test_seq_appended_in_draw_order(self):
+        ingest_records(make_records(start_day=1, count=5), log=False)
+        ingest_records(make_records(start_day=6, count=3)[::-1], log=False)
+
+        periods = list(LotteryPeriod.objects.order_by('seq').values_list('period', 'seq'))
+        self.assertEqual(periods, [(f'2026-01-{d:02d}', d) for d in range(1, 9)])
+
+    def test_backfill_resequences(self):
+        ingest_records(make_records(start_day=5, count=4), log=False)
+        ingest_records(make_records(start_day=1, count=4), log=False)
+
+        periods = list(LotteryPeriod.objects.order_by('seq').values_list('period', 'seq'))
+        self.assertEqual(periods, [(f'2026-01-{d:02d}', d) for d in range(1, 9)])
+
+    def test_get_shape(self):
+        self.assertEqual(get_shape([1, 1, 1]), '豹子')
+        self.assertEqual(get_shape([1, 2, 1]), '组三')
+        self.assertEqual(get_shape([1, 2, 3]), '组六')
@@ -0,0 +1,241 @@
+"""
+后台任务队列测试
+
+运行: python manage.py test tests.test_jobs
+"""
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+
+from lottery.jobs import (
+    JOB_HANDLERS, JobError, cancel, claim_next, clean_params, enqueue, fail_stale_jobs, register, run_pending,
+)
+from lottery.models import BacktestResult, DataUpdateLog, Job, LotteryPeriod
+from tests.factories import make_records
+
+
+@register('test_steps')
+def steps_job(ctx, steps=3):
+    for i in range(steps):
+        ctx.progress(i * 100 / steps, f'第{i + 1}步')
+    return {'steps': steps}
+
+
+@override_settings(PRECOMPUTE_ON_INGEST=False)
+class JobQueueTest(TestCase):
+    """测试入队、领取、进度与取消"""
+
+    def test_enqueue_and_run(self):
+        job = enqueue('test_steps', steps=4)
+        self.assertEqual(job.status, 'pending')
+
+        self.assertEqual(run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(job.result, {'steps': 4})
+        self.assertIsNotNone(job.finished_at)
+
+    def test_unknown_kind_rejected(self):
+        with self.assertRaises(JobError):
+            enqueue('no_such_job')
+
+    def test_claim_is_exclusive(self):
+        job = enqueue('test_steps')
+        self.assertEqual(claim_next('worker-a').pk, job.pk)
+        self.assertIsNone(claim_next('worker-b'))
+
+    def test_jobs_run_in_order(self):
+        first = enqueue('test_steps')
+        enqueue('test_steps')
+        self.assertEqual(claim_next('worker').pk, first.pk)
+
+    def test_cancel_pending_job(self):
+        job = enqueue('test_steps')
+        self.assertEqual(cancel(job.pk).status, 'cancelled')
+        self.assertEqual(run_pending(), 0)
+
+    def test_cancel_running_job_stops_at_next_progress(self):
+        job = enqueue('test_steps', steps=5)
+
+        def cancel_midway(ctx, steps):
+            ctx.progress(10)
+            cancel(ctx.job.pk)
+            ctx.progress(20)
+            return {'steps': steps}
+
+        with mock.patch.dict(JOB_HANDLERS, {'test_steps': cancel_midway}):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'cancelled')
+        self.assertEqual(job.progress, 10)
+
+    def test_failure_recorded(self):
+        job = enqueue('test_steps', steps='x')
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertTrue(job.error)
+
+    def test_stale_running_job_failed(self):
+        job = enqueue('test_steps')
+        claim_next('dead-worker')
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(fail_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+
+@override_settings(PRECOMPUTE_ON_INGEST=False)
+class JobApiTest(TestCase):
+    """测试爬虫/运行任务接口入队与 /api/jobs/<id>/ 状态查询"""
+
+    def test_crawl_enqueues_job(self):
+        response = self.client.post('/api/crawl/')
+        self.assertEqual(response.status_code, 202)
+        data = response.json()
+        self.assertEqual(data['status'], 'queued')
+        self.assertEqual(LotteryPeriod.objects.count(), 0)
+
+        with mock.patch('lottery.ingest.crawl_records', return_value=make_records(3)):
+            run_pending()
+
+        job = self.client.get(data['status_url']).json()['job']
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['result']['added'], 3)
+        self.assertEqual(LotteryPeriod.objects.count(), 3)
+
+    def test_crawl_failure_logged(self):
+        data = self.client.post('/api/crawl/').json()
+        with mock.patch('lottery.ingest.crawl_records', side_effect=RuntimeError('爬取数据失败')):
+            run_pending()
+
+        job = self.client.get(data['status_url']).json()['job']
+        self.assertEqual(job['status'], 'failed')
+        self.assertEqual(job['error'], '爬取数据失败')
+        self.assertEqual(DataUpdateLog.objects.get().status, 'failed')
+
+    def test_run_task_enqueues_job(self):
+        response = self.client.post('/api/run-task/', data=json.dumps({'task_id': 'daily_opportunity_check'}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(pk=response.json()['job_id'])
+        self.assertEqual(job.params, {'task_id': 'daily_opportunity_check'})
+
+    def test_run_task_unknown(self):
+        data = self.client.post('/api/run-task/', data=json.dumps({'task_id': 'nope'}),
+                                content_type='application/json').json()
+        self.assertEqual(data['status'], 'error')
+        self.assertFalse(Job.objects.exists())
+
+    def setUp(self):
+        self.staff = User.objects.create_user('admin', password='pw', is_staff=True)
+        self.client.force_login(self.staff)
+
+    def post_job(self, kind, **params):
+        return self.client.post('/api/jobs/', data=json.dumps({'kind': kind, 'params': params}),
+                                content_type='application/json')
+
+    def test_import_backtest_job(self):
+        payload = {
+            'summary': {
+                'total_periods': 2, 'starting_capital': 1000, 'final_capital': 1100, 'total_profit': 100,
+                'roi_percentage': 10.0, 'max_drawdown': 0, 'bet_periods': 1, 'skip_periods': 1,
+                'win_periods': 1, 'win_rate': 1.0, 'total_invested': 200, 'total_prizes': 300,
+                'capital_history': [1000, 1100],
+            },
+            'period_results': [
+                {'period': '2026-01-02', 'action': 'bet', 'profit': 100},
+                {'period': '2026-01-01', 'action': 'skip', 'profit': 0},
+            ],
+        }
+        results = tempfile.TemporaryDirectory()
+        self.addCleanup(results.cleanup)
+        path = os.path.join(results.name, 'backtest.json')
+        with open(path, 'w') as f:
+            json.dump(payload, f)
+
+        with self.settings(JOB_RESULTS_DIR=results.name):
+            response = self.post_job('import_backtest', result_file=path)
+            self.assertEqual(response.status_code, 202)
+            run_pending()
+
+        job = Job.objects.get(pk=response.json()['job_id'])
+        self.assertEqual(job.status, 'succeeded')
+        backtest = BacktestResult.objects.get(pk=job.result['backtest_id'])
+        self.assertEqual(len(backtest.period_results), 2)
+
+    def test_import_backtest_confined_to_results_dir(self):
+        """只能读取 results/ 目录下的 JSON 文件"""
+        results = tempfile.TemporaryDirectory()
+        self.addCleanup(results.cleanup)
+        outside = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+        outside.close()
+        self.addCleanup(os.remove, outside.name)
+        link = os.path.join(results.name, 'link.json')
+        os.symlink(outside.name, link)
+
+        with self.settings(JOB_RESULTS_DIR=results.name):
+            for result_file in (outside.name, os.path.join(results.name, '..', 'x.json'), link,
+                                os.path.join(results.name, 'notes.txt'), 123):
+                response = self.post_job('import_backtest', result_file=result_file)
+                self.assertEqual(response.status_code, 400, result_file)
+        self.assertFalse(Job.objects.exists())
+
+    def test_crawl_params_validated(self):
+        with self.settings(JOB_CRAWL_MAX_PAGES=10):
+            self.assertEqual(self.post_job('crawl', end_page=10000).status_code, 400)
+            self.assertEqual(self.post_job('crawl', start_page=5, end_page=2).status_code, 400)
+            self.assertEqual(self.post_job('crawl', end_page='x').status_code, 400)
+            # 不在白名单的参数
+            self.assertEqual(self.post_job('crawl', update_type='manual').status_code, 400)
+            response = self.post_job('crawl', start_page='2', end_page=4)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Job.objects.get().params, {'start_page': 2, 'end_page': 4})
+
+    def test_internal_kind_not_submittable(self):
+        """未注册 clean 函数的任务类型不能通过接口提交"""
+        self.assertEqual(self.post_job('test_steps', steps=1).status_code, 400)
+        with self.assertRaises(JobError):
+            clean_params('test_steps', {})
+
+    def test_requires_staff(self):
+        self.client.logout()
+        self.assertEqual(self.post_job('crawl').status_code, 403)
+        job = enqueue('test_steps')
+        self.assertEqual(self.client.post(f'/api/jobs/{job.pk}/cancel/').status_code, 403)
+
+        self.client.force_login(User.objects.create_user('user', password='pw'))
+        self.assertEqual(self.post_job('crawl').status_code, 403)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_requires_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.staff)
+        response = client.post('/api/jobs/', data=json.dumps({'kind': 'crawl'}), content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Job.objects.exists())
+
+    def test_create_job_unknown_kind(self):
+        response = self.client.post('/api/jobs/', data=json.dumps({'kind': 'nope'}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_cancel_endpoint(self):
+        job = enqueue('test_steps')
+        data = self.client.post(f'/api/jobs/{job.pk}/cancel/').json()
+        self.assertEqual(data['job']['status'], 'cancelled')
+
+    def test_status_not_found(self):
+        self.assertEqual(self.client.get('/api/jobs/999/').status_code, 404)
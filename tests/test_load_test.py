@@ -0,0 +1,83 @@
+"""
+负载测试工具（tools/benchmarks/load_test.py）测试
+
+运行: python manage.py test tests.test_load_test
+"""
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+
+from lottery.ingest import ingest_records
+from tools.benchmarks.load_test import (
+    Endpoint, Samples, compare, parse_server_timing, render, run_endpoint, summarize, synthetic_draws,
+)
+
+
+def make_result(**fields):
+    result = {'requests': 100, 'errors': 0, 'rps': 100.0, 'p50_ms': 5.0, 'p90_ms': 8.0,
+              'p99_ms': 10.0, 'max_ms': 12.0, 'server_ms': 4.0, 'queries': 2}
+    result.update(fields)
+    return {'meta': {}, 'endpoints': {'index': result}}
+
+
+class LoadTestHelpersTest(SimpleTestCase):
+    """测试统计与基线对比"""
+
+    def test_parse_server_timing(self):
+        header = 'db;dur=1.20;desc="3 queries", app;dur=4.00, total;dur=5.20'
+        self.assertEqual(parse_server_timing(header), (3, 5.2))
+        self.assertEqual(parse_server_timing(None), (None, None))
+
+    def test_summarize(self):
+        samples = Samples(latencies=[i / 1000 for i in range(1, 101)], server_ms=[1.0, 3.0],
+                          queries=[2, 2, 3], errors=2, elapsed=2.0)
+        summary = summarize(samples)
+        self.assertEqual(summary['requests'], 102)
+        self.assertEqual(summary['rps'], 50.0)
+        self.assertAlmostEqual(summary['p50_ms'], 50.5)
+        self.assertEqual(summary['max_ms'], 100.0)
+        self.assertEqual(summary['queries'], 2)
+        self.assertIsNone(summarize(Samples(errors=1))['p99_ms'])
+
+    def test_render(self):
+        body = render({'as_of': ['{as_of}', None], 'num_bets': [20]}, {'as_of': '2026-01-01'})
+        self.assertEqual(body, {'as_of': ['2026-01-01', None], 'num_bets': [20]})
+
+    def test_compare(self):
+        baseline = make_result()
+        self.assertEqual(compare(baseline, make_result(p99_ms=11.0), 0.2), [])
+        regressions = compare(baseline, make_result(p99_ms=13.0, rps=70.0, queries=3, errors=1), 0.2)
+        self.assertEqual(len(regressions), 4)
+        # 基线中没有的接口跳过
+        self.assertEqual(compare({'endpoints': {}}, make_result(), 0.2), [])
+
+    def test_synthetic_draws_reproducible(self):
+        self.assertEqual(synthetic_draws(5, seed=1), synthetic_draws(5, seed=1))
+        self.assertNotEqual(synthetic_draws(50, seed=1), synthetic_draws(50, seed=2))
+
+
+@override_settings(PRECOMPUTE_ON_INGEST=False)
+class RunEndpointTest(LiveServerTestCase):
+    """测试对本地服务施压"""
+
+    def setUp(self):
+        ingest_records(synthetic_draws(40, seed=0), log=False)
+
+    def test_collects_latency_and_queries(self):
+        period = synthetic_draws(40, seed=0)[20]['period']
+        endpoint = Endpoint('period_detail', '/history/{period}/')
+        samples = run_endpoint(self.live_server_url, endpoint, {'period': period}, concurrency=2, total=6, warmup=1)
+
+        self.assertEqual(samples.errors, 0)
+        self.assertEqual(len(samples.latencies), 6)
+        self.assertEqual(len(samples.queries), 6)
+
+    def test_counts_errors(self):
+        endpoint = Endpoint('period_detail', '/history/{period}/')
+        samples = run_endpoint(self.live_server_url, endpoint, {'period': '1999-01-01'}, concurrency=2, total=4, warmup=0)
+        self.assertEqual(samples.errors, 4)
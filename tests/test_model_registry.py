@@ -0,0 +1,109 @@
+"""
+模型注册表测试
+
+运行: python manage.py test tests.test_model_registry
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import django
+import torch
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.test import SimpleTestCase
+
+# 添加src到路径
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from models import flat_checkpoint, lottery_model, registry as registry_module
+from models.lottery_model import LotteryModel
+from models.registry import ModelRegistry
+
+
+class ModelRegistryTest(SimpleTestCase):
+    """测试进程级模型注册表"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.checkpoint = Path(tmp.name) / 'model.pth'
+        LotteryModel(hidden_dim=8, num_layers=1).save(str(self.checkpoint))
+
+        # 记录 LotteryModel.load 的调用
+        self.loads = []
+        original = LotteryModel.load.__func__
+
+        def counting_load(cls, path, device='cpu', **kwargs):
+            self.loads.append(path)
+            return original(cls, path, device=device, **kwargs)
+
+        patcher = mock.patch.object(LotteryModel, 'load', classmethod(counting_load))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_loads_once(self):
+        registry = ModelRegistry()
+
+        first = registry.get(self.checkpoint)
+        second = registry.get(self.checkpoint)
+
+        self.assertIs(first, second)
+        self.assertFalse(first.training)
+        self.assertEqual(len(self.loads), 1)
+
+    def test_hashes_checkpoint_once(self):
+        hashed = []
+
+        def counting_sha256(path):
+            hashed.append(path)
+            return flat_checkpoint.file_sha256(path)
+
+        with mock.patch.object(registry_module, 'file_sha256', counting_sha256), \
+                mock.patch.object(lottery_model, 'file_sha256', counting_sha256):
+            ModelRegistry().get(self.checkpoint)
+
+        self.assertEqual(hashed, [str(self.checkpoint)])
+
+    def test_touch_without_change_keeps_model(self):
+        registry = ModelRegistry()
+        model = registry.get(self.checkpoint)
+        sha = registry.get_entry(self.checkpoint).sha256
+
+        stat = os.stat(self.checkpoint)
+        os.utime(self.checkpoint, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+
+        self.assertIs(registry.get(self.checkpoint), model)
+        self.assertEqual(registry.get_entry(self.checkpoint).sha256, sha)
+        self.assertEqual(len(self.loads), 1)
+
+    def test_reloads_when_checkpoint_changes(self):
+        registry = ModelRegistry()
+        old_entry = registry.get_entry(self.checkpoint)
+
+        new_model = LotteryModel(hidden_dim=8, num_layers=1)
+        with torch.no_grad():
+            for param in new_model.parameters():
+                param.fill_(0.01)
+        new_model.save(str(self.checkpoint))
+        stat = os.stat(self.checkpoint)
+        os.utime(self.checkpoint, ns=(stat.st_atime_ns, old_entry.mtime_ns + 10_000_000))
+
+        new_entry = registry.get_entry(self.checkpoint)
+
+        self.assertIsNot(new_entry.model, old_entry.model)
+        self.assertNotEqual(new_entry.sha256, old_entry.sha256)
+        self.assertEqual(len(self.loads), 2)
+
+    def test_configures_thread_count(self):
+        previous = torch.get_num_threads()
+        try:
+            registry = ModelRegistry(num_threads=1)
+            registry.get(self.checkpoint)
+            self.assertEqual(torch.get_num_threads(), 1)
+        finally:
+            torch.set_num_threads(previous)
@@ -11,7 +11,8 @@ sys.path.insert(0, '/c1/program/lottery_3d_predict')
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
 django.setup()
 
-from lottery.views import generate_prediction, calculate_opportunity_score, generate_betting_plan
+from lottery.views import generate_prediction
+from lottery.prediction import calculate_opportunity_score, generate_betting_plan
 from lottery.models import LotteryPeriod
 from django.test import RequestFactory
 import numpy as np
@@ -0,0 +1,137 @@
+"""
+开奖序号与窗口查询测试
+
+运行: python manage.py test tests.test_period_window
+"""
+import os
+from datetime import date, timedelta
+from unittest import mock
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from lottery.ingest import ingest_records
+from lottery.models import LotteryPeriod, LotteryPeriodManager
+
+
+class WindowQueryTest(TestCase):
+    """测试 window_before / latest_window"""
+
+    @classmethod
+    def setUpTestData(cls):
+        start = date(2025, 1, 1)
+        records = []
+        for i in range(60):
+            day = (start + timedelta(days=i)).strftime('%Y-%m-%d')
+            records.append({'period': day, 'date': day, 'numbers': [i % 10, (i * 3) % 10, (i * 7) % 10]})
+        ingest_records(records, log=False)
+
+    def test_window_before_instance(self):
+        target = LotteryPeriod.objects.get(period='2025-02-15')
+
+        with self.assertNumQueries(1):
+            window = LotteryPeriod.objects.window_before(target, 30)
+
+        self.assertEqual(len(window), 30)
+        self.assertEqual(window[0].period, '2025-01-16')
+        self.assertEqual(window[-1].period, '2025-02-14')
+
+    def test_window_before_period_string(self):
+        with self.assertNumQueries(1):
+            window = LotteryPeriod.objects.window_before('2025-01-11', 30)
+
+        # 之前只有10期
+        self.assertEqual([p.period for p in window][:2], ['2025-01-01', '2025-01-02'])
+        self.assertEqual(len(window), 10)
+
+    def test_window_before_with_seq_gaps(self):
+        """删除过期次后序号有空缺，仍返回 n 期"""
+        LotteryPeriod.objects.filter(period__in=['2025-02-01', '2025-02-02']).delete()
+        target = LotteryPeriod.objects.get(period='2025-02-15')
+
+        window = LotteryPeriod.objects.window_before(target, 30)
+
+        self.assertEqual(len(window), 30)
+        self.assertEqual(window[0].period, '2025-01-14')
+        self.assertEqual(window[-1].period, '2025-02-14')
+
+    def test_window_before_unsequenced_instance(self):
+        """未编号的期次按 (开奖日期, 期号) 取窗口"""
+        target = LotteryPeriod.objects.get(period='2025-02-15')
+        target.seq = None
+
+        window = LotteryPeriod.objects.window_before(target, 3)
+
+        self.assertEqual([p.period for p in window], ['2025-02-12', '2025-02-13', '2025-02-14'])
+
+    def test_latest_window(self):
+        window = LotteryPeriod.objects.latest_window(5)
+        self.assertEqual([p.period for p in window],
+                         ['2025-02-25', '2025-02-26', '2025-02-27', '2025-02-28', '2025-03-01'])
+
+    def test_create_appends_seq(self):
+        obj = LotteryPeriod.objects.create(
+            period='2025-03-02', date=date(2025, 3, 2),
+            digit1=1, digit2=2, digit3=3, sum_value=6, shape='组六',
+        )
+        self.assertEqual(obj.seq, 61)
+
+    def test_create_backfill_keeps_draw_order(self):
+        """补录早于末期的开奖时按开奖时间重排序号"""
+        obj = LotteryPeriod.objects.create(
+            period='2024-12-31', date=date(2024, 12, 31),
+            digit1=1, digit2=2, digit3=3, sum_value=6, shape='组六',
+        )
+
+        self.assertEqual(obj.seq, 1)
+        seqs = list(LotteryPeriod.objects.order_by('date').values_list('seq', flat=True))
+        self.assertEqual(seqs, list(range(1, 62)))
+        self.assertEqual(LotteryPeriod.objects.latest_window(1)[0].period, '2025-03-01')
+        window = LotteryPeriod.objects.window_before('2025-01-02', 5)
+        self.assertEqual([p.period for p in window], ['2024-12-31', '2025-01-01'])
+
+    def test_seq_is_unique(self):
+        obj = LotteryPeriod.objects.get(period='2025-03-01')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            LotteryPeriod.objects.filter(pk=obj.pk).update(seq=1)
+
+    def test_create_retries_taken_seq(self):
+        """取号后被并发写入抢占时重新取号"""
+        with mock.patch.object(LotteryPeriodManager, 'next_seq', side_effect=[60, 61]):
+            obj = LotteryPeriod.objects.create(
+                period='2025-03-02', date=date(2025, 3, 2),
+                digit1=1, digit2=2, digit3=3, sum_value=6, shape='组六',
+            )
+        self.assertEqual(obj.seq, 61)
+
+    def test_create_duplicate_period_not_retried(self):
+        with mock.patch.object(LotteryPeriodManager, 'next_seq', return_value=61) as next_seq:
+            with self.assertRaises(IntegrityError):
+                LotteryPeriod.objects.create(
+                    period='2025-03-01', date=date(2025, 3, 1),
+                    digit1=1, digit2=2, digit3=3, sum_value=6, shape='组六',
+                )
+        self.assertEqual(next_seq.call_count, 1)
+
+    def test_resequence_with_unique_seq(self):
+        """补录历史后整体重排不会触发唯一约束"""
+        ingest_records([{'period': '2024-12-31', 'date': '2024-12-31', 'numbers': [1, 2, 3]}], log=False)
+
+        seqs = list(LotteryPeriod.objects.order_by('date').values_list('seq', flat=True))
+        self.assertEqual(seqs, list(range(1, 62)))
+
+    def test_period_detail_view_queries(self):
+        """详情页不再加载整张表"""
+        with self.assertNumQueries(3):
+            response = self.client.get('/history/2025-02-15/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['history_30']), 30)
+
+    def test_feature_view_insufficient_history(self):
+        response = self.client.get('/features/2025-01-20/')
+        self.assertEqual(response.context['error'], '历史数据不足30期')
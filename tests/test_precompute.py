@@ -0,0 +1,72 @@
+"""
+入库后预计算测试
+
+运行: python manage.py test tests.test_precompute
+"""
+import os
+from unittest import mock
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from lottery.ingest import ingest_records
+from lottery.models import Prediction
+from lottery.prediction import get_prediction
+from tests.factories import make_records
+
+
+@override_settings(PRECOMPUTE_IN_BACKGROUND=False)
+class PrecomputeOnIngestTest(TestCase):
+    """测试新开奖入库后预计算下一期预测"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_ingest_precomputes_prediction(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_records(make_records(30), log=False)
+
+        prediction = Prediction.objects.get()
+        self.assertEqual(prediction.period.period, '2026-01-30')
+        self.assertIn(prediction.recommendation, ('bet', 'no_bet'))
+        self.assertEqual(prediction.strategy, 'opportunity')
+        self.assertTrue(prediction.recommendation_reason)
+
+        # /api/predict/ 直接命中预计算结果
+        result = get_prediction(100)
+        self.assertTrue(result['cached'])
+        self.assertEqual(Prediction.objects.count(), 1)
+
+    def test_latest_recommendation_served_without_compute(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_records(make_records(30), log=False)
+
+        with mock.patch('lottery.prediction.get_prediction_model') as loader:
+            data = self.client.get('/api/betting/latest-recommendation/').json()
+        loader.assert_not_called()
+        self.assertEqual(data['status'], 'success')
+        self.assertEqual(data['recommendation']['current_period'], '2026-01-30')
+
+    def test_no_new_periods_no_precompute(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_records(make_records(30), log=False)
+        with mock.patch('lottery.prediction.precompute_next_prediction') as precompute:
+            with self.captureOnCommitCallbacks(execute=True):
+                ingest_records(make_records(30), log=False)
+        precompute.assert_not_called()
+
+    def test_insufficient_history_skipped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_records(make_records(count=5), log=False)
+        self.assertFalse(Prediction.objects.exists())
+
+    @override_settings(PRECOMPUTE_ON_INGEST=False)
+    def test_disabled(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_records(make_records(30), log=False)
+        self.assertFalse(Prediction.objects.exists())
@@ -0,0 +1,102 @@
+"""
+预测接口延迟目标与降级测试
+
+运行: python manage.py test tests.test_predict_deadline
+"""
+import asyncio
+import json
+import os
+from unittest import mock
+
+import django
+import numpy as np
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from lottery import draws, prediction
+from lottery.draws import get_draws
+from lottery.ingest import ingest_records
+from lottery.models import Prediction
+from lottery.prediction import aget_prediction, fallback_prediction, last_good_key
+from tests.factories import make_records
+
+
+def slow(result, delay=0.2):
+    """替换 _aget_fresh：延迟后返回固定结果"""
+    async def fresh(num_bets):
+        await asyncio.sleep(delay)
+        return result
+    return fresh
+
+
+@override_settings(PRECOMPUTE_ON_INGEST=False, PREDICT_DEADLINE=0.05)
+class PredictDeadlineTest(TestCase):
+    """测试超时后返回过期结果或降级预测"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ingest_records(make_records(40), log=False)
+
+    def setUp(self):
+        cache.clear()
+        draws.reset()
+
+    async def test_fast_path_unchanged(self):
+        with mock.patch.object(prediction, '_aget_fresh', slow({'cached': False}, delay=0)):
+            self.assertEqual(await aget_prediction(100), {'cached': False})
+
+    async def test_stale_result(self):
+        latest = (await draws.aget_draws()).latest()
+        await cache.aset(last_good_key(latest.period, 100), {'prediction': {'period': 'old'}, 'cached': False})
+
+        with mock.patch.object(prediction, '_aget_fresh', slow({'cached': False})):
+            result = await aget_prediction(100)
+
+        self.assertTrue(result['stale'])
+        self.assertTrue(result['cached'])
+        self.assertEqual(result['prediction'], {'period': 'old'})
+
+    async def test_fallback_and_background_completion(self):
+        done = asyncio.Event()
+
+        async def fresh(num_bets):
+            await asyncio.sleep(0.2)
+            done.set()
+            return {'cached': False}
+
+        with mock.patch.object(prediction, '_aget_fresh', fresh):
+            result = await aget_prediction(20)
+            self.assertTrue(result['fallback'])
+            self.assertFalse(result['prediction']['should_bet'])
+            self.assertEqual(result['prediction']['betting_plan']['num_bets'], 20)
+            self.assertEqual(await Prediction.objects.acount(), 0)
+
+            # 超时不取消计算，完成后才从后台集合移除
+            self.assertEqual(len(prediction._background), 1)
+            await asyncio.wait_for(done.wait(), 1)
+            await asyncio.sleep(0)
+            self.assertEqual(len(prediction._background), 0)
+
+    async def test_deadline_argument(self):
+        with mock.patch.object(prediction, '_aget_fresh', slow({'cached': False}, delay=0.1)):
+            self.assertEqual(await aget_prediction(100, deadline=1), {'cached': False})
+
+    async def test_api_deadline_ms(self):
+        with mock.patch.object(prediction, '_aget_fresh', slow({'cached': False})):
+            response = await self.async_client.post('/api/predict/', data=json.dumps({'num_bets': 20, 'deadline_ms': 10}),
+                                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['fallback'])
+
+    def test_fallback_probabilities(self):
+        snapshot = get_draws()
+        result = fallback_prediction(snapshot, 10)
+        counts = np.bincount(snapshot.latest_window(prediction.FALLBACK_WINDOW).digits.ravel(), minlength=10)
+        # 出现次数最多的数字排在最前（可能并列）
+        self.assertEqual(counts[result['prediction']['top10_digits'][0]], counts.max())
+        self.assertEqual(result['prediction']['recommendation'], '继续观望')
+        self.assertIn('降级', result['message'])
@@ -0,0 +1,154 @@
+"""
+预测结果缓存与请求合并测试
+
+运行: python manage.py test tests.test_prediction_cache
+"""
+import json
+import os
+import threading
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from lottery.ingest import ingest_records
+from lottery.models import Prediction
+from lottery.prediction import get_prediction
+from lottery.singleflight import SingleFlight
+from tests.factories import make_records
+
+
+# 首次加载模型可能超过延迟目标，这里验证完整计算路径
+@override_settings(PREDICT_DEADLINE=None)
+class PredictionCacheTest(TestCase):
+    """测试按数据版本缓存预测结果"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ingest_records(make_records(count=30), log=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_repeat_request_served_from_cache(self):
+        first = get_prediction(100)
+        second = get_prediction(100)
+
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(first['prediction'], second['prediction'])
+        self.assertEqual(Prediction.objects.count(), 1)
+
+    def test_cache_hit_skips_pipeline_queries(self):
+        get_prediction(100)
+        # 仅查询最新期号
+        with self.assertNumQueries(1):
+            get_prediction(100)
+
+    def test_num_bets_is_part_of_key(self):
+        get_prediction(50)
+        get_prediction(100)
+        self.assertEqual(Prediction.objects.count(), 2)
+
+    def test_new_draw_invalidates(self):
+        before = get_prediction(100)
+        ingest_records(make_records(start_day=31, count=1), log=False)
+        after = get_prediction(100)
+
+        self.assertFalse(after['cached'])
+        self.assertNotEqual(before['prediction']['period'], after['prediction']['period'])
+        self.assertEqual(Prediction.objects.count(), 2)
+
+    def test_evicted_cache_does_not_duplicate_row(self):
+        get_prediction(100)
+        cache.clear()
+        get_prediction(100)
+        self.assertEqual(Prediction.objects.count(), 1)
+
+    def test_cache_key_unique_across_processes(self):
+        """进程内缓存不共享，同一结果键由数据库唯一约束保证只有一条"""
+        get_prediction(100)
+        row = Prediction.objects.get()
+
+        row.pk = None
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            row.save()
+
+        # 未设置结果键的记录不受限制
+        row.cache_key = ''
+        row.save()
+        row.pk = None
+        row.save()
+        self.assertEqual(Prediction.objects.count(), 3)
+
+    def test_api_endpoint(self):
+        response = self.client.post('/api/predict/', data=json.dumps({'num_bets': 20}),
+                                    content_type='application/json')
+        data = response.json()
+        self.assertEqual(data['status'], 'success')
+        self.assertIn('betting_plan', data['prediction'])
+
+
+class SingleFlightTest(SimpleTestCase):
+    """测试请求合并"""
+
+    def test_concurrent_calls_share_one_computation(self):
+        flight = SingleFlight()
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'value': 42}
+
+        def worker():
+            results.append(flight.do('key', compute))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([r[0] for r in results], [{'value': 42}] * 8)
+        self.assertEqual(sum(1 for _, leader in results if leader), 1)
+        self.assertFalse(flight.in_flight('key'))
+
+    def test_error_propagates_to_waiters(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        errors = []
+
+        def compute():
+            started.set()
+            time.sleep(0.1)
+            raise ValueError('boom')
+
+        def leader():
+            try:
+                flight.do('key', compute)
+            except ValueError as e:
+                errors.append(e)
+
+        def follower():
+            started.wait()
+            try:
+                flight.do('key', lambda: 'unused')
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=leader), threading.Thread(target=follower)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(errors), 2)
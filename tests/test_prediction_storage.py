@@ -0,0 +1,162 @@
+"""
+预测记录二进制存储与归档清理测试
+
+运行: python manage.py test tests.test_prediction_storage
+"""
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from lottery.ingest import ingest_records
+from lottery.models import LotteryPeriod, Prediction, pack_floats, unpack_floats
+from lottery.retention import compact_predictions, model_hash
+from lottery.versioning import get_data_version
+
+
+def make_prediction(period, cache_key='', days_ago=0, **fields):
+    pred = Prediction.objects.create(
+        period=period, predicted_for_period='next', top5_digits=[1, 2, 3, 4, 5],
+        digit_probs=[i / 10 for i in range(10)], attention_weights=[1 / 30] * 30,
+        confidence_score=0.5, cache_key=cache_key, **fields,
+    )
+    if days_ago:
+        Prediction.objects.filter(pk=pred.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+    return pred
+
+
+class BlobStorageTest(TestCase):
+    """测试概率/注意力权重的二进制读写和旧字段兼容"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ingest_records([{'period': '2026-01-01', 'date': '2026-01-01', 'numbers': [1, 2, 3]}])
+        cls.period = LotteryPeriod.objects.get()
+
+    def test_round_trip(self):
+        pred = make_prediction(self.period)
+        pred = Prediction.objects.get(pk=pred.pk)
+        self.assertEqual(len(pred.digit_probs_blob), 40)
+        self.assertEqual(len(pred.attention_blob), 60)
+        for stored, expected in zip(pred.digit_probs, [i / 10 for i in range(10)]):
+            self.assertAlmostEqual(stored, expected, places=6)
+        for stored in pred.attention_weights:
+            self.assertAlmostEqual(stored, 1 / 30, places=3)
+
+    def test_empty_values(self):
+        self.assertIsNone(pack_floats(None, 'f'))
+        self.assertIsNone(unpack_floats(b'', 'f'))
+        pred = Prediction.objects.create(period=self.period, predicted_for_period='next',
+                                         top5_digits=[], confidence_score=0)
+        pred = Prediction.objects.get(pk=pred.pk)
+        self.assertIsNone(pred.digit_probs)
+        self.assertIsNone(pred.attention_weights)
+
+    def test_legacy_fields(self):
+        pred = make_prediction(self.period, should_bet=True, bet_amount=20,
+                               recommended_bets=[{'combo': [1, 2, 3]}])
+        pred = Prediction.objects.get(pk=pred.pk)
+        self.assertEqual(pred.recommendation, 'bet')
+        self.assertEqual(pred.total_cost, 20)
+        self.assertTrue(pred.should_bet)
+        self.assertEqual(pred.bet_amount, 20)
+        self.assertEqual(pred.recommended_bets, [{'combo': [1, 2, 3]}])
+
+
+class RetentionTest(TestCase):
+    """测试旧预测记录归档与清理"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ingest_records([
+            {'period': '2026-01-01', 'date': '2026-01-01', 'numbers': [1, 2, 3]},
+            {'period': '2026-01-02', 'date': '2026-01-02', 'numbers': [4, 5, 6]},
+        ])
+        cls.first, cls.second = LotteryPeriod.objects.order_by('seq')
+
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+        override = override_settings(PREDICTION_ARCHIVE_DIR=self.archive_dir, PREDICTION_RETENTION_DAYS=30)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_model_hash(self):
+        self.assertEqual(model_hash('predict:2026-01-01:abcdef:100'), 'abcdef')
+        self.assertEqual(model_hash(''), '')
+
+    def test_keeps_latest_per_period_and_model(self):
+        old_a = make_prediction(self.first, 'predict:2026-01-01:aaa:50', days_ago=60)
+        kept_a = make_prediction(self.first, 'predict:2026-01-01:aaa:100', days_ago=40)
+        kept_b = make_prediction(self.first, 'predict:2026-01-01:bbb:100', days_ago=50)
+        recent = make_prediction(self.second, 'predict:2026-01-02:aaa:50', days_ago=1)
+        kept_recent = make_prediction(self.second, 'predict:2026-01-02:aaa:100')
+
+        stats = compact_predictions()
+
+        self.assertEqual(stats['archived'], 1)
+        self.assertEqual(set(Prediction.objects.values_list('pk', flat=True)),
+                         {kept_a.pk, kept_b.pk, recent.pk, kept_recent.pk})
+        self.assertFalse(Prediction.objects.filter(pk=old_a.pk).exists())
+
+    def test_bumps_data_version_once(self):
+        """删除 N 条只递增一次数据版本号（而不是每行一次）"""
+        for days_ago in range(60, 65):
+            make_prediction(self.first, f'predict:2026-01-01:aaa:{days_ago}', days_ago=days_ago)
+        make_prediction(self.first, 'predict:2026-01-01:aaa:100', days_ago=40)
+
+        before = get_data_version()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            stats = compact_predictions(batch_size=2)
+
+        self.assertEqual(stats['archived'], 5)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(get_data_version(), before + 1)
+
+    def test_archive_contents(self):
+        old = make_prediction(self.first, 'predict:2026-01-01:aaa:50', days_ago=60)
+        make_prediction(self.first, 'predict:2026-01-01:aaa:100', days_ago=40)
+
+        stats = compact_predictions()
+
+        self.assertEqual(len(stats['files']), 1)
+        self.assertTrue(stats['files'][0].endswith('.ndjson.gz'))
+        with gzip.open(stats['files'][0], 'rt', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], old.pk)
+        self.assertEqual(rows[0]['period'], '2026-01-01')
+        self.assertEqual(len(rows[0]['digit_probs']), 10)
+        self.assertEqual(len(rows[0]['attention_weights']), 30)
+
+    def test_dry_run(self):
+        make_prediction(self.first, 'predict:2026-01-01:aaa:50', days_ago=60)
+        make_prediction(self.first, 'predict:2026-01-01:aaa:100', days_ago=40)
+
+        stats = compact_predictions(dry_run=True)
+
+        self.assertEqual(stats['candidates'], 1)
+        self.assertEqual(stats['archived'], 0)
+        self.assertEqual(Prediction.objects.count(), 2)
+        self.assertEqual(os.listdir(self.archive_dir), [])
+
+    def test_command(self):
+        make_prediction(self.first, 'predict:2026-01-01:aaa:50', days_ago=10)
+        make_prediction(self.first, 'predict:2026-01-01:aaa:100', days_ago=5)
+
+        call_command('compact_predictions', verbosity=0)
+        self.assertEqual(Prediction.objects.count(), 2)
+
+        call_command('compact_predictions', '--older-than-days', '7', verbosity=0)
+        self.assertEqual(Prediction.objects.count(), 1)
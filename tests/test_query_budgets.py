@@ -0,0 +1,124 @@
+"""
+请求剖析与视图查询预算测试
+
+运行: python manage.py test tests.test_query_budgets
+"""
+import json
+import os
+from unittest import mock
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from lottery.draws import get_draws
+from lottery.ingest import ingest_records
+from lottery.models import BacktestResult, LotteryPeriod, Prediction
+from lottery.profiling import QueryBudgetExceeded
+from tests.factories import make_records
+
+
+def seed():
+    ingest_records(make_records(40), log=True)
+    latest = LotteryPeriod.objects.order_by('-seq').first()
+    for i in range(15):
+        Prediction.objects.create(
+            period=latest, predicted_for_period=f'P{i}', top5_digits=[1, 2, 3, 4, 5], digit_probs=[0.1] * 10,
+            confidence_score=0.5, recommendation='bet' if i % 2 else 'no_bet',
+            betting_combinations=[{'combo': [1, 2, 3], 'bets': 1}], total_cost=2, bet_count=1,
+        )
+    return BacktestResult.objects.create(
+        strategy_name='Top 10% Dynamic', start_period='2026-01-01', end_period='2026-01-30',
+        total_periods=30, starting_capital=10000, final_capital=9000, total_profit=-1000,
+        roi_percentage=-10.0, max_drawdown=10.0, bet_periods=10, skip_periods=20, win_periods=1,
+        win_rate=0.1, total_invested=1000, total_prizes=0,
+        period_results=[{'period': '2026-01-01', 'action': 'bet'}], capital_history=[10000, 9000],
+    )
+
+
+@override_settings(PRECOMPUTE_ON_INGEST=False)
+class ProfilingMiddlewareTest(TestCase):
+    """测试 Server-Timing 响应头"""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('lottery:history_list'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('app;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    @override_settings(PROFILE_TRACEMALLOC=True)
+    def test_peak_allocation(self):
+        response = self.client.get(reverse('lottery:history_list'))
+        self.assertIn('mem;desc="peak', response['Server-Timing'])
+
+    def test_async_view_queries_counted(self):
+        body = json.dumps({'scenarios': [{'as_of': 'no-such-period', 'num_bets': 10}]})
+        with mock.patch('lottery.views.get_prediction_model', return_value=None):
+            response = self.client.post(reverse('lottery:api_predict_batch'), data=body,
+                                        content_type='application/json')
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
+
+    def test_structured_log(self):
+        with self.assertLogs('lottery.profiling', level='INFO') as logs:
+            self.client.get(reverse('lottery:history_list'))
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['view'], 'lottery:history_list')
+        self.assertGreater(record['queries'], 0)
+        self.assertIn('slowest_sql', record)
+
+    @override_settings(QUERY_BUDGETS={'lottery:history_list': 0}, QUERY_BUDGET_RAISE=True)
+    def test_budget_exceeded_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('lottery:history_list'))
+
+    @override_settings(QUERY_BUDGETS={'lottery:history_list': 0}, QUERY_BUDGET_RAISE=False)
+    def test_budget_exceeded_logged(self):
+        with self.assertLogs('lottery.profiling', level='WARNING'):
+            self.client.get(reverse('lottery:history_list'))
+
+
+@override_settings(PRECOMPUTE_ON_INGEST=False, QUERY_BUDGET_RAISE=True)
+class ViewQueryBudgetTest(TestCase):
+    """各视图的 SQL 条数不超过 settings.QUERY_BUDGETS（缓存为空时）"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.backtest = seed()
+
+    def setUp(self):
+        cache.clear()
+        # 与生产环境一致：进程启动时已加载开奖历史（lottery.draws.warm_up）
+        get_draws()
+
+    def test_budgets(self):
+        urls = {
+            'lottery:index': reverse('lottery:index'),
+            'lottery:dashboard': reverse('lottery:dashboard'),
+            'lottery:history_list': reverse('lottery:history_list') + '?page=2',
+            'lottery:period_detail': reverse('lottery:period_detail', args=['2026-02-09']),
+            'lottery:predictions_list': reverse('lottery:predictions_list'),
+            'lottery:backtest_detail': reverse('lottery:backtest_detail', args=[self.backtest.pk]),
+            'lottery:api_backtest_series': reverse('lottery:api_backtest_series', args=[self.backtest.pk]),
+            'lottery:api_latest_recommendation': reverse('lottery:api_latest_recommendation'),
+            'lottery:api_recommendation_history': reverse('lottery:api_recommendation_history'),
+        }
+        self.assertEqual(set(urls), set(settings.QUERY_BUDGETS))
+        for view_name, url in urls.items():
+            with self.subTest(view=view_name):
+                cache.clear()
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,51 @@
+"""
+SQLite 连接配置测试
+
+运行: python manage.py test tests.test_sqlite_profile
+"""
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
+django.setup()
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from lottery.db import build_pragmas, is_read_only
+
+
+class BuildPragmasTest(SimpleTestCase):
+    """测试 PRAGMA 语句生成"""
+
+    profile = {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'cache_size': -64000}
+
+    def test_read_write_connection(self):
+        self.assertEqual(build_pragmas(self.profile), [
+            'PRAGMA journal_mode=WAL',
+            'PRAGMA synchronous=NORMAL',
+            'PRAGMA cache_size=-64000',
+        ])
+
+    def test_read_only_connection(self):
+        statements = build_pragmas(self.profile, read_only=True)
+        self.assertNotIn('PRAGMA journal_mode=WAL', statements)
+        self.assertEqual(statements[-1], 'PRAGMA query_only=ON')
+
+    def test_is_read_only(self):
+        self.assertTrue(is_read_only({'NAME': 'file:/srv/db.sqlite3?mode=ro'}))
+        self.assertFalse(is_read_only({'NAME': '/srv/db.sqlite3'}))
+
+
+class ConnectionProfileTest(TestCase):
+    """测试新建连接时应用 SQLITE_PROFILE"""
+
+    def test_pragmas_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -64000)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
@@ -129,7 +129,7 @@ def backtest_from_database(model_path, num_bets=100, test_periods=200, threshold
     
     # 获取数据
     print("\n[2] 从数据库加载数据...")
-    all_periods = list(LotteryPeriod.objects.all().order_by('period'))
+    all_periods = list(LotteryPeriod.objects.using('analytics').order_by('seq'))
     print(f"✓ 加载 {len(all_periods)} 期数据")
     print(f"  时间范围: {all_periods[0].period} ~ {all_periods[-1].period}")
     
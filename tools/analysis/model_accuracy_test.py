@@ -141,7 +141,7 @@ def test_model_accuracy(
     
     # 加载数据
     print("加载历史数据...")
-    all_periods = list(LotteryPeriod.objects.all().order_by('period'))
+    all_periods = list(LotteryPeriod.objects.using('analytics').order_by('seq'))
     total_periods = len(all_periods)
     
     if total_periods < window_size + test_periods:
@@ -278,7 +278,7 @@ def backtest_selective_strategy(
     
     # 加载数据
     print("加载数据...")
-    all_periods = list(LotteryPeriod.objects.all().order_by('period'))
+    all_periods = list(LotteryPeriod.objects.using('analytics').order_by('seq'))
     total_periods = len(all_periods)
     
     if total_periods < window_size + test_periods:
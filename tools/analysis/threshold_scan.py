@@ -216,7 +216,7 @@ def threshold_scan(model_path, min_threshold=50, max_threshold=75, step=2,
     
     # 加载数据
     print("\n[2] 加载数据...")
-    all_periods = list(LotteryPeriod.objects.all().order_by('period'))
+    all_periods = list(LotteryPeriod.objects.using('analytics').order_by('seq'))
     print(f"✓ 加载 {len(all_periods)} 期数据")
     
     # 扫描参数
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Web/API 负载测试
+
+生成指定规模的模拟数据库（开奖 + 预测记录），用该库启动本地服务（默认 uvicorn ASGI），
+对 lottery/urls.py 中的页面和接口逐个施加并发请求，统计每个接口的
+p50/p90/p99 延迟、吞吐量、错误数，以及 Server-Timing 响应头中的服务端耗时和 SQL 条数。
+
+结果可保存为基线 JSON，之后的运行与基线对比：p99 变慢或吞吐下降超过 --tolerance、
+SQL 条数增加时标记为回归，并以退出码 1 结束（便于在 CI 中使用）。
+
+模拟库缓存在 --workdir 中，期数/预测条数/随机种子不变时直接复用，保证多次运行可比；
+数据库与正式库分离，不会修改 db.sqlite3。
+
+使用示例:
+    python tools/benchmarks/load_test.py
+    python tools/benchmarks/load_test.py --draws 20000 --concurrency 16 --requests 500
+    python tools/benchmarks/load_test.py --endpoints period_detail,api_predict --server wsgi
+    python tools/benchmarks/load_test.py --save results/benchmarks/load_baseline.json
+    python tools/benchmarks/load_test.py --compare results/benchmarks/load_baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import requests
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+SETTINGS_MODULE = 'loadtest_settings'
+
+SETTINGS_TEMPLATE = '''"""负载测试使用的设置（由 tools/benchmarks/load_test.py 生成）"""
+from lottery_web.settings import *  # noqa
+
+DEBUG = False
+DATABASES['default']['NAME'] = {db!r}
+DATABASES['analytics']['NAME'] = {analytics!r}
+PRECOMPUTE_ON_INGEST = False
+JOBS_INPROCESS_WORKER = False
+LOGGING = {{'version': 1, 'disable_existing_loggers': False,
+            'root': {{'handlers': [], 'level': 'WARNING'}}}}
+'''
+
+
+@dataclass
+class Endpoint:
+    """一个被测接口；path/body 中的 {period}、{since}、{as_of} 由模拟库的期号填充"""
+    name: str
+    path: str
+    method: str = 'GET'
+    body: Optional[Dict] = None
+    # 预热请求使用的请求体（默认同 body）
+    warmup_body: Optional[Dict] = None
+
+
+ENDPOINTS = [
+    Endpoint('index', '/'),
+    Endpoint('dashboard', '/dashboard/'),
+    Endpoint('history_list', '/history/?page=20'),
+    Endpoint('history_search', '/history/?q=和10 组六'),
+    Endpoint('period_detail', '/history/{period}/'),
+    Endpoint('feature_extraction', '/features/{period}/'),
+    Endpoint('predictions_list', '/predictions/'),
+    # 预热时等待完整计算（首次加载模型会超过延迟目标），测量的是缓存命中路径
+    Endpoint('api_predict', '/api/predict/', 'POST', {'num_bets': 100},
+             warmup_body={'num_bets': 100, 'deadline_ms': 60000}),
+    Endpoint('api_predict_batch', '/api/predict/batch/', 'POST', {'as_of': ['{as_of}', None], 'num_bets': [20, 100]}),
+    Endpoint('api_latest_recommendation', '/api/betting/latest-recommendation/'),
+    Endpoint('api_recommendation_history', '/api/betting/recommendation-history/?page_size=50'),
+    Endpoint('api_export_history', '/api/export/history/?since={since}'),
+]
+
+
+# ==================== 模拟数据库 ====================
+
+def write_settings(workdir: Path, db_path: Path):
+    """生成指向模拟库的设置模块"""
+    (workdir / f'{SETTINGS_MODULE}.py').write_text(SETTINGS_TEMPLATE.format(
+        db=str(db_path), analytics=f'file:{db_path}?mode=ro'), encoding='utf-8')
+
+
+def synthetic_draws(count: int, seed: int) -> List[Dict]:
+    """count 期模拟开奖，每天一期，最后一期为昨天"""
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=count)
+    records = []
+    for i in range(count):
+        day = (start + timedelta(days=i)).strftime('%Y-%m-%d')
+        records.append({'period': day, 'date': day, 'numbers': [rng.randint(0, 9) for _ in range(3)]})
+    return records
+
+
+def seed_database(draws: int, predictions: int, seed: int):
+    """迁移并写入模拟数据（需已按模拟库配置 Django）"""
+    from django.core.management import call_command
+    from lottery.ingest import ingest_records
+    from lottery.models import LotteryPeriod, Prediction
+
+    call_command('migrate', verbosity=0)
+    ingest_records(synthetic_draws(draws, seed), update_type='manual', log=False)
+
+    rng = np.random.default_rng(seed)
+    periods = list(LotteryPeriod.objects.order_by('-seq')[:predictions])
+    batch = []
+    for period in periods:
+        probs = rng.dirichlet(np.ones(10))
+        should_bet = bool(rng.random() < 0.2)
+        batch.append(Prediction(
+            period=period, predicted_for_period=period.period,
+            top5_digits=np.argsort(probs)[::-1][:5].tolist(),
+            digit_probs=probs.tolist(), attention_weights=rng.dirichlet(np.ones(30)).tolist(),
+            confidence_score=float(rng.random()), recommendation='bet' if should_bet else 'no_bet',
+            strategy='opportunity', total_cost=200 if should_bet else 0, bet_count=100 if should_bet else 0,
+        ))
+    Prediction.objects.bulk_create(batch, batch_size=500)
+
+
+def prepare_database(args) -> Dict:
+    """
+    准备模拟库并配置本进程的 Django，返回用于填充接口路径的期号
+
+    期数/预测条数/种子与上次相同时复用已有的库（--reseed 强制重建）。
+    """
+    workdir = Path(args.workdir).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    db_path = workdir / 'loadtest.sqlite3'
+    marker = workdir / 'seed.json'
+    spec = {'draws': args.draws, 'predictions': args.predictions, 'seed': args.seed}
+
+    write_settings(workdir, db_path)
+    sys.path.insert(0, str(workdir))
+    os.environ['DJANGO_SETTINGS_MODULE'] = SETTINGS_MODULE
+    import django
+    django.setup()
+
+    reuse = db_path.exists() and not args.reseed and marker.exists() and json.loads(marker.read_text()) == spec
+    if not reuse:
+        for suffix in ('', '-wal', '-shm'):
+            Path(f'{db_path}{suffix}').unlink(missing_ok=True)
+        print(f"生成模拟库: {args.draws}期开奖, {args.predictions}条预测 -> {db_path}")
+        started = time.perf_counter()
+        seed_database(args.draws, args.predictions, args.seed)
+        marker.write_text(json.dumps(spec))
+        print(f"  完成，用时 {time.perf_counter() - started:.1f}秒")
+    else:
+        print(f"复用模拟库: {db_path}")
+
+    from django.db import connections
+    from lottery.models import LotteryPeriod
+    periods = list(LotteryPeriod.objects.order_by('seq').values_list('period', flat=True))
+    connections.close_all()
+    return {
+        'period': periods[len(periods) // 2],
+        'since': periods[max(len(periods) - 200, 0)],
+        'as_of': periods[-2],
+    }
+
+
+# ==================== 本地服务 ====================
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, workdir: Path, port: int) -> subprocess.Popen:
+    """启动本地服务，输出写入 workdir/server.log"""
+    if args.server == 'asgi':
+        command = [sys.executable, '-m', 'uvicorn', 'lottery_web.asgi:application',
+                   '--host', '127.0.0.1', '--port', str(port), '--workers', str(args.workers),
+                   '--log-level', 'warning', '--no-access-log']
+    else:
+        command = [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{port}', '--noreload']
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': SETTINGS_MODULE,
+        'PYTHONPATH': os.pathsep.join([str(workdir), str(project_root), os.environ.get('PYTHONPATH', '')]),
+    }
+    log = open(workdir / 'server.log', 'w')
+    return subprocess.Popen(command, cwd=project_root, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_until_ready(base_url: str, proc: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'服务启动失败（退出码 {proc.returncode}），见 server.log')
+        try:
+            requests.get(base_url + '/api/betting/latest-recommendation/', timeout=2)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError(f'服务 {timeout} 秒内未就绪')
+
+
+# ==================== 施压与统计 ====================
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+SERVER_TIMING_TOTAL = re.compile(r'total;dur=([\d.]+)')
+
+
+def parse_server_timing(header: str):
+    """Server-Timing 响应头 -> (SQL 条数, 服务端总耗时 ms)；缺少时为 None"""
+    queries = SERVER_TIMING_QUERIES.search(header or '')
+    total = SERVER_TIMING_TOTAL.search(header or '')
+    return (int(queries.group(1)) if queries else None,
+            float(total.group(1)) if total else None)
+
+
+@dataclass
+class Samples:
+    """一个接口的原始测量"""
+    latencies: List[float] = field(default_factory=list)
+    server_ms: List[float] = field(default_factory=list)
+    queries: List[int] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+
+def summarize(samples: Samples) -> Dict:
+    """延迟分位数（ms）、吞吐量（请求/秒）、服务端耗时和 SQL 条数中位数"""
+    latencies = np.array(samples.latencies) * 1000
+    ok = len(latencies)
+
+    def pct(q):
+        return round(float(np.percentile(latencies, q)), 2) if ok else None
+
+    return {
+        'requests': ok + samples.errors,
+        'errors': samples.errors,
+        'rps': round(ok / samples.elapsed, 1) if samples.elapsed else 0.0,
+        'p50_ms': pct(50),
+        'p90_ms': pct(90),
+        'p99_ms': pct(99),
+        'max_ms': round(float(latencies.max()), 2) if ok else None,
+        'server_ms': round(float(np.median(samples.server_ms)), 2) if samples.server_ms else None,
+        'queries': int(np.median(samples.queries)) if samples.queries else None,
+    }
+
+
+def render(value, params: Dict):
+    """把 {period} 等占位符替换为模拟库中的期号"""
+    if isinstance(value, str):
+        return value.format(**params)
+    if isinstance(value, list):
+        return [render(v, params) for v in value]
+    if isinstance(value, dict):
+        return {k: render(v, params) for k, v in value.items()}
+    return value
+
+
+def run_endpoint(base_url: str, endpoint: Endpoint, params: Dict, concurrency: int,
+                 total: int, warmup: int = 3, timeout: float = 30) -> Samples:
+    """
+    对一个接口施压：先顺序预热 warmup 次（不计入），再由 concurrency 个客户端线程
+    各自使用长连接发出共 total 个请求
+    """
+    url = base_url + render(endpoint.path, params)
+    body = render(endpoint.body, params)
+    warmup_body = render(endpoint.warmup_body, params) if endpoint.warmup_body else body
+    samples = Samples()
+    lock = threading.Lock()
+    remaining = [total]
+
+    def send(session, payload=body):
+        start = time.perf_counter()
+        response = session.request(endpoint.method, url, json=payload, timeout=timeout)
+        return response, time.perf_counter() - start
+
+    with requests.Session() as session:
+        for _ in range(warmup):
+            try:
+                send(session, warmup_body)
+            except requests.RequestException:
+                pass
+
+    def client():
+        with requests.Session() as session:
+            while True:
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                try:
+                    response, elapsed = send(session)
+                except requests.RequestException:
+                    with lock:
+                        samples.errors += 1
+                    continue
+                queries, server_ms = parse_server_timing(response.headers.get('Server-Timing'))
+                with lock:
+                    if response.status_code >= 400:
+                        samples.errors += 1
+                        continue
+                    samples.latencies.append(elapsed)
+                    if queries is not None:
+                        samples.queries.append(queries)
+                    if server_ms is not None:
+                        samples.server_ms.append(server_ms)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    samples.elapsed = time.perf_counter() - started
+    return samples
+
+
+# ==================== 基线对比 ====================
+
+def compare(baseline: Dict, current: Dict, tolerance: float) -> List[str]:
+    """
+    与基线逐接口对比，返回回归说明
+
+    p99 延迟超过基线 (1 + tolerance) 倍、吞吐低于基线 (1 - tolerance) 倍、
+    SQL 条数增加或出现新的错误时视为回归；基线中没有的接口跳过。
+    """
+    regressions = []
+    for name, now in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if before is None:
+            continue
+        if before['p99_ms'] and now['p99_ms'] and now['p99_ms'] > before['p99_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {before['p99_ms']:.2f}ms -> {now['p99_ms']:.2f}ms")
+        if before['rps'] and now['rps'] < before['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: 吞吐 {before['rps']:.1f} -> {now['rps']:.1f} 请求/秒")
+        if before['queries'] is not None and now['queries'] is not None and now['queries'] > before['queries']:
+            regressions.append(f"{name}: SQL {before['queries']} -> {now['queries']} 条")
+        if now['errors'] > before['errors']:
+            regressions.append(f"{name}: 错误 {before['errors']} -> {now['errors']}")
+    return regressions
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def format_ms(value) -> str:
+    return f'{value:.2f}' if value is not None else '-'
+
+
+def print_row(name: str, r: Dict, before: Optional[Dict] = None):
+    line = (f"{name:<28}{r['requests']:>7}{r['errors']:>6}{r['rps']:>9.1f}{format_ms(r['p50_ms']):>10}"
+            f"{format_ms(r['p90_ms']):>10}{format_ms(r['p99_ms']):>10}{format_ms(r['server_ms']):>10}"
+            f"{r['queries'] if r['queries'] is not None else '-':>6}")
+    if before and before.get('p99_ms') and r['p99_ms']:
+        line += f"{(r['p99_ms'] / before['p99_ms'] - 1) * 100:>+9.0f}%"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Web/API 负载测试')
+    parser.add_argument('--draws', type=int, default=7000, help='模拟开奖期数')
+    parser.add_argument('--predictions', type=int, default=2000, help='模拟预测记录条数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--reseed', action='store_true', help='重新生成模拟库')
+    parser.add_argument('--workdir', default=str(project_root / 'data' / 'loadtest'), help='模拟库和服务日志目录')
+    parser.add_argument('--server', choices=['asgi', 'wsgi'], default='asgi',
+                        help='asgi: uvicorn（生产部署方式）；wsgi: runserver')
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn 进程数')
+    parser.add_argument('--endpoints', default='', help='逗号分隔的接口名，默认全部')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发客户端数')
+    parser.add_argument('--requests', type=int, default=200, help='每个接口的请求数')
+    parser.add_argument('--warmup', type=int, default=3, help='每个接口的预热请求数（不计入）')
+    parser.add_argument('--save', help='结果保存为基线 JSON')
+    parser.add_argument('--compare', help='与基线 JSON 对比，有回归时退出码为 1')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='p99/吞吐允许的相对变化')
+    args = parser.parse_args()
+
+    endpoints = ENDPOINTS
+    if args.endpoints:
+        wanted = args.endpoints.split(',')
+        unknown = set(wanted) - {e.name for e in ENDPOINTS}
+        if unknown:
+            parser.error(f"未知接口: {', '.join(sorted(unknown))}（可选: {', '.join(e.name for e in ENDPOINTS)}）")
+        endpoints = [e for e in ENDPOINTS if e.name in wanted]
+
+    params = prepare_database(args)
+    workdir = Path(args.workdir).resolve()
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    proc = start_server(args, workdir, port)
+    baseline = json.loads(Path(args.compare).read_text(encoding='utf-8')) if args.compare else None
+
+    results = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'git': git_revision(),
+            'python': platform.python_version(),
+            'server': args.server,
+            'workers': args.workers,
+            'draws': args.draws,
+            'predictions': args.predictions,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+        },
+        'endpoints': {},
+    }
+    try:
+        wait_until_ready(base_url, proc)
+        print("=" * 106)
+        print(f"负载测试: {args.server} ({args.workers}进程), {args.concurrency}并发 × 每接口{args.requests}请求, "
+              f"{args.draws}期 / {args.predictions}条预测")
+        print("=" * 106)
+        print(f"{'接口':<28}{'请求':>7}{'错误':>6}{'请求/秒':>9}{'p50(ms)':>10}{'p90(ms)':>10}"
+              f"{'p99(ms)':>10}{'服务端':>10}{'SQL':>6}" + (f"{'p99变化':>10}" if baseline else ''))
+        for endpoint in endpoints:
+            samples = run_endpoint(base_url, endpoint, params, args.concurrency, args.requests, args.warmup)
+            summary = results['endpoints'][endpoint.name] = summarize(samples)
+            print_row(endpoint.name, summary, baseline['endpoints'].get(endpoint.name) if baseline else None)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    if args.save:
+        path = Path(args.save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"\n结果已保存: {path}")
+
+    if baseline:
+        regressions = compare(baseline, results, args.tolerance)
+        print(f"\n对比基线 {args.compare}（{baseline['meta'].get('git') or '未知版本'}）:")
+        for message in regressions:
+            print(f"  ✗ {message}")
+        if regressions:
+            sys.exit(1)
+        print("  ✓ 无回归")
+
+
+if __name__ == '__main__':
+    main()
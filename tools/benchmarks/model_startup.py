@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+模型加载启动时间与内存基准测试
+
+同时启动 N 个工作进程，分别用 .pth（pickle，torch.load）和 .safetensors（内存映射）
+加载同一模型并完成一次推理，对比：
+    - 加载耗时（检查点 -> 可推理的模型）和首次推理耗时
+    - 每个进程的 RSS，以及 N 个进程合计的 PSS（共享页按进程数分摊，反映真实物理内存）
+    - 权重占用：.pth 为各进程私有的匿名内存；.safetensors 为文件映射，各进程共享页缓存
+
+内存数据读取 /proc/<pid>/smaps_rollup，仅支持 Linux。
+.safetensors 不存在时先运行: python manage.py export_model
+
+使用示例:
+    python tools/benchmarks/model_startup.py
+    python tools/benchmarks/model_startup.py --workers 8
+    python tools/benchmarks/model_startup.py --checkpoint models/best_model.pth
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def smaps_rollup(pid: int) -> dict:
+    """进程内存汇总（KiB）"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return values
+
+
+def mapped_pss(pid: int, path: str) -> int:
+    """进程中映射了 path 的区域的 PSS 合计（KiB）"""
+    total = 0
+    inside = False
+    with open(f'/proc/{pid}/smaps') as f:
+        for line in f:
+            fields = line.split()
+            if '-' in fields[0] and not fields[0].endswith(':'):
+                inside = fields[-1] == path
+            elif inside and fields[0] == 'Pss:':
+                total += int(fields[1])
+    return total
+
+
+def child(path: str, mmap: bool):
+    """
+    工作进程：加载模型并推理一次，输出耗时后等待父进程测量内存（stdin 关闭时退出）
+    """
+    started = time.perf_counter()
+    import torch
+    from src.models.lottery_model import LotteryModel
+    import_ms = (time.perf_counter() - started) * 1000
+    torch.set_num_threads(1)
+
+    started = time.perf_counter()
+    model = LotteryModel.load(path, mmap=mmap).eval()
+    load_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with torch.no_grad():
+        model.predict(torch.randint(0, 10, (1, 30, 3)))
+    infer_ms = (time.perf_counter() - started) * 1000
+
+    print(json.dumps({'import_ms': import_ms, 'load_ms': load_ms, 'infer_ms': infer_ms}), flush=True)
+    sys.stdin.read()
+
+
+def run(label: str, path: str, mmap: bool, workers: int) -> dict:
+    """
+    逐个启动 workers 个进程（上一个就绪后再启动下一个，避免 CPU 争用干扰加载耗时），
+    全部存活时测量内存
+    """
+    procs = []
+    timings = []
+    try:
+        for _ in range(workers):
+            proc = subprocess.Popen([sys.executable, __file__, '--child', path] + ([] if mmap else ['--no-mmap']),
+                                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, cwd=project_root)
+            procs.append(proc)
+            timings.append(json.loads(proc.stdout.readline()))
+        memory = [smaps_rollup(proc.pid) for proc in procs]
+        weights_pss = [mapped_pss(proc.pid, os.path.abspath(path)) for proc in procs] if mmap else None
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait()
+
+    def mean(values):
+        return sum(values) / len(values)
+
+    return {
+        'format': label,
+        'load_ms': mean([t['load_ms'] for t in timings]),
+        'infer_ms': mean([t['infer_ms'] for t in timings]),
+        'import_ms': mean([t['import_ms'] for t in timings]),
+        'rss_mb': mean([m['Rss'] for m in memory]) / 1024,
+        'pss_total_mb': sum(m['Pss'] for m in memory) / 1024,
+        'private_mb': mean([m.get('Private_Clean', 0) + m.get('Private_Dirty', 0) for m in memory]) / 1024,
+        'weights_pss_mb': sum(weights_pss) / 1024 if weights_pss is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模型加载启动时间与内存基准测试')
+    parser.add_argument('--checkpoint', default=str(project_root / 'models' / 'checkpoints' / 'best_model.pth'),
+                        help='.pth 检查点（同名 .safetensors 需已导出）')
+    parser.add_argument('--workers', type=int, default=4, help='同时运行的工作进程数')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--no-mmap', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, mmap=not args.no_mmap)
+        return
+
+    from src.models.flat_checkpoint import flat_path_of
+
+    flat_path = flat_path_of(args.checkpoint)
+    if not os.path.exists(flat_path):
+        sys.exit(f'{flat_path} 不存在，请先运行: python manage.py export_model --checkpoint {args.checkpoint}')
+
+    size_mb = os.path.getsize(args.checkpoint) / 1024 / 1024
+    print("=" * 100)
+    print(f"模型加载基准: {args.workers} 个进程, 检查点 {size_mb:.1f}MB")
+    print("=" * 100)
+    print(f"{'格式':<14}{'加载(ms)':>10}{'推理(ms)':>10}{'import(ms)':>12}{'RSS/进程(MB)':>14}"
+          f"{'私有/进程(MB)':>14}{'PSS合计(MB)':>13}{'权重PSS合计(MB)':>16}")
+    for label, path, mmap in (('pth', args.checkpoint, False), ('safetensors', flat_path, True)):
+        r = run(label, path, mmap, args.workers)
+        weights = f"{r['weights_pss_mb']:.2f}" if r['weights_pss_mb'] is not None else '-'
+        print(f"{r['format']:<14}{r['load_ms']:>10.1f}{r['infer_ms']:>10.1f}{r['import_ms']:>12.0f}"
+              f"{r['rss_mb']:>14.1f}{r['private_mb']:>14.1f}{r['pss_total_mb']:>13.1f}{weights:>16}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+SQLite 并发读写基准测试
+
+对比 SQLite 默认设置与 settings.SQLITE_PROFILE（WAL 等）下，
+多个读进程（30期窗口查询 + 全表扫描）与写进程（批量插入）同时运行时的吞吐量、
+读延迟和 "database is locked" 错误数。
+
+使用示例:
+    python tools/benchmarks/sqlite_concurrency.py
+    python tools/benchmarks/sqlite_concurrency.py --readers 8 --writers 2 --duration 10
+"""
+import argparse
+import multiprocessing as mp
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from lottery.db import build_pragmas
+from lottery_web import settings as project_settings
+
+
+def create_database(path: str, rows: int):
+    """创建测试库并写入 rows 期模拟数据"""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE draws (id INTEGER PRIMARY KEY, seq INTEGER, period TEXT UNIQUE, "
+        "digit1 INTEGER, digit2 INTEGER, digit3 INTEGER)"
+    )
+    conn.execute("CREATE INDEX draws_seq ON draws (seq)")
+    rng = random.Random(0)
+    conn.executemany(
+        "INSERT INTO draws (seq, period, digit1, digit2, digit3) VALUES (?, ?, ?, ?, ?)",
+        [(i, f"P{i:08d}", rng.randint(0, 9), rng.randint(0, 9), rng.randint(0, 9))
+         for i in range(1, rows + 1)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def connect(path: str, profile: dict) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    for statement in build_pragmas(profile):
+        conn.execute(statement)
+    return conn
+
+
+def reader(path, profile, duration, results):
+    conn = connect(path, profile)
+    max_seq = conn.execute("SELECT MAX(seq) FROM draws").fetchone()[0]
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if i % 20 == 0:
+                conn.execute("SELECT COUNT(*), AVG(digit1 + digit2 + digit3) FROM draws").fetchone()
+            else:
+                seq = random.randint(31, max_seq)
+                conn.execute(
+                    "SELECT digit1, digit2, digit3 FROM draws WHERE seq >= ? AND seq < ? ORDER BY seq",
+                    (seq - 30, seq)
+                ).fetchall()
+            latencies.append(time.perf_counter() - start)
+        except sqlite3.OperationalError:
+            errors += 1
+        i += 1
+    conn.close()
+    results.put(('read', latencies, errors))
+
+
+def writer(path, profile, duration, batch, worker_id, results):
+    conn = connect(path, profile)
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    n = 0
+    while time.perf_counter() < deadline:
+        rows = [
+            (10_000_000 + worker_id * 1_000_000 + n + k, f"W{worker_id}-{n + k}", 1, 2, 3)
+            for k in range(batch)
+        ]
+        start = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO draws (seq, period, digit1, digit2, digit3) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            conn.execute("COMMIT")
+            latencies.append(time.perf_counter() - start)
+            n += batch
+        except sqlite3.OperationalError:
+            errors += 1
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+    conn.close()
+    results.put(('write', latencies, errors))
+
+
+def run(profile_name: str, profile: dict, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.sqlite3')
+        create_database(path, args.rows)
+        # journal_mode=WAL 会持久化到库文件，先设置一次
+        connect(path, profile).close()
+
+        results = mp.Queue()
+        procs = [mp.Process(target=reader, args=(path, profile, args.duration, results))
+                 for _ in range(args.readers)]
+        procs += [mp.Process(target=writer, args=(path, profile, args.duration, args.batch, w, results))
+                  for w in range(args.writers)]
+        for proc in procs:
+            proc.start()
+        collected = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+
+    reads = [lat for kind, lats, _ in collected if kind == 'read' for lat in lats]
+    writes = [lat for kind, lats, _ in collected if kind == 'write' for lat in lats]
+    read_errors = sum(err for kind, _, err in collected if kind == 'read')
+    write_errors = sum(err for kind, _, err in collected if kind == 'write')
+
+    return {
+        'profile': profile_name,
+        'reads_per_sec': len(reads) / args.duration,
+        'writes_per_sec': len(writes) * args.batch / args.duration,
+        'read_p50_ms': float(np.percentile(reads, 50) * 1000) if reads else float('nan'),
+        'read_p99_ms': float(np.percentile(reads, 99) * 1000) if reads else float('nan'),
+        'write_p99_ms': float(np.percentile(writes, 99) * 1000) if writes else float('nan'),
+        'lock_errors': read_errors + write_errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite 并发读写基准测试')
+    parser.add_argument('--rows', type=int, default=20000, help='初始期数')
+    parser.add_argument('--readers', type=int, default=4, help='读进程数')
+    parser.add_argument('--writers', type=int, default=1, help='写进程数')
+    parser.add_argument('--batch', type=int, default=50, help='每次写事务插入的行数')
+    parser.add_argument('--duration', type=float, default=5.0, help='每组测试时长（秒）')
+    args = parser.parse_args()
+
+    profiles = [
+        ('default', {}),
+        ('tuned', project_settings.SQLITE_PROFILE or {}),
+    ]
+
+    print("=" * 90)
+    print(f"SQLite 并发读写基准: {args.rows}期, {args.readers}读 / {args.writers}写, 每组{args.duration}秒")
+    print("=" * 90)
+    print(f"{'配置':<10}{'读/秒':>12}{'写行/秒':>12}{'读p50(ms)':>12}{'读p99(ms)':>12}{'写p99(ms)':>12}{'锁错误':>10}")
+
+    for name, profile in profiles:
+        r = run(name, profile, args)
+        print(f"{r['profile']:<10}{r['reads_per_sec']:>12.0f}{r['writes_per_sec']:>12.0f}"
+              f"{r['read_p50_ms']:>12.2f}{r['read_p99_ms']:>12.2f}{r['write_p99_ms']:>12.2f}"
+              f"{r['lock_errors']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -34,7 +34,7 @@ src_path = os.path.join(project_root, 'src')
 if src_path not in sys.path:
     sys.path.insert(0, src_path)
 
-from models.lottery_model import LotteryModel
+from src.models.registry import get_model
 
 
 def calculate_confidence_score(digit_probs: np.ndarray) -> Dict[str, float]:
@@ -85,10 +85,10 @@ def calculate_historical_percentile(
     """
     # 加载历史数据并计算置信度
     model_path = os.path.join(project_root, 'models', 'best_model.pth')
-    model = LotteryModel.load(model_path, device='cpu')
-    model.eval()
+    model = get_model(model_path, device='cpu')
     
-    all_periods = list(LotteryPeriod.objects.all().order_by('period'))
+    # 只取最近 lookback_periods + 30 期（按开奖序号的索引查询）
+    all_periods = LotteryPeriod.objects.latest_window(lookback_periods + 30)
     total = len(all_periods)
     
     if total < 30 + lookback_periods:
@@ -232,20 +232,18 @@ def generate_daily_recommendation(
         model_path = os.path.join(project_root, 'models', 'best_model.pth')
     
     print(f"加载模型: {model_path}")
-    model = LotteryModel.load(model_path, device=device)
-    model.eval()
+    model = get_model(model_path, device=device)
     
     # 获取最新数据
     print("获取最新历史数据...")
-    all_periods = list(LotteryPeriod.objects.all().order_by('period'))
+    latest_periods = LotteryPeriod.objects.latest_window(window_size)
     
-    if len(all_periods) < window_size:
+    if len(latest_periods) < window_size:
         return {
             'error': f'数据不足，需要至少{window_size}期历史数据'
         }
     
-    latest_periods = all_periods[-window_size:]
-    latest_period = all_periods[-1]
+    latest_period = latest_periods[-1]
     
     print(f"最新期号: {latest_period.period}")
     print(f"开奖日期: {latest_period.date}")
@@ -5,8 +5,6 @@ import os
 import sys
 import json
 import django
-from datetime import datetime
-from collections import Counter
 
 # 设置Django环境
 sys.path.insert(0, os.path.dirname(__file__))
@@ -14,6 +12,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lottery_web.settings')
 django.setup()
 
 from lottery.models import LotteryPeriod, BacktestResult
+from lottery.ingest import ingest_backtest, ingest_records
 
 
 def import_lottery_data():
@@ -25,49 +24,15 @@ def import_lottery_data():
         data = json.load(f)
     
     periods_data = data['data']
-    added_count = 0
-    updated_count = 0
     
-    for item in periods_data:
-        period_id = item['period']
-        date_str = item['date']
-        numbers = item['numbers']
-        
-        # 解析日期
-        try:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-        except:
-            date_obj = datetime.now().date()
-        
-        # 计算形态
-        counter = Counter(numbers)
-        if len(counter) == 1:
-            shape = '豹子'
-        elif len(counter) == 2:
-            shape = '组三'
-        else:
-            shape = '组六'
-        
-        # 保存或更新
-        obj, created = LotteryPeriod.objects.update_or_create(
-            period=period_id,
-            defaults={
-                'date': date_obj,
-                'digit1': numbers[0],
-                'digit2': numbers[1],
-                'digit3': numbers[2],
-                'sum_value': sum(numbers),
-                'shape': shape,
-            }
-        )
-        
-        if created:
-            added_count += 1
-        else:
-            updated_count += 1
-        
-        if (added_count + updated_count) % 100 == 0:
-            print(f"  处理: {added_count + updated_count}期...")
+    # 批量比对并写入（单事务，分批 bulk_create/bulk_update）
+    stats = ingest_records(
+        periods_data,
+        update_type='manual',
+        message=f'从{os.path.basename(data_file)}导入{len(periods_data)}条数据'
+    )
+    added_count = stats['added']
+    updated_count = stats['updated']
     
     print(f"✓ 彩票数据导入完成！新增{added_count}期，更新{updated_count}期")
     return added_count, updated_count
@@ -85,37 +50,8 @@ def import_backtest_results():
     with open(result_file, 'r', encoding='utf-8') as f:
         data = json.load(f)
     
-    summary = data['summary']
-    period_results = data['period_results']
-    
-    # 确定期号范围
-    bet_periods = [p for p in period_results if p.get('action') == 'bet']
-    if bet_periods:
-        start_period = bet_periods[-1].get('period', 'Unknown')
-        end_period = bet_periods[0].get('period', 'Unknown')
-    else:
-        start_period = end_period = 'Unknown'
-    
-    # 保存回测结果
-    backtest = BacktestResult.objects.create(
-        strategy_name='Top 10% Dynamic',
-        start_period=start_period,
-        end_period=end_period,
-        total_periods=summary['total_periods'],
-        starting_capital=summary['starting_capital'],
-        final_capital=summary['final_capital'],
-        total_profit=summary['total_profit'],
-        roi_percentage=summary['roi_percentage'],
-        max_drawdown=summary['max_drawdown'],
-        bet_periods=summary['bet_periods'],
-        skip_periods=summary['skip_periods'],
-        win_periods=summary['win_periods'],
-        win_rate=summary['win_rate'],
-        total_invested=summary['total_invested'],
-        total_prizes=summary['total_prizes'],
-        period_results=period_results,
-        capital_history=summary['capital_history']
-    )
+    # 与后台任务 import_backtest 共用同一导入逻辑
+    backtest = ingest_backtest(data, strategy_name='Top 10% Dynamic')
     
     print(f"✓ 回测结果导入完成！策略: {backtest.strategy_name}, ROI: {backtest.roi_percentage:.2f}%")
 
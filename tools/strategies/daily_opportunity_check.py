@@ -26,7 +26,7 @@ import sys
 from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent))
-from src.models.lottery_model import LotteryModel
+from src.models.registry import get_model
 
 # ==================== 配置参数 ====================
 RECOMMENDED_THRESHOLD = 58.45  # Top1%投注阈值
@@ -250,8 +250,7 @@ def check_today_opportunity(
         print("\n[2] 加载模型并预测...")
     
     device = torch.device('cpu')
-    model = LotteryModel.load(model_path, device=device)
-    model.eval()
+    model = get_model(model_path, device=device)
     
     # 预测
     with torch.no_grad():